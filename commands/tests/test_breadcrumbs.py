@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from leapp.cli.commands.upgrade import breadcrumbs
+
+
+@pytest.fixture
+def document_path(monkeypatch, tmp_path):
+    path = str(tmp_path / 'migration-results')
+    monkeypatch.setattr(breadcrumbs, 'MIGRATION_RESULTS_PATH', path)
+    monkeypatch.setattr(breadcrumbs._BreadCrumbs, '_get_packages', staticmethod(lambda: []))
+    monkeypatch.setattr(breadcrumbs._BreadCrumbs, '_verify_leapp_pkgs', staticmethod(lambda: []))
+    monkeypatch.setattr(breadcrumbs, 'get_messages', lambda names, run_id: [])
+    return path
+
+
+def _read_activities(path):
+    with open(path) as f:
+        return json.load(f)['activities']
+
+
+@pytest.mark.parametrize('content', (None, '', '{"activities": "invalid"}'))
+def test_read_missing_or_invalid_document(document_path, content):
+    if content is not None:
+        with open(document_path, 'w') as f:
+            f.write(content)
+    assert breadcrumbs._read_document(document_path) == []
+
+
+def test_write_document_retention(monkeypatch, document_path):
+    monkeypatch.setattr(breadcrumbs, 'MAX_ACTIVITIES', 3)
+
+    doc = breadcrumbs._write_document([{'run_id': str(i)} for i in range(5)])
+
+    assert doc == {'activities': [{'run_id': '2'}, {'run_id': '3'}, {'run_id': '4'}]}
+    assert _read_activities(document_path) == doc['activities']
+    assert not os.path.exists(document_path + '.tmp')
+
+
+def test_save(monkeypatch, document_path):
+    monkeypatch.setenv('LEAPP_NO_RHSM_FACTS', '1')
+
+    breadcrumbs._BreadCrumbs('preupgrade').save()
+    # the document is current after every invocation
+    assert [activity['activity'] for activity in _read_activities(document_path)] == ['preupgrade']
+
+    crumbs = breadcrumbs._BreadCrumbs('upgrade')
+    crumbs.fail()
+    crumbs.save()
+    assert [(activity['activity'], activity['success']) for activity in _read_activities(document_path)] == [
+        ('preupgrade', True), ('upgrade', False)
+    ]
+
+
+def test_save_rhsm_facts_from_written_document(monkeypatch, document_path):
+    monkeypatch.setenv('LEAPP_NO_RHSM_FACTS', '0')
+    monkeypatch.setattr(breadcrumbs, 'MAX_ACTIVITIES', 2)
+    with open(document_path, 'w') as f:
+        json.dump({'activities': [{'run_id': '1'}, {'run_id': '2'}]}, f)
+    monkeypatch.delenv('LEAPP_EXECUTION_ID', raising=False)
+    saved = []
+    monkeypatch.setattr(breadcrumbs._BreadCrumbs, '_save_rhsm_facts',
+                        lambda self, activities: saved.append(activities))
+
+    breadcrumbs._BreadCrumbs('upgrade').save()
+
+    assert saved == [_read_activities(document_path)]
+    assert [activity['run_id'] for activity in saved[0]] == ['2', 'N/A']
@@ -15,6 +15,12 @@ try:
 except ImportError:
     JSONDecodeError = ValueError
 
+MIGRATION_RESULTS_PATH = '/etc/migration-results'
+MAX_ACTIVITIES = 100
+"""
+Number of the most recent activities kept in the migration results document
+"""
+
 
 def _get_os_name(ipu_cfg, direction):
     """
@@ -51,6 +57,36 @@ def _flattened(d):
     return dict(items)
 
 
+def _read_document(path):
+    """ Read activities from the migration results document, e.g. /etc/migration-results """
+    try:
+        with open(path) as f:
+            content = json.load(f)
+    except (OSError, JSONDecodeError):
+        # Expected to happen when the document is still empty or does not yet exist
+        return []
+    if isinstance(content, dict) and isinstance(content.get('activities', None), list):
+        return content['activities']
+    return []
+
+
+def _write_document(activities):
+    """
+    Write the migration results document with the MAX_ACTIVITIES most recent activities
+
+    The document is replaced atomically, so it is never seen partially written.
+
+    :return: The written document
+    """
+    doc = {'activities': activities[-MAX_ACTIVITIES:]}
+    tmp_path = MIGRATION_RESULTS_PATH + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(doc, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.rename(tmp_path, MIGRATION_RESULTS_PATH)
+    return doc
+
+
 class _BreadCrumbs:
     def __init__(self, activity):
         self._crumbs = {
@@ -116,26 +152,11 @@ class _BreadCrumbs:
         self._crumbs['activity_ended'] = datetime.datetime.utcnow().isoformat() + 'Z'
         self._crumbs['env'] = {k: v for k, v in os.environ.items() if k.startswith('LEAPP_')}
         try:
-            with open('/etc/migration-results', 'a+') as crumbs:
-                crumbs.seek(0)
-                doc = {'activities': []}
-                try:
-                    content = json.load(crumbs)
-                    if isinstance(content, dict):
-                        if isinstance(content.get('activities', None), list):
-                            doc = content
-                except JSONDecodeError:
-                    # Expected to happen when /etc/migration-results is still empty or does not yet exist
-                    pass
-                doc['activities'].append(self._crumbs)
-                crumbs.seek(0)
-                crumbs.truncate()
-                json.dump(doc, crumbs, indent=2, sort_keys=True)
-                crumbs.write('\n')
-                if os.environ.get('LEAPP_NO_RHSM_FACTS', '0') != '1':
-                    self._save_rhsm_facts(doc['activities'])
+            doc = _write_document(_read_document(MIGRATION_RESULTS_PATH) + [self._crumbs])
+            if os.environ.get('LEAPP_NO_RHSM_FACTS', '0') != '1':
+                self._save_rhsm_facts(doc['activities'])
         except OSError:
-            sys.stderr.write('WARNING: Could not write to /etc/migration-results\n')
+            sys.stderr.write('WARNING: Could not write to {}\n'.format(MIGRATION_RESULTS_PATH))
 
     @staticmethod
     def _get_packages():
@@ -165,7 +186,8 @@ def produces_breadcrumbs(f):
     """
     Ensures that `/etc/migration-results` gets produced on every invocation of `leapp upgrade` & `leapp preupgrade`
 
-    Every execution of the upgrade will have their own entry in the /etc/migration-results file.
+    Every execution of the upgrade will have their own entry in the /etc/migration-results file,
+    only the MAX_ACTIVITIES most recent entries are kept.
     For a user flow like: leapp preupgrade && leapp upgrade && reboot there should be 5 new entries in the file:
 
     1. leapp preupgrade
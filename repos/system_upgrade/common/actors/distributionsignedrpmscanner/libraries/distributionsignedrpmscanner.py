@@ -1,3 +1,5 @@
+import re
+
 from leapp.libraries.common import rhui
 from leapp.libraries.common.config import get_env, get_source_distro_id
 from leapp.libraries.common.distro import get_distribution_data
@@ -6,10 +8,78 @@ from leapp.models import DistributionSignedRPM, InstalledRPM, InstalledUnsignedR
 from leapp.utils.deprecation import suppress_deprecation
 
 
+_KEY_ID_RE = re.compile(r'Key ID ([0-9a-fA-F]+)')
+
+_SIGNATURES_CACHE = {}
+"""
+Classification of package signatures per distribution: distro -> (distro key ids, {pgpsig: is signed})
+
+Packages are signed just by a few keys, so each distinct pgpsig is classified just once.
+"""
+
+
+def get_key_id(pgpsig):
+    """
+    Get the ID of the key the package has been signed with from its pgpsig.
+
+    :param pgpsig: Signature of the package, e.g. 'RSA/SHA256, <date>, Key ID 199e2f91fd431d51'
+    :type pgpsig: str
+    :return: The lowercase key ID or None if pgpsig does not contain any (e.g. the package is not signed)
+    :rtype: str | None
+    """
+    match = _KEY_ID_RE.search(pgpsig)
+    return match.group(1).lower() if match else None
+
+
 def is_distro_signed(pkg, distro_keys):
+    """
+    Check whether the package is signed by any of the distribution keys.
+
+    :param pkg: The package to check
+    :type pkg: RPM
+    :param distro_keys: Lowercase IDs of distribution keys, preferably a set
+    :type distro_keys: Iterable[str]
+    """
+    key_id = get_key_id(pkg.pgpsig)
+    if key_id is not None:
+        return key_id in distro_keys
+    # unknown format of the signature, look for the key anywhere in it
     return any(key in pkg.pgpsig for key in distro_keys)
 
 
+def _get_signatures_cache(distro, distro_keys):
+    cached_keys, signatures = _SIGNATURES_CACHE.get(distro, (None, None))
+    if cached_keys != distro_keys:
+        signatures = {}
+        _SIGNATURES_CACHE[distro] = (distro_keys, signatures)
+    return signatures
+
+
+def is_distro_signed_cached(pkg, distro, distro_keys):
+    """
+    Same as :func:`is_distro_signed`, but reuse the result for packages with the same pgpsig.
+
+    :param distro: The distribution the keys belong to
+    :type distro: str
+    :param distro_keys: Lowercase IDs of distribution keys
+    :type distro_keys: frozenset[str]
+    """
+    signatures = _get_signatures_cache(distro, distro_keys)
+    signed = signatures.get(pkg.pgpsig)
+    if signed is None:
+        signed = signatures[pkg.pgpsig] = is_distro_signed(pkg, distro_keys)
+    return signed
+
+
+def get_distro_keys(distro):
+    """
+    Get lowercase IDs of keys of the distribution from its gpg-signatures.json.
+
+    :rtype: frozenset[str]
+    """
+    return frozenset(key.lower() for key in get_distribution_data(distro).get('keys', []))
+
+
 def is_exceptional(pkg, allowlist):
     """
     Some packages should be marked always as signed
@@ -33,7 +103,7 @@ def is_exceptional(pkg, allowlist):
 @suppress_deprecation(InstalledUnsignedRPM)
 def process():
     distro = get_source_distro_id()
-    distro_keys = get_distribution_data(distro).get('keys', [])
+    distro_keys = get_distro_keys(distro)
     all_signed = get_env('LEAPP_DEVEL_RPMS_ALL_SIGNED', '0') == '1'
     rhui_pkgs = rhui.get_all_known_rhui_pkgs_for_current_upg()
 
@@ -43,7 +113,7 @@ def process():
 
     for rpm_pkgs in api.consume(InstalledRPM):
         for pkg in rpm_pkgs.items:
-            if all_signed or is_distro_signed(pkg, distro_keys) or is_exceptional(pkg, rhui_pkgs):
+            if all_signed or is_distro_signed_cached(pkg, distro, distro_keys) or is_exceptional(pkg, rhui_pkgs):
                 signed_pkgs.items.append(pkg)
             else:
                 unsigned_pkgs.items.append(pkg)
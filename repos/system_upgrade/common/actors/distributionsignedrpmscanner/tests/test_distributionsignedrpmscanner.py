@@ -1,7 +1,12 @@
+import os
 import unittest.mock as mock
 
+import pytest
+
+from leapp.libraries.actor import distributionsignedrpmscanner
 from leapp.libraries.common import rpms
 from leapp.libraries.common.config import mock_configs
+from leapp.libraries.stdlib import api
 from leapp.models import (
     DistributionSignedRPM,
     Distro,
@@ -15,6 +20,9 @@ from leapp.models import (
 )
 
 RH_PACKAGER = 'Red Hat, Inc. <http://bugzilla.redhat.com/bugzilla>'
+DISTRO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../files/distro')
+DISTROS = ('rhel', 'centos', 'almalinux', 'rocky')
+PACKAGES_COUNT = 1000
 
 
 class MockObject(Model):
@@ -274,3 +282,97 @@ def test_has_package(current_actor_context):
     assert not rpms.has_package(InstalledUnsignedRPM, 'nosuchpackage', context=current_actor_context)
     assert rpms.has_package(ThirdPartyRPM, 'sample02', context=current_actor_context)
     assert not rpms.has_package(ThirdPartyRPM, 'nosuchpackage', context=current_actor_context)
+
+
+def _pgpsig(key_id):
+    return 'RSA/SHA256, Mon 01 Jan 2024 12:00:00 PM UTC, Key ID {}'.format(key_id)
+
+
+def _rpm(name, pgpsig):
+    return RPM(name=name, version='0.1', release='1.el9', epoch='0', packager=RH_PACKAGER, arch='noarch',
+               pgpsig=pgpsig)
+
+
+@pytest.fixture
+def distro_dir(monkeypatch):
+    monkeypatch.setattr(api, 'get_common_folder_path', lambda dummy_folder: DISTRO_DIR)
+    monkeypatch.setattr(distributionsignedrpmscanner, '_SIGNATURES_CACHE', {})
+
+
+@pytest.mark.parametrize('pgpsig, expected', (
+    (_pgpsig('199e2f91fd431d51'), '199e2f91fd431d51'),
+    (_pgpsig('199E2F91FD431D51'), '199e2f91fd431d51'),
+    ('DSA/SHA1, Mon 01 Jan 2024 12:00:00 PM UTC, Key ID 5326810137017186', '5326810137017186'),
+    ('(none)', None),
+    ('', None),
+))
+def test_get_key_id(pgpsig, expected):
+    assert distributionsignedrpmscanner.get_key_id(pgpsig) == expected
+
+
+@pytest.mark.parametrize('pgpsig, expected', (
+    (_pgpsig('199e2f91fd431d51'), True),
+    (_pgpsig('199E2F91FD431D51'), True),
+    (_pgpsig('0000000000000000'), False),
+    # a key ID containing the distro key is not the distro key
+    (_pgpsig('199e2f91fd431d51ff'), False),
+    ('(none)', False),
+    # signatures in an unknown format are searched for the key
+    ('signed by 199e2f91fd431d51', True),
+))
+def test_is_distro_signed(pgpsig, expected):
+    distro_keys = frozenset(['199e2f91fd431d51', '5326810137017186'])
+    assert distributionsignedrpmscanner.is_distro_signed(_rpm('pkg', pgpsig), distro_keys) is expected
+
+
+def test_get_distro_keys(distro_dir):
+    keys = distributionsignedrpmscanner.get_distro_keys('rhel')
+    assert '199e2f91fd431d51' in keys
+    assert all(key == key.lower() for key in keys)
+
+
+def test_signatures_cached(monkeypatch, distro_dir):
+    calls = []
+    orig_is_distro_signed = distributionsignedrpmscanner.is_distro_signed
+
+    def is_distro_signed_counted(pkg, distro_keys):
+        calls.append(pkg.pgpsig)
+        return orig_is_distro_signed(pkg, distro_keys)
+
+    monkeypatch.setattr(distributionsignedrpmscanner, 'is_distro_signed', is_distro_signed_counted)
+    signed = _rpm('signed', _pgpsig('199e2f91fd431d51'))
+    unsigned = _rpm('unsigned', '(none)')
+    rhel_keys = distributionsignedrpmscanner.get_distro_keys('rhel')
+    centos_keys = distributionsignedrpmscanner.get_distro_keys('centos')
+
+    for dummy_i in range(3):
+        assert distributionsignedrpmscanner.is_distro_signed_cached(signed, 'rhel', rhel_keys)
+        assert not distributionsignedrpmscanner.is_distro_signed_cached(unsigned, 'rhel', rhel_keys)
+        assert not distributionsignedrpmscanner.is_distro_signed_cached(signed, 'centos', centos_keys)
+    assert len(calls) == 3
+
+    # different keys of the same distro invalidate its results
+    assert not distributionsignedrpmscanner.is_distro_signed_cached(signed, 'rhel', frozenset(['0000000000000000']))
+    assert len(calls) == 4
+
+
+def _previous_is_distro_signed(pkg, distro_keys):
+    return any(key in pkg.pgpsig for key in distro_keys)
+
+
+def test_classification_matches_substring_search(distro_dir):
+    """
+    Packages signed by keys of several distributions are classified in the same way as by the substring search.
+    """
+    distro_keys = {distro: distributionsignedrpmscanner.get_distro_keys(distro) for distro in DISTROS}
+    key_ids = sorted(set().union(*distro_keys.values())) + ['{:016x}'.format(i) for i in range(20)]
+    pkgs = [_rpm('pkg{}'.format(i), _pgpsig(key_ids[i % len(key_ids)]) if i % 50 else '(none)')
+            for i in range(PACKAGES_COUNT)]
+
+    expected = {distro: [_previous_is_distro_signed(pkg, sorted(keys)) for pkg in pkgs]
+                for distro, keys in distro_keys.items()}
+    result = {distro: [distributionsignedrpmscanner.is_distro_signed_cached(pkg, distro, keys) for pkg in pkgs]
+              for distro, keys in distro_keys.items()}
+
+    assert result == expected
+    assert all(any(signed) for signed in result.values())
@@ -40,6 +40,9 @@ def enable_rhsm_repos():
                                      'It is expected behavior in case of custom repositories unknown to'
                                      ' the subscription-manager - these need to be enabled manually.\n{0}'
                                      .format(str(err)))
+    finally:
+        # enabled repositories have changed
+        rhsm.invalidate_cache(mounting.NotIsolatedActions(base_dir='/'))
 
 
 def get_submgr_cmd(repos_to_enable):
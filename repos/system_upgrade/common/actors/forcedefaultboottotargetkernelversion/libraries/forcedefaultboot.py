@@ -1,4 +1,5 @@
 from leapp.libraries import stdlib
+from leapp.libraries.common import bootentries
 from leapp.libraries.common.config import architecture
 from leapp.libraries.stdlib import api, config
 from leapp.models import InstalledTargetKernelInfo
@@ -6,23 +7,29 @@ from leapp.models import InstalledTargetKernelInfo
 
 def update_default_kernel(kernel_info):
     try:
-        stdlib.run(['grubby', '--info', kernel_info.kernel_img_path])
+        kernel_entries = bootentries.get_kernel_boot_entries(kernel_info.kernel_img_path)
     except stdlib.CalledProcessError:
-        api.current_logger().error('Expected kernel %s to be installed at the boot loader but cannot be found.',
-                                   kernel_info.kernel_img_path)
+        api.current_logger().error('Could not check for kernel existence in boot loader.', exc_info=True)
+        return
     except OSError:
         api.current_logger().error('Could not check for kernel existence in boot loader. Is grubby installed?')
-    else:
-        try:
-            stdlib.run(['grubby', '--set-default', kernel_info.kernel_img_path])
-            if architecture.matches_architecture(architecture.ARCH_S390X):
-                # on s390x we need to call zipl explicitly because of issue in grubby,
-                # otherwise the new boot entry will not be set as default
-                # See https://bugzilla.redhat.com/show_bug.cgi?id=1764306
-                stdlib.run(['/usr/sbin/zipl'])
-        except (OSError, stdlib.CalledProcessError):
-            api.current_logger().error('Failed to set default kernel to: %s',
-                                       kernel_info.kernel_img_path, exc_info=True)
+        return
+    if not kernel_entries:
+        api.current_logger().error('Expected kernel %s to be installed at the boot loader but cannot be found.',
+                                   kernel_info.kernel_img_path)
+        return
+    try:
+        stdlib.run(['grubby', '--set-default', kernel_info.kernel_img_path])
+        if architecture.matches_architecture(architecture.ARCH_S390X):
+            # on s390x we need to call zipl explicitly because of issue in grubby,
+            # otherwise the new boot entry will not be set as default
+            # See https://bugzilla.redhat.com/show_bug.cgi?id=1764306
+            stdlib.run(['/usr/sbin/zipl'])
+    except (OSError, stdlib.CalledProcessError):
+        api.current_logger().error('Failed to set default kernel to: %s',
+                                   kernel_info.kernel_img_path, exc_info=True)
+    finally:
+        bootentries.invalidate()
 
 
 def process():
@@ -53,18 +60,16 @@ def process():
         return
 
     try:
-        current_default_kernel = stdlib.run(['grubby', '--default-kernel'])['stdout'].strip()
+        default_entry = bootentries.get_default_boot_entry()
     except (OSError, stdlib.CalledProcessError):
-        api.current_logger().warning('Failed to query grubby for default kernel', exc_info=True)
+        api.current_logger().warning('Failed to query the default boot entry', exc_info=True)
         return
 
-    for type_ in ('index', 'title'):
-        try:
-            stdlib.run(['grubby', '--default-{}'.format(type_)])
-        except (OSError, stdlib.CalledProcessError):
-            api.current_logger().warning('Failed to query grubby for default {}'.format(type_), exc_info=True)
-            return
+    if not default_entry:
+        api.current_logger().warning('Failed to determine the default boot entry')
+        return
 
+    current_default_kernel = default_entry.kernel
     if current_default_kernel != kernel_info.kernel_img_path:
         api.current_logger().warning(('Current default boot entry not target kernel version: Current default: %s.'
                                       'Forcing default kernel to %s'),
@@ -5,6 +5,7 @@ import pytest
 
 from leapp.libraries import stdlib
 from leapp.libraries.actor import forcedefaultboot
+from leapp.libraries.common import bootentries
 from leapp.libraries.common.config import architecture
 from leapp.libraries.common.testutils import CurrentActorMocked, logger_mocked
 from leapp.libraries.stdlib import api
@@ -61,17 +62,9 @@ CASES = (
      Expected(grubby_setdefault=True, zipl_called=True))
 )
 
-_GRUBBY_INFO_TEMPLATE = '''index={entry_index}
-kernel=/boot/vmlinuz-{kernel_version}
-args="ro rd.lvm.lv=testing/root rd.lvm.lv=testing/swap rhgb quiet LANG=en_US.UTF-8"
-root=/dev/mapper/testing-root
-initrd=/boot/initramfs-{kernel_version}.img
-'''
-
 
 class MockedRun:
-    def __init__(self, case):
-        self.case = case
+    def __init__(self):
         self.called_setdefault = False
         self.called_zipl = False
 
@@ -84,41 +77,36 @@ class MockedRun:
             self.called_zipl = True
         return None
 
-    def grubby_info(self, cmd):
-        assert len(cmd) == 3
-        if not self.case.entry_exists:
-            raise stdlib.CalledProcessError('A leapp command failed', cmd, {})
-
-        return {
-            'stdout': _GRUBBY_INFO_TEMPLATE.format(
-                entry_index=0 if self.case.entry_default else 1,
-                kernel_version=TARGET_KERNEL_VERSION)
-            }
-
-    def grubby_default_kernel(self, cmd):
-        assert len(cmd) == 2
-        if self.case.entry_default:
-            return {'stdout': '{}\n'.format(TARGET_KERNEL_PATH)}
-        return {'stdout': '{}\n'.format(OLD_KERNEL_PATH)}
-
-    def grubby_default_index(self, cmd):
-        assert len(cmd) == 2
-        if self.case.entry_default:
-            return {'stdout': '1\n'}
-        return {'stdout': '0\n'}
-
-    def grubby_default_title(self, cmd):
-        assert len(cmd) == 2
-        if self.case.entry_default:
-            return {'stdout': '{}\n'.format(TARGET_KERNEL_TITLE)}
-        return {'stdout': '{}\n'.format(OLD_KERNEL_TITLE)}
-
     def grubby_set_default(self, cmd):
         assert len(cmd) == 3
         assert cmd[2] == TARGET_KERNEL_PATH
         self.called_setdefault = True
 
 
+def _boot_entry(index, title, kernel_version):
+    return bootentries.BootEntry(
+        index=index,
+        id='f6f57ac447784f60ba924dfbd5776a1b-{}'.format(kernel_version),
+        title=title,
+        kernel='/boot/vmlinuz-{}'.format(kernel_version),
+        args='ro rd.lvm.lv=testing/root rd.lvm.lv=testing/swap rhgb quiet LANG=en_US.UTF-8',
+        root='/dev/mapper/testing-root',
+        initrd='/boot/initramfs-{}.img'.format(kernel_version),
+    )
+
+
+def mocked_boot_entries(monkeypatch, case):
+    target_entry = _boot_entry(0 if case.entry_default else 1, TARGET_KERNEL_TITLE, TARGET_KERNEL_VERSION)
+    old_entry = _boot_entry(1 if case.entry_default else 0, OLD_KERNEL_TITLE, OLD_KERNEL_VERSION)
+    entries = sorted([target_entry, old_entry] if case.entry_exists else [old_entry])
+
+    monkeypatch.setattr(forcedefaultboot.bootentries, 'get_default_boot_entry',
+                        lambda: target_entry if case.entry_default else old_entry)
+    monkeypatch.setattr(forcedefaultboot.bootentries, 'get_kernel_boot_entries',
+                        lambda path: [entry for entry in entries if entry.kernel == path])
+    monkeypatch.setattr(forcedefaultboot.bootentries, 'invalidate', lambda: None)
+
+
 def mocked_consume(case):
     def impl(*args):
         if case.message_available:
@@ -146,7 +134,8 @@ def mocked_exists(case, orig_path_exists):
 def test_force_default_boot_target_scenario(case_result, monkeypatch):
     case, result = case_result
     arch = architecture.ARCH_S390X if case.arch_s390x else architecture.ARCH_X86_64
-    mocked_run = MockedRun(case)
+    mocked_run = MockedRun()
+    mocked_boot_entries(monkeypatch, case)
     monkeypatch.setattr(api, 'consume', mocked_consume(case))
     monkeypatch.setattr(stdlib, 'run', mocked_run)
     monkeypatch.setattr(os.path, 'exists', mocked_exists(case, os.path.exists))
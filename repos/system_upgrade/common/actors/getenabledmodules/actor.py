@@ -1,5 +1,5 @@
 from leapp.actors import Actor
-from leapp.libraries.common.dnflibs.dnfmodule import get_enabled_modules
+from leapp.libraries.common.dnflibs import dnfsnapshot
 from leapp.models import EnabledModules, Module
 from leapp.tags import FactsPhaseTag, IPUWorkflowTag
 
@@ -15,5 +15,5 @@ class GetEnabledModules(Actor):
     tags = (IPUWorkflowTag, FactsPhaseTag)
 
     def process(self):
-        modules = [Module(name=m.getName(), stream=m.getStream()) for m in get_enabled_modules()]
+        modules = [Module(name=m.name, stream=m.stream) for m in dnfsnapshot.get_module_streams() if m.enabled]
         self.produce(EnabledModules(modules=modules))
@@ -1,6 +1,18 @@
 #!/bin/bash
 ###############################################################################
+STAGE_NAME=""
+STAGE_START=$SECONDS
+
+stage_finished() {
+    if [[ -n "$STAGE_NAME" ]]; then
+        echo "Stage '$STAGE_NAME' took $((SECONDS - STAGE_START))s"
+    fi
+}
+
 stage() {
+    stage_finished
+    STAGE_NAME=$1
+    STAGE_START=$SECONDS
     echo '###############################################################################'
     printf "%*s\n" $(((80 - ${#1}) / 2)) "$1"
     echo '###############################################################################'
@@ -13,6 +25,19 @@ get_kernel_version() {
     rpm -q --whatprovides kernel --qf '%{VERSION}-%{RELEASE}.%{ARCH}\n' | sort --version-sort | tail --lines=1
 }
 
+# Print the value of the --compress dracut option for the fast profile.
+# Multithreaded compressors are preferred, zstd only when the kernel is able
+# to decompress the initramfs compressed by it. Print nothing to use the dracut
+# default.
+get_fast_compression() {
+    local kernel_config="/lib/modules/${1}/config"
+    if command -v zstd > /dev/null && grep -q '^CONFIG_RD_ZSTD=y' "$kernel_config" 2>/dev/null; then
+        echo "zstd -q -T0"
+    elif command -v pigz > /dev/null; then
+        echo "pigz"
+    fi
+}
+
 dracut_install_modules()
 {
     stage "Installing leapp dracut modules"
@@ -82,6 +107,18 @@ build() {
             )
     fi
 
+    # The debug profile keeps the most verbose output and the dracut default compression
+    DRACUT_VERBOSITY_ARGS=()
+    DRACUT_COMPRESS_ARGS=()
+    if [[ "$LEAPP_INITRAMFS_PROFILE" == "debug" ]]; then
+        DRACUT_VERBOSITY_ARGS=(-vvvv)
+    else
+        DRACUT_COMPRESS=$(get_fast_compression "$KERNEL_VERSION")
+        if [[ -n "$DRACUT_COMPRESS" ]]; then
+            DRACUT_COMPRESS_ARGS=(--compress "$DRACUT_COMPRESS")
+        fi
+    fi
+
     DRACUT_INSTALL="systemd-nspawn"
     if [[ -n "$LEAPP_DRACUT_INSTALL_FILES" ]]; then
         DRACUT_INSTALL="$DRACUT_INSTALL $LEAPP_DRACUT_INSTALL_FILES"
@@ -96,9 +133,10 @@ build() {
     # Copy out kernel HMAC so that integrity checks can be performed (performed only in FIPS mode)
     \cp "/lib/modules/${KERNEL_VERSION}/.vmlinuz.hmac" ".vmlinuz-upgrade.$KERNEL_ARCH.hmac"
 
-    stage "Building initram disk for kernel: $KERNEL_VERSION"
+    stage "Building initram disk for kernel: $KERNEL_VERSION (profile: ${LEAPP_INITRAMFS_PROFILE:-fast})"
     \dracut \
-        -vvvv \
+        "${DRACUT_VERBOSITY_ARGS[@]}" \
+        "${DRACUT_COMPRESS_ARGS[@]}" \
         --force \
         --conf "$DRACUT_CONF" \
         --confdir "$DRACUT_CONF_DIR" \
@@ -116,7 +154,8 @@ build() {
         exit 1;
     }
 
-    stage "Building initram disk for kernel: ${KERNEL_VERSION} finished"
+    stage_finished
+    echo "Building initram disk for kernel: ${KERNEL_VERSION} finished"
 }
 
 build
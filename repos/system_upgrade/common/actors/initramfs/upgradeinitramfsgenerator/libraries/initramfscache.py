@@ -0,0 +1,215 @@
+"""
+Persistent cache of the generated upgrade initramfs and kernel.
+
+The generation of the upgrade initramfs by dracut takes minutes, but its
+inputs are usually the same when the upgrade is re-run e.g. after a failed
+download of packages or after an inhibitor has been resolved. The generated
+artifacts are stored under /var/lib/leapp together with a manifest of all
+inputs (installed packages in the target userspace, hashes of the included
+files and modules, the generator script and its parameters) and reused when
+the manifest of the current inputs is identical. The cache is removed after
+the reboot by the remove_upgrade_caches actor.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+from leapp.libraries.stdlib import api, CalledProcessError
+
+INITRAMFS_CACHE_DIR = '/var/lib/leapp/initramfs_cache'
+INITRAMFS_CACHE_FORMAT_VERSION = 1
+INITRAMFS_CACHE_MAX_ENTRIES = 2
+"""
+Number of the most recently used cache entries kept, older ones are evicted
+"""
+MANIFEST_NAME = 'manifest.json'
+
+CONFIG_INPUT_PATHS = ('/etc/dracut.conf', '/etc/dracut.conf.d', '/etc/lvm/lvm.conf', '/etc/mdadm.conf')
+"""
+Configuration files in the target userspace which could be included in the initramfs
+"""
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _hash_path(path):
+    """
+    Hash the file or all files in the directory tree on the given path.
+
+    Symlinks are not followed as they could point outside of the target
+    userspace, their targets are recorded instead.
+
+    :return: Hash of the file, a dict {relative path: hash} for a directory or None if the path does not exist
+    """
+    if os.path.islink(path):
+        return 'symlink:{}'.format(os.readlink(path))
+    if os.path.isfile(path):
+        return _hash_file(path)
+    if not os.path.isdir(path):
+        return None
+    result = {}
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            full_path = os.path.join(root, name)
+            if os.path.islink(full_path) or not os.path.isdir(full_path):
+                result[os.path.relpath(full_path, path)] = _hash_path(full_path)
+    return result
+
+
+def _get_installed_pkgs(context):
+    try:
+        pkgs = context.call(['rpm', '-qa', '--queryformat', '%{NEVRA}\n'], split=True)['stdout']
+    except CalledProcessError as e:
+        api.current_logger().warning('Cannot get packages installed in the target userspace: {}'.format(e))
+        return None
+    return sorted(pkg for pkg in pkgs if pkg)
+
+
+def get_manifest(context, parameters, paths):
+    """
+    Get the manifest of inputs of the upgrade initramfs generation.
+
+    :param context: The target userspace the initramfs is generated in
+    :type context: mounting.IsolatedActions
+    :param parameters: Parameters of the generation, e.g. the kernel version and included modules
+    :type parameters: dict
+    :param paths: Paths of files and directories inside the context which are used in the generation
+    :type paths: list(str)
+    :return: The manifest or None if it cannot be created
+    :rtype: dict or None
+    """
+    pkgs = _get_installed_pkgs(context)
+    if pkgs is None:
+        return None
+    try:
+        files = {path: _hash_path(context.full_path(path)) for path in set(paths) | set(CONFIG_INPUT_PATHS)}
+    except OSError as e:
+        api.current_logger().warning('Cannot hash inputs of the upgrade initramfs: {}'.format(e))
+        return None
+    return {
+        'format_version': INITRAMFS_CACHE_FORMAT_VERSION,
+        'parameters': parameters,
+        'packages': pkgs,
+        'files': files,
+    }
+
+
+def get_cache_key(manifest):
+    """
+    Get the key of the cache entry for the given manifest
+    """
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _get_entry_dir(key):
+    return os.path.join(INITRAMFS_CACHE_DIR, key)
+
+
+def _remove_entry(entry_dir):
+    shutil.rmtree(entry_dir, ignore_errors=True)
+
+
+def restore(key, artifacts_dir, artifact_names):
+    """
+    Copy the cached artifacts into the artifacts directory.
+
+    The artifacts are verified against hashes stored in the manifest and the
+    entry is removed when they do not match.
+
+    :param key: The cache key, see :func:`get_cache_key`
+    :type key: str
+    :param artifacts_dir: The directory to copy the artifacts into, its previous content is removed
+    :type artifacts_dir: str
+    :param artifact_names: Names of files the initramfs generation produces in the artifacts directory
+    :type artifact_names: list(str)
+    :return: True if the artifacts have been restored from the cache
+    :rtype: bool
+    """
+    entry_dir = _get_entry_dir(key)
+    try:
+        with open(os.path.join(entry_dir, MANIFEST_NAME)) as f:
+            artifacts = json.load(f)['artifacts']
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+    try:
+        if sorted(artifacts) != sorted(artifact_names):
+            raise ValueError('Unexpected artifacts: {}'.format(', '.join(sorted(artifacts))))
+        for name in artifact_names:
+            if _hash_file(os.path.join(entry_dir, name)) != artifacts[name]:
+                raise ValueError('Checksum of {} does not match'.format(name))
+    except (OSError, ValueError) as e:
+        api.current_logger().warning('Removing invalid upgrade initramfs cache entry {}: {}'.format(entry_dir, e))
+        _remove_entry(entry_dir)
+        return False
+
+    try:
+        shutil.rmtree(artifacts_dir, ignore_errors=True)
+        os.makedirs(artifacts_dir)
+        for name in artifact_names:
+            shutil.copy2(os.path.join(entry_dir, name), os.path.join(artifacts_dir, name))
+        # mark the entry as the most recently used one
+        os.utime(entry_dir, None)
+    except OSError as e:
+        api.current_logger().warning('Cannot restore the upgrade initramfs from {}: {}'.format(entry_dir, e))
+        return False
+    return True
+
+
+def _evict():
+    """
+    Remove all but INITRAMFS_CACHE_MAX_ENTRIES most recently used entries
+    """
+    try:
+        entries = [os.path.join(INITRAMFS_CACHE_DIR, name) for name in os.listdir(INITRAMFS_CACHE_DIR)]
+    except OSError:
+        return
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for entry_dir in entries[INITRAMFS_CACHE_MAX_ENTRIES:]:
+        api.current_logger().debug('Evicting upgrade initramfs cache entry {}'.format(entry_dir))
+        _remove_entry(entry_dir)
+
+
+def store(key, manifest, artifacts_dir, artifact_names):
+    """
+    Store the generated artifacts in the cache.
+
+    Failures are just logged as the cache is not crucial for the upgrade.
+
+    :param key: The cache key, see :func:`get_cache_key`
+    :type key: str
+    :param manifest: The manifest of inputs, see :func:`get_manifest`
+    :type manifest: dict
+    :param artifacts_dir: The directory with the generated artifacts
+    :type artifacts_dir: str
+    :param artifact_names: Names of the generated files to store
+    :type artifact_names: list(str)
+    """
+    entry_dir = _get_entry_dir(key)
+    tmp_dir = entry_dir + '.tmp'
+    _remove_entry(tmp_dir)
+    try:
+        os.makedirs(tmp_dir)
+        artifacts = {}
+        for name in artifact_names:
+            shutil.copy2(os.path.join(artifacts_dir, name), os.path.join(tmp_dir, name))
+            artifacts[name] = _hash_file(os.path.join(tmp_dir, name))
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(dict(manifest, artifacts=artifacts), f, indent=2, sort_keys=True)
+        _remove_entry(entry_dir)
+        os.rename(tmp_dir, entry_dir)
+    except OSError as e:
+        api.current_logger().warning('Cannot store the upgrade initramfs into the cache: {}'.format(e))
+        _remove_entry(tmp_dir)
+        return
+    api.current_logger().debug('Stored the upgrade initramfs into {}'.format(entry_dir))
+    _evict()
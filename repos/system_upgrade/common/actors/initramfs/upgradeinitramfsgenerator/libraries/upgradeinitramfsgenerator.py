@@ -1,11 +1,14 @@
 import itertools
 import os
 import shutil
+import time
 from collections import namedtuple
 
 from leapp.exceptions import StopActorExecutionError
+from leapp.libraries.actor import initramfscache
 from leapp.libraries.common import kernel as kernel_lib
 from leapp.libraries.common import mounting
+from leapp.libraries.common.config import get_env
 from leapp.libraries.common.config.version import get_target_major_version
 from leapp.libraries.common.dnflibs import dnfplugin
 from leapp.libraries.stdlib import api, CalledProcessError
@@ -27,7 +30,22 @@ from leapp.utils.deprecation import suppress_deprecation
 
 INITRAM_GEN_SCRIPT_NAME = 'generate-initram.sh'
 DRACUT_DIR = '/dracut'
+ARTIFACTS_DIR = '/artifacts'
 LEAPP_CMDLINE_CONF_PATH = '/etc/cmdline.d/50-leapp.conf'
+
+INITRAMFS_PROFILE_FAST = 'fast'
+INITRAMFS_PROFILE_DEBUG = 'debug'
+INITRAMFS_PROFILES = (INITRAMFS_PROFILE_FAST, INITRAMFS_PROFILE_DEBUG)
+"""
+Profiles of the initramfs generation
+
+fast: multithreaded compression and the default dracut verbosity
+debug: the most verbose dracut output and single threaded compression
+"""
+LIVEMODE_DRACUT_PROFILE_ARGS = {
+    INITRAMFS_PROFILE_FAST: ['--compress', 'xz --check=crc32 --lzma2=dict=1MiB -T0'],
+    INITRAMFS_PROFILE_DEBUG: ['--verbose', '--compress', 'xz'],
+}
 DEDICATED_LEAPP_PART_URL = 'https://access.redhat.com/solutions/7011704'
 
 
@@ -71,6 +89,27 @@ def _get_target_kernel_version(context):
     return kernel_version
 
 
+def get_initramfs_profile():
+    """
+    Get the profile of the initramfs generation.
+
+    The profile is set by the LEAPP_INITRAMFS_PROFILE environment variable.
+    The debug profile is used by default when leapp is executed with --debug,
+    the fast one otherwise.
+
+    :rtype: str
+    """
+    default = INITRAMFS_PROFILE_DEBUG if get_env('LEAPP_DEBUG', '0') == '1' else INITRAMFS_PROFILE_FAST
+    profile = get_env('LEAPP_INITRAMFS_PROFILE', default)
+    if profile not in INITRAMFS_PROFILES:
+        api.current_logger().warning(
+            'Unknown initramfs profile "{}" set by LEAPP_INITRAMFS_PROFILE, using the "{}" profile. Known'
+            ' profiles: {}'.format(profile, default, ', '.join(INITRAMFS_PROFILES))
+        )
+        return default
+    return profile
+
+
 def _reinstall_leapp_repository_hint():
     """
     Convenience function for creating a detail for StopActorExecutionError with a hint to reinstall the
@@ -404,7 +443,8 @@ def generate_initram_disk(context):
         'LEAPP_ADD_DRACUT_MODULES="{dracut_modules}"',
         'LEAPP_KERNEL_ARCH={arch}',
         'LEAPP_ADD_KERNEL_MODULES="{kernel_modules}"',
-        'LEAPP_DRACUT_INSTALL_FILES="{files}"'
+        'LEAPP_DRACUT_INSTALL_FILES="{files}"',
+        'LEAPP_INITRAMFS_PROFILE={profile}',
     ]
 
     if next(api.consume(LVMConfig), None):
@@ -419,17 +459,68 @@ def generate_initram_disk(context):
         dracut_modules=fmt_module_list(initramfs_includes.dracut_modules),
         kernel_modules=fmt_module_list(initramfs_includes.kernel_modules),
         arch=api.current_actor().configuration.architecture,
-        files=' '.join(initramfs_includes.files)
+        files=' '.join(initramfs_includes.files),
+        profile=get_initramfs_profile(),
     )
     cmd = os.path.join('/', INITRAM_GEN_SCRIPT_NAME)
 
-    # FIXME: issue #376
-    context.call(['/bin/sh', '-c', f'{env_variables} {cmd}'], env=env)
+    cache_inputs = _get_initramfs_cache_inputs(context, env_variables, env, kernel_version, initramfs_includes)
+    artifacts_dir = context.full_path(ARTIFACTS_DIR)
+    if cache_inputs and initramfscache.restore(cache_inputs[0], artifacts_dir, _get_artifact_names()):
+        api.current_logger().info(
+            'Reusing the upgrade initramfs generated previously from the same inputs (cache key: {}).'
+            .format(cache_inputs[0])
+        )
+    else:
+        start = time.time()
+        # FIXME: issue #376
+        context.call(['/bin/sh', '-c', f'{env_variables} {cmd}'], env=env)
+        api.current_logger().info('Generated the upgrade initramfs in {:.0f}s.'.format(time.time() - start))
+        if cache_inputs:
+            initramfscache.store(cache_inputs[0], cache_inputs[1], artifacts_dir, _get_artifact_names())
 
     boot_files_info = copy_boot_files(context)
     return boot_files_info
 
 
+def _get_artifact_names():
+    """
+    Get names of files generated by the initram generator script in the ARTIFACTS_DIR
+    """
+    kernel, initram = get_boot_artifact_names()
+    return [kernel, '.{}.hmac'.format(kernel), initram]
+
+
+def _get_initramfs_cache_inputs(context, env_variables, env, kernel_version, initramfs_includes):
+    """
+    Get the key and the manifest of the upgrade initramfs cache entry for the given inputs.
+
+    The cache can be disabled by the LEAPP_DEVEL_SKIP_INITRAMFS_CACHE=1 environment variable.
+
+    :return: A tuple (key, manifest) or None if the cache should not be used
+    """
+    if get_env('LEAPP_DEVEL_SKIP_INITRAMFS_CACHE', '0') == '1':
+        return None
+    parameters = {
+        'kernel_version': kernel_version,
+        'env_variables': env_variables,
+        'env': env,
+    }
+    paths = [
+        os.path.join('/', INITRAM_GEN_SCRIPT_NAME),
+        DRACUT_DIR,
+        os.path.join('/', 'lib', 'modules', kernel_version, 'extra', 'leapp'),
+    ] + list(initramfs_includes.files)
+    # files copied into the userspace (e.g. /etc/crypttab, multipath or nvme
+    # configuration) can be included in the initramfs by dracut
+    for msg in api.consume(TargetUserSpaceUpgradeTasks):
+        paths.extend(cfile.dst or cfile.src for cfile in msg.copy_files)
+    manifest = initramfscache.get_manifest(context, parameters, paths)
+    if not manifest:
+        return None
+    return initramfscache.get_cache_key(manifest), manifest
+
+
 def get_boot_artifact_names():
     """
     Get the name of leapp's initramfs and upgrade kernel.
@@ -482,11 +573,12 @@ def _generate_livemode_initramfs(context, userspace_initramfs_dest, target_kerne
 
     dracut_modules = ['livenet', 'dmsquash-live'] + [mod.name for mod in initramfs_includes.dracut_modules]
 
-    cmd = ['dracut', '--verbose', '--compress', 'xz',
-           '--no-hostonly', '--no-hostonly-default-device',
-           '-o', 'plymouth dash resume ifcfg earlykdump',
-           '--lvmconf', '--mdadmconf',
-           '--kver', target_kernel_ver, '-f', userspace_initramfs_dest]
+    profile = get_initramfs_profile()
+    cmd = ['dracut'] + LIVEMODE_DRACUT_PROFILE_ARGS[profile]
+    cmd += ['--no-hostonly', '--no-hostonly-default-device',
+            '-o', 'plymouth dash resume ifcfg earlykdump',
+            '--lvmconf', '--mdadmconf',
+            '--kver', target_kernel_ver, '-f', userspace_initramfs_dest]
 
     # Add included files
     cmd.extend(itertools.chain(*(('--install', file) for file in initramfs_includes.files)))
@@ -498,7 +590,11 @@ def _generate_livemode_initramfs(context, userspace_initramfs_dest, target_kerne
     cmd.extend(itertools.chain(*(('--add-drivers', module.name) for module in initramfs_includes.kernel_modules)))
 
     try:
+        start = time.time()
         context.call(cmd, env=env)
+        api.current_logger().info(
+            'Generated the initramfs for the live mode in {:.0f}s (profile: {}).'.format(time.time() - start, profile)
+        )
     except CalledProcessError as error:
         api.current_logger().error('Failed to generate (live) upgrade image. Error: %s', error)
         raise StopActorExecutionError(
@@ -0,0 +1,136 @@
+import json
+import os
+
+import pytest
+
+from leapp.libraries.actor import initramfscache
+from leapp.libraries.common.testutils import logger_mocked
+from leapp.libraries.stdlib import api, CalledProcessError
+
+ARTIFACTS = ['vmlinuz-upgrade.x86_64', '.vmlinuz-upgrade.x86_64.hmac', 'initramfs-upgrade.x86_64.img']
+
+
+class MockedContext:
+    def __init__(self, base_dir, pkgs=None):
+        self.base_dir = base_dir
+        self.pkgs = pkgs
+
+    def call(self, *dummy_args, **dummy_kwargs):
+        if self.pkgs is None:
+            raise CalledProcessError('rpm failed', ['rpm'], {'exit_code': 1})
+        return {'stdout': self.pkgs}
+
+    def full_path(self, path):
+        return os.path.join(self.base_dir, os.path.abspath(path).lstrip('/'))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(initramfscache, 'INITRAMFS_CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+@pytest.fixture
+def userspace(tmp_path):
+    root = tmp_path / 'userspace'
+    (root / 'dracut' / '85sys-upgrade-redhat').mkdir(parents=True)
+    (root / 'dracut' / '85sys-upgrade-redhat' / 'module-setup.sh').write_text('install() { :; }')
+    (root / 'etc').mkdir()
+    (root / 'etc' / 'mdadm.conf').write_text('ARRAY /dev/md0')
+    (root / 'generate-initram.sh').write_text('dracut')
+    return root
+
+
+def _write_artifacts(artifacts_dir, content='artifact'):
+    artifacts_dir.mkdir(exist_ok=True)
+    for name in ARTIFACTS:
+        (artifacts_dir / name).write_text('{} {}'.format(content, name))
+
+
+def _get_manifest(userspace, pkgs=('kernel-core-5.14.0-100.el9.x86_64', 'dracut-057-53.el9.x86_64')):
+    context = MockedContext(str(userspace), list(pkgs))
+    return initramfscache.get_manifest(context, {'kernel_version': '5.14.0-100.el9.x86_64'},
+                                       ['/generate-initram.sh', '/dracut', '/lib/modules/5.14.0/extra/leapp'])
+
+
+def test_manifest(userspace):
+    manifest = _get_manifest(userspace)
+
+    assert manifest['packages'] == ['dracut-057-53.el9.x86_64', 'kernel-core-5.14.0-100.el9.x86_64']
+    assert manifest['files']['/lib/modules/5.14.0/extra/leapp'] is None
+    assert list(manifest['files']['/dracut']) == ['85sys-upgrade-redhat/module-setup.sh']
+    assert manifest['files']['/etc/mdadm.conf']
+    assert initramfscache.get_cache_key(manifest) == initramfscache.get_cache_key(_get_manifest(userspace))
+
+
+@pytest.mark.parametrize('change', ('package', 'dracut_module', 'config', 'parameters'))
+def test_cache_key_changed(userspace, change):
+    manifest = _get_manifest(userspace)
+    if change == 'package':
+        changed_manifest = _get_manifest(userspace, pkgs=['kernel-core-5.14.0-101.el9.x86_64'])
+    else:
+        if change == 'dracut_module':
+            (userspace / 'dracut' / '85sys-upgrade-redhat' / 'module-setup.sh').write_text('changed')
+        elif change == 'config':
+            (userspace / 'etc' / 'mdadm.conf').write_text('ARRAY /dev/md1')
+        changed_manifest = _get_manifest(userspace)
+        if change == 'parameters':
+            changed_manifest['parameters']['kernel_version'] = '5.14.0-101.el9.x86_64'
+
+    assert initramfscache.get_cache_key(manifest) != initramfscache.get_cache_key(changed_manifest)
+
+
+def test_manifest_rpm_failed(userspace):
+    context = MockedContext(str(userspace))
+    assert initramfscache.get_manifest(context, {}, ['/dracut']) is None
+
+
+def test_store_and_restore(tmp_path, userspace):
+    manifest = _get_manifest(userspace)
+    key = initramfscache.get_cache_key(manifest)
+    artifacts_dir = tmp_path / 'artifacts'
+    assert not initramfscache.restore(key, str(artifacts_dir), ARTIFACTS)
+
+    _write_artifacts(artifacts_dir)
+    initramfscache.store(key, manifest, str(artifacts_dir), ARTIFACTS)
+
+    restored_dir = tmp_path / 'restored'
+    restored_dir.mkdir()
+    (restored_dir / 'stale-file').write_text('stale')
+    assert initramfscache.restore(key, str(restored_dir), ARTIFACTS)
+    assert sorted(os.listdir(str(restored_dir))) == sorted(ARTIFACTS)
+    for name in ARTIFACTS:
+        assert (restored_dir / name).read_text() == (artifacts_dir / name).read_text()
+
+
+def test_restore_corrupted(tmp_path, cache_dir, userspace):
+    manifest = _get_manifest(userspace)
+    key = initramfscache.get_cache_key(manifest)
+    artifacts_dir = tmp_path / 'artifacts'
+    _write_artifacts(artifacts_dir)
+    initramfscache.store(key, manifest, str(artifacts_dir), ARTIFACTS)
+    with open(str(cache_dir / key / 'manifest.json')) as f:
+        assert json.load(f)['packages'] == manifest['packages']
+
+    (cache_dir / key / ARTIFACTS[2]).write_text('truncated')
+
+    assert not initramfscache.restore(key, str(tmp_path / 'restored'), ARTIFACTS)
+    assert not (cache_dir / key).exists()
+    assert api.current_logger.warnmsg
+
+
+def test_eviction(monkeypatch, tmp_path, cache_dir):
+    monkeypatch.setattr(initramfscache, 'INITRAMFS_CACHE_MAX_ENTRIES', 2)
+    artifacts_dir = tmp_path / 'artifacts'
+    for i, key in enumerate(('key1', 'key2', 'key3')):
+        _write_artifacts(artifacts_dir, content=key)
+        initramfscache.store(key, {}, str(artifacts_dir), ARTIFACTS)
+        os.utime(str(cache_dir / key), (i, i))
+
+    # restoring marks the entry as the most recently used one
+    assert initramfscache.restore('key2', str(tmp_path / 'restored'), ARTIFACTS)
+    _write_artifacts(artifacts_dir, content='key4')
+    initramfscache.store('key4', {}, str(artifacts_dir), ARTIFACTS)
+
+    assert sorted(os.listdir(str(cache_dir))) == ['key2', 'key4']
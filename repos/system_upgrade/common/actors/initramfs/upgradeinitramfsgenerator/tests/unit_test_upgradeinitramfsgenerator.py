@@ -39,6 +39,11 @@ MODULES = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def no_initramfs_cache(monkeypatch):
+    monkeypatch.setattr(upgradeinitramfsgenerator, '_get_initramfs_cache_inputs', lambda *args: None)
+
+
 @pytest.fixture
 def adjust_cwd():
     previous_cwd = os.getcwd()
@@ -262,6 +267,57 @@ def test_generate_initram_disk_includes_md_cmdline_conf(monkeypatch):
     assert 'LEAPP_DRACUT_MDADMCONF="1"' in shell_cmd
 
 
+@pytest.mark.parametrize('envars,expected_profile', [
+    ({}, 'fast'),
+    ({'LEAPP_DEBUG': '1'}, 'debug'),
+    ({'LEAPP_INITRAMFS_PROFILE': 'debug'}, 'debug'),
+    ({'LEAPP_DEBUG': '1', 'LEAPP_INITRAMFS_PROFILE': 'fast'}, 'fast'),
+    ({'LEAPP_INITRAMFS_PROFILE': 'unknown'}, 'fast'),
+])
+def test_get_initramfs_profile(monkeypatch, envars, expected_profile):
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_actor', CurrentActorMocked(envars=envars))
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_logger', logger_mocked())
+
+    assert upgradeinitramfsgenerator.get_initramfs_profile() == expected_profile
+    assert bool(upgradeinitramfsgenerator.api.current_logger.warnmsg) == ('unknown' in envars.values())
+
+
+@pytest.mark.parametrize('profile', ('fast', 'debug'))
+def test_generate_initram_disk_profile(monkeypatch, profile):
+    context = MockedContext()
+    curr_actor = CurrentActorMocked(msgs=gen_UDM_list(MODULES[0]), arch=architecture.ARCH_X86_64,
+                                    envars={'LEAPP_INITRAMFS_PROFILE': profile})
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_actor', curr_actor)
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_dracut_modules', MockedCopyArgs())
+    monkeypatch.setattr(upgradeinitramfsgenerator, '_get_target_kernel_version', lambda _: '1.0-1.x86_64')
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_kernel_modules', MockedCopyArgs())
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_boot_files', lambda dummy: None)
+    monkeypatch.setattr(upgradeinitramfsgenerator, '_get_fspace', MockedGetFspace(2*2**30))
+
+    upgradeinitramfsgenerator.generate_initram_disk(context)
+
+    shell_cmd = context.called_call[0][0][0][2]
+    assert 'LEAPP_INITRAMFS_PROFILE={}'.format(profile) in shell_cmd
+
+
+@pytest.mark.parametrize('profile,expected_args', [
+    ('fast', ['--compress', 'xz --check=crc32 --lzma2=dict=1MiB -T0']),
+    ('debug', ['--verbose', '--compress', 'xz']),
+])
+def test_generate_livemode_initramfs_profile(monkeypatch, profile, expected_args):
+    context = MockedContext()
+    curr_actor = CurrentActorMocked(arch=architecture.ARCH_X86_64, envars={'LEAPP_INITRAMFS_PROFILE': profile})
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_actor', curr_actor)
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_dracut_modules', MockedCopyArgs())
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_kernel_modules', MockedCopyArgs())
+
+    upgradeinitramfsgenerator._generate_livemode_initramfs(context, '/artifacts/initramfs', '1.0-1.x86_64')
+
+    cmd = context.called_call[0][0][0]
+    assert cmd[:len(expected_args) + 1] == ['dracut'] + expected_args
+    assert cmd.count('--verbose') == (profile == 'debug')
+
+
 def test_prepare_userspace_for_initram_no_script(monkeypatch):
     monkeypatch.setattr(upgradeinitramfsgenerator.api, 'get_actor_file_path', lambda dummy: None)
     with pytest.raises(StopActorExecutionError) as err:
@@ -391,6 +447,73 @@ def test_generate_initram_disk(monkeypatch, input_msgs, dracut_modules, kernel_m
     # similar to the files...
 
 
+@pytest.mark.parametrize('cached', (True, False))
+def test_generate_initram_disk_cache(monkeypatch, cached):
+    context = MockedContext()
+    curr_actor = CurrentActorMocked(msgs=gen_UDM_list(MODULES[0]), arch=architecture.ARCH_X86_64)
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_actor', curr_actor)
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_dracut_modules', MockedCopyArgs())
+    monkeypatch.setattr(upgradeinitramfsgenerator, '_get_target_kernel_version', lambda _: '5.14.0-100.el9.x86_64')
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_kernel_modules', MockedCopyArgs())
+    monkeypatch.setattr(upgradeinitramfsgenerator, 'copy_boot_files', lambda dummy: None)
+    monkeypatch.setattr(upgradeinitramfsgenerator, '_get_fspace', MockedGetFspace(2*2**30))
+    monkeypatch.setattr(upgradeinitramfsgenerator, '_get_initramfs_cache_inputs',
+                        lambda *args: ('cachekey', {'manifest': 'data'}))
+    monkeypatch.setattr(upgradeinitramfsgenerator.initramfscache, 'restore', lambda *args: cached)
+    monkeypatch.setattr(upgradeinitramfsgenerator.initramfscache, 'store', MockedCopyArgs())
+
+    upgradeinitramfsgenerator.generate_initram_disk(context)
+
+    expected_artifacts = ['vmlinuz-upgrade.x86_64', '.vmlinuz-upgrade.x86_64.hmac', 'initramfs-upgrade.x86_64.img']
+    if cached:
+        assert not context.called_call
+        assert upgradeinitramfsgenerator.initramfscache.store.args is None
+    else:
+        assert len(context.called_call) == 1
+        assert upgradeinitramfsgenerator.initramfscache.store.args == (
+            'cachekey', {'manifest': 'data'}, '/base/dir/artifacts', expected_artifacts
+        )
+
+
+def test_get_initramfs_cache_inputs_disabled(monkeypatch):
+    monkeypatch.undo()
+    curr_actor = CurrentActorMocked(envars={'LEAPP_DEVEL_SKIP_INITRAMFS_CACHE': '1'})
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_actor', curr_actor)
+    includes = upgradeinitramfsgenerator.InitramfsIncludes(files=[], dracut_modules=[], kernel_modules=[])
+
+    assert upgradeinitramfsgenerator._get_initramfs_cache_inputs(
+        MockedContext(), 'LEAPP_KERNEL_VERSION=5.14.0-100.el9.x86_64', {}, '5.14.0-100.el9.x86_64', includes
+    ) is None
+
+
+def test_get_initramfs_cache_inputs_copied_files(monkeypatch, tmp_path):
+    monkeypatch.undo()
+    msgs = [TargetUserSpaceUpgradeTasks(copy_files=[CopyFile(src='/etc/crypttab'),
+                                                    CopyFile(src='/host/nvme', dst='/etc/nvme')])]
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_actor', CurrentActorMocked(msgs=msgs))
+    monkeypatch.setattr(upgradeinitramfsgenerator.api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(upgradeinitramfsgenerator.initramfscache, '_get_installed_pkgs', lambda context: ['dracut'])
+    context = MockedContext()
+    context.base_dir = str(tmp_path)
+    (tmp_path / 'etc' / 'nvme').mkdir(parents=True)
+    (tmp_path / 'etc' / 'nvme' / 'hostnqn').write_text('nqn.2014-08.org.nvmexpress:uuid:1')
+    (tmp_path / 'etc' / 'crypttab').write_text('luks-1 UUID=1 none')
+    includes = upgradeinitramfsgenerator.InitramfsIncludes(files=[], dracut_modules=[], kernel_modules=[])
+
+    def get_key():
+        return upgradeinitramfsgenerator._get_initramfs_cache_inputs(
+            context, 'LEAPP_KERNEL_VERSION=5.14.0-100.el9.x86_64', {}, '5.14.0-100.el9.x86_64', includes
+        )[0]
+
+    key = get_key()
+    assert get_key() == key
+    (tmp_path / 'etc' / 'crypttab').write_text('luks-2 UUID=2 none')
+    crypttab_key = get_key()
+    assert crypttab_key != key
+    (tmp_path / 'etc' / 'nvme' / 'hostnqn').write_text('nqn.2014-08.org.nvmexpress:uuid:2')
+    assert get_key() != crypttab_key
+
+
 def test_copy_dracut_modules_rmtree_ignore(monkeypatch):
     context = MockedContext()
 
@@ -1,9 +1,9 @@
 import itertools
-import re
 
 from leapp import reporting
 from leapp.exceptions import StopActorExecutionError
 from leapp.libraries import stdlib
+from leapp.libraries.common import bootentries
 from leapp.libraries.common.config import architecture, version
 from leapp.libraries.common.config.version import get_target_major_version
 from leapp.libraries.common.distro import DISTRO_REPORT_NAMES
@@ -39,6 +39,7 @@ def run_grubby_cmd(cmd):
             # otherwise the entry is not updated in the ZIPL bootloader
             # See https://bugzilla.redhat.com/show_bug.cgi?id=1764306
             stdlib.run(['/usr/sbin/zipl'])
+        bootentries.invalidate()
 
     except (OSError, stdlib.CalledProcessError) as e:
         # In most cases we don't raise StopActorExecutionError in post-upgrade
@@ -70,6 +71,7 @@ def set_default_kernel_args(kernel_args):
     else:
         # Use grub2-editenv to put the kernel args into /boot/grub2/grubenv
         stdlib.run(['grub2-editenv', '-', 'set', 'kernelopts={}'.format(kernel_args)])
+        bootentries.invalidate()
 
 
 def retrieve_arguments_to_modify():
@@ -113,12 +115,6 @@ def modify_args_for_default_kernel(kernel_info,
         run_grubby_cmd(grubby_modify_kernelargs_cmd)
 
 
-def _extract_grubby_value(record):
-    data = record.split('=', 1)[1]
-    matches = re.match(r'^([\'"]?)(.*)\1$', data)
-    return matches.group(2)
-
-
 def report_multple_entries_for_default_kernel():
     if use_cmdline_file():
         report_hint = (
@@ -168,39 +164,31 @@ def retrieve_args_for_default_kernel(kernel_info):
     kernel_root = None
     detected_multiple_entries = False
 
-    cmd = ['grubby', '--info', kernel_info.kernel_img_path]
-    output = stdlib.run(cmd, split=False)
-    for record in output['stdout'].splitlines():
-        # This could be done with one regex but it's cleaner to parse it as
-        # structured data.
-        if record.startswith('args='):
-            temp_kernel_args = _extract_grubby_value(record)
-
+    for entry in bootentries.get_kernel_boot_entries(kernel_info.kernel_img_path):
+        if entry.args:
             if kernel_args:
-                if kernel_args != temp_kernel_args:
+                if kernel_args != entry.args:
                     api.current_logger().warning(
-                        'Grubby output listed `args=` multiple times with different values,'
+                        'Boot entries of the kernel have different `args=` values,'
                         ' continuing with the first result'
                     )
                     detected_multiple_entries = True
                 else:
-                    api.current_logger().warning('Grubby output listed `args=` more than once')
+                    api.current_logger().warning('The kernel has more than one boot entry with `args=`')
             else:
-                kernel_args = temp_kernel_args
-        elif record.startswith('root='):
-            temp_kernel_root = _extract_grubby_value(record)
-
+                kernel_args = entry.args
+        if entry.root:
             if kernel_root:
-                if kernel_root != temp_kernel_root:
+                if kernel_root != entry.root:
                     api.current_logger().warning(
-                        'Grubby output listed `root=` multiple times with different values,'
+                        'Boot entries of the kernel have different `root=` values,'
                         ' continuing with the first result'
                     )
                     detected_multiple_entries = True
                 else:
-                    api.current_logger().warning('Grubby output listed `root=` more than once')
+                    api.current_logger().warning('The kernel has more than one boot entry with `root=`')
             else:
-                kernel_root = temp_kernel_root
+                kernel_root = entry.root
 
     if not kernel_args or not kernel_root:
         raise ReadOfKernelArgsError(
@@ -8,6 +8,7 @@ from leapp import reporting
 from leapp.exceptions import StopActorExecutionError
 from leapp.libraries import stdlib
 from leapp.libraries.actor import kernelcmdlineconfig
+from leapp.libraries.common import bootentries
 from leapp.libraries.common.config import architecture
 from leapp.libraries.common.testutils import create_report_mocked, CurrentActorMocked
 from leapp.libraries.stdlib import api
@@ -34,6 +35,11 @@ SAMPLE_GRUBBY_INFO_OUTPUT = TEMPLATE_GRUBBY_INFO_OUTPUT.format(SAMPLE_KERNEL_ARG
 # pylint: enable=line-too-long
 
 
+def mock_kernel_boot_entries(monkeypatch, grubby_info_output):
+    monkeypatch.setattr(kernelcmdlineconfig.bootentries, 'get_kernel_boot_entries',
+                        lambda path: bootentries.parse_grubby_info(grubby_info_output))
+
+
 class MockedRun:
     def __init__(self, outputs=None):
         """
@@ -95,9 +101,8 @@ def test_kernelcmdline_config_valid_msgs(monkeypatch, tmpdir, msgs, expected_gru
     grubby_base_cmd = ['grubby', '--update-kernel={}'.format(kernel_img_path)]
     expected_grubby_cmd = grubby_base_cmd + expected_grubby_kernelopt_args
 
-    mocked_run = MockedRun(
-        outputs={" ".join(("grubby", "--info", kernel_img_path)): SAMPLE_GRUBBY_INFO_OUTPUT}
-    )
+    mock_kernel_boot_entries(monkeypatch, SAMPLE_GRUBBY_INFO_OUTPUT)
+    mocked_run = MockedRun()
     monkeypatch.setattr(stdlib, 'run', mocked_run)
     monkeypatch.setattr(api, 'current_actor',
                         CurrentActorMocked(architecture.ARCH_X86_64,
@@ -105,18 +110,17 @@ def test_kernelcmdline_config_valid_msgs(monkeypatch, tmpdir, msgs, expected_gru
                                            msgs=msgs)
                         )
     kernelcmdlineconfig.modify_kernel_args_in_boot_cfg()
-    assert mocked_run.commands and len(mocked_run.commands) == 3
+    assert mocked_run.commands and len(mocked_run.commands) == 2
     assert expected_grubby_cmd == mocked_run.commands.pop(0)
 
-    mocked_run = MockedRun(
-        outputs={" ".join(("grubby", "--info", kernel_img_path)): SAMPLE_GRUBBY_INFO_OUTPUT}
-    )
+    mock_kernel_boot_entries(monkeypatch, SAMPLE_GRUBBY_INFO_OUTPUT)
+    mocked_run = MockedRun()
     monkeypatch.setattr(stdlib, 'run', mocked_run)
     monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(architecture.ARCH_S390X, msgs=msgs))
     monkeypatch.setattr(kernelcmdlineconfig, 'KERNEL_CMDLINE_FILE', str(tmpdir / 'cmdline'))
 
     kernelcmdlineconfig.modify_kernel_args_in_boot_cfg()
-    assert mocked_run.commands and len(mocked_run.commands) == 3
+    assert mocked_run.commands and len(mocked_run.commands) == 2
     assert expected_grubby_cmd == mocked_run.commands.pop(0)
     assert ['/usr/sbin/zipl'] == mocked_run.commands.pop(0)
 
@@ -130,10 +134,8 @@ def test_kernelcmdline_explicit_configs(monkeypatch):
                                             initramfs_path='/boot/initramfs-X')
     msgs = [kernel_info, TargetKernelCmdlineArgTasks(to_remove=[KernelCmdlineArg(key='key1', value='value1')])]
 
-    grubby_cmd_info = ["grubby", "--info", kernel_img_path]
-    mocked_run = MockedRun(
-        outputs={" ".join(grubby_cmd_info): SAMPLE_GRUBBY_INFO_OUTPUT}
-    )
+    mock_kernel_boot_entries(monkeypatch, SAMPLE_GRUBBY_INFO_OUTPUT)
+    mocked_run = MockedRun()
     monkeypatch.setattr(stdlib, 'run', mocked_run)
     monkeypatch.setattr(api, 'current_actor',
                         CurrentActorMocked(architecture.ARCH_X86_64,
@@ -150,7 +152,6 @@ def test_kernelcmdline_explicit_configs(monkeypatch):
     expected_cmds = [
         grubby_cmd_without_config + ['-c', '/boot/grub2/grub.cfg'],
         grubby_cmd_without_config + ['-c', '/boot/efi/EFI/redhat/grub.cfg'],
-        grubby_cmd_info,
         ["grub2-editenv", "-", "set", "kernelopts=root={} {}".format(
             SAMPLE_KERNEL_ROOT, SAMPLE_KERNEL_ARGS)],
     ]
@@ -165,11 +166,8 @@ def test_kernelcmdline_config_no_args(monkeypatch):
                                             kernel_img_path=kernel_img_path,
                                             initramfs_path='/boot/initramfs-X')
 
-    mocked_run = MockedRun(
-        outputs={" ".join(("grubby", "--info", kernel_img_path)):
-                 TEMPLATE_GRUBBY_INFO_OUTPUT.format("", "")
-                 }
-    )
+    mock_kernel_boot_entries(monkeypatch, TEMPLATE_GRUBBY_INFO_OUTPUT.format("", ""))
+    mocked_run = MockedRun()
     monkeypatch.setattr(stdlib, 'run', mocked_run)
     monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(architecture.ARCH_S390X, msgs=[kernel_info]))
     kernelcmdlineconfig.modify_kernel_args_in_boot_cfg()
@@ -208,15 +206,13 @@ def test_kernelcmdline_config_mutiple_args(monkeypatch, second_grubby_output):
                                             kernel_img_path=kernel_img_path,
                                             initramfs_path='/boot/initramfs-X')
 
-    # For this test, we need to check we get the proper report if grubby --info
-    # outputs multiple different `root=` or `args=`
+    # For this test, we need to check we get the proper report if the kernel
+    # has multiple boot entries with different `root=` or `args=`
     # and that the first ones are used
     grubby_info_output = "\n".join((SAMPLE_GRUBBY_INFO_OUTPUT, second_grubby_output))
 
-    mocked_run = MockedRun(
-        outputs={" ".join(("grubby", "--info", kernel_img_path)): grubby_info_output,
-                 }
-    )
+    mock_kernel_boot_entries(monkeypatch, grubby_info_output)
+    mocked_run = MockedRun()
     monkeypatch.setattr(stdlib, 'run', mocked_run)
     monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
     monkeypatch.setattr(reporting, "create_report", create_report_mocked())
@@ -236,14 +232,12 @@ def test_kernelcmdline_config_malformed_args(monkeypatch):
                                             kernel_img_path=kernel_img_path,
                                             initramfs_path='/boot/initramfs-X')
 
-    # For this test, we need to check we get the proper error if grubby --info
-    # doesn't output any args information at all.
+    # For this test, we need to check we get the proper error if the boot entry
+    # doesn't contain any args information at all.
     grubby_info_output = "\n".join(line for line in SAMPLE_GRUBBY_INFO_OUTPUT.splitlines()
                                    if not line.startswith("args="))
-    mocked_run = MockedRun(
-        outputs={" ".join(("grubby", "--info", kernel_img_path)): grubby_info_output,
-                 }
-    )
+    mock_kernel_boot_entries(monkeypatch, grubby_info_output)
+    mocked_run = MockedRun()
     msgs = [kernel_info,
             TargetKernelCmdlineArgTasks(to_remove=[
                 KernelCmdlineArg(key='key1', value='value1')])
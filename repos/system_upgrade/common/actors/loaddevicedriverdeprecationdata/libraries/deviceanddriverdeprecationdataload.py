@@ -16,34 +16,28 @@ def process():
     supported_device_types = set(DeviceDriverDeprecationEntry.device_type.serialize()['choices'])
 
     data_file_name = 'device_driver_deprecation_data.json'
-    # NOTE(pstodulk): load_data_assert raises StopActorExecutionError, see
+    # NOTE(pstodulk): stream_data_asset raises StopActorExecutionError, see
     # the code for more info. Keeping the handling on the framework in such
     # a case as we have no work to do in such a case here.
-    deprecation_data = fetch.load_data_asset(api.current_actor(),
-                                             data_file_name,
-                                             asset_fulltext_name='Device driver deprecation data',
-                                             docs_url='',
-                                             docs_title='')
+    # The entries are processed one by one as they are read, so the whole
+    # data file is never held in memory.
+    deprecation_entries = fetch.stream_data_asset(api.current_actor(),
+                                                  data_file_name,
+                                                  asset_fulltext_name='Device driver deprecation data',
+                                                  docs_url='',
+                                                  docs_title='',
+                                                  entries_field='data')
 
-    # Unify all device ids to lowercase
     try:
-        for entry in deprecation_data['data']:
+        entries = []
+        for entry in deprecation_entries:
+            if entry.get('device_type') not in supported_device_types:
+                continue
+            # Unify all device ids to lowercase
             if "device_id" in entry.keys():
                 entry["device_id"] = entry.get("device_id").lower()
-    except (KeyError, AttributeError, TypeError):
-        # this may happen if receiving invalid data
-        pass
-
-    try:
-        api.produce(
-            DeviceDriverDeprecationData(
-                entries=[
-                    DeviceDriverDeprecationEntry(**entry)
-                    for entry in deprecation_data['data']
-                    if entry.get('device_type') in supported_device_types
-                ]
-            )
-        )
+            entries.append(DeviceDriverDeprecationEntry(**entry))
+        api.produce(DeviceDriverDeprecationData(entries=entries))
     except (ModelViolationError, ValueError, KeyError, AttributeError, TypeError) as err:
         # For the listed errors, we expect this to happen only when data is malformed
         # or manually updated. Corrupted data in the upstream is discovered
@@ -47,13 +47,20 @@ TEST_DATA = {
 }
 
 
+def _stream_data_asset_mock(data):
+    def stream_data_asset_mock(*args, **kwargs):
+        entries = data.get(kwargs['entries_field'])
+        if not isinstance(entries, list):
+            raise ValueError('The data does not contain an array of entries')
+        for entry in entries:
+            yield entry
+    return stream_data_asset_mock
+
+
 def test_filtered_load(monkeypatch):
     produced = []
 
-    def load_data_asset_mock(*args, **kwargs):
-        return TEST_DATA
-
-    monkeypatch.setattr(fetch, 'load_data_asset', load_data_asset_mock)
+    monkeypatch.setattr(fetch, 'stream_data_asset', _stream_data_asset_mock(TEST_DATA))
     monkeypatch.setattr(ddddload.api, 'produce', lambda *v: produced.extend(v))
 
     ddddload.process()
@@ -76,10 +83,7 @@ def test_filtered_load(monkeypatch):
 def test_invalid_dddd_data(monkeypatch, data):
     produced = []
 
-    def load_data_asset_mock(*args, **kwargs):
-        return data
-
-    monkeypatch.setattr(fetch, 'load_data_asset', load_data_asset_mock)
+    monkeypatch.setattr(fetch, 'stream_data_asset', _stream_data_asset_mock(data))
     monkeypatch.setattr(ddddload.api, 'current_actor', CurrentActorMocked())
     monkeypatch.setattr(ddddload.api, 'produce', lambda *v: produced.extend(v))
     with pytest.raises(StopActorExecutionError):
@@ -1,8 +1,11 @@
+import hashlib
 import json
 import os
 import re
 import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 
 from six.moves import urllib
 
@@ -22,6 +25,14 @@ from leapp.utils.deprecation import suppress_deprecation
 
 FMT_LIST_SEPARATOR = '\n    - '
 
+GPGKEY_CACHE_DIR = '/var/lib/leapp/gpgkeys_cache'
+"""
+Directory with downloaded gpg keys and fingerprints of processed key files, kept between leapp executions
+"""
+GPGKEY_FINGERPRINTS_CACHE = 'fingerprints.json'
+GPGKEY_DOWNLOAD_TIMEOUT = 30
+GPGKEY_DOWNLOAD_WORKERS = 8
+
 
 def _expand_vars(path):
     """
@@ -136,6 +147,118 @@ def _get_repo_gpgkey_urls(repo):
     return re.findall(r'[^,\s]+', _expand_vars(repo_additional['gpgkey']))
 
 
+def _get_cache_dir():
+    """
+    Return the directory to store downloaded gpg keys to and whether it is a temporary one
+
+    If the persistent cache directory cannot be created, a temporary directory
+    is used instead and it has to be removed by the caller.
+    """
+    try:
+        if not os.path.isdir(GPGKEY_CACHE_DIR):
+            os.makedirs(GPGKEY_CACHE_DIR)
+        return GPGKEY_CACHE_DIR, False
+    except OSError as err:
+        api.current_logger().debug('Cannot create the {} directory: {}'.format(GPGKEY_CACHE_DIR, str(err)))
+        return tempfile.mkdtemp(), True
+
+
+def _load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_file(path, data, mode='wb'):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, mode) as f:
+        f.write(data)
+    os.rename(tmp_path, path)
+
+
+def _download_gpgkey(gpgkey_url, cache_dir):
+    """
+    Download the gpg key into the cache directory unless the cached copy is up to date
+
+    The ETag and Last-Modified headers of the previous response are sent to the
+    server, so the key is not transferred again when it has not changed.
+
+    :return: Path to the downloaded key file
+    :raises urllib.error.URLError: when the key cannot be downloaded
+    :raises OSError: when the key cannot be stored or the connection times out
+    """
+    name = hashlib.sha256(gpgkey_url.encode('utf-8')).hexdigest()
+    key_file = os.path.join(cache_dir, name + '.key')
+    meta_file = os.path.join(cache_dir, name + '.json')
+
+    headers = {}
+    meta = _load_json(meta_file) if os.path.exists(key_file) else {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+
+    request = urllib.request.Request(gpgkey_url, headers=headers)
+    try:
+        response = urllib.request.urlopen(request, timeout=GPGKEY_DOWNLOAD_TIMEOUT)
+    except urllib.error.HTTPError as err:
+        if err.code == 304 and headers:
+            api.current_logger().debug('The cached gpgkey {} is up to date.'.format(gpgkey_url))
+            return key_file
+        raise
+
+    with closing(response):
+        data = response.read()
+        meta = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+    _write_file(key_file, data)
+    _write_file(meta_file, json.dumps(meta), mode='w')
+    return key_file
+
+
+def _download_gpgkeys(gpgkey_urls, cache_dir):
+    """
+    Download the gpg keys concurrently
+
+    :return: Mapping of URLs to paths of downloaded key files or to the errors
+             preventing their download
+    :rtype: dict
+    """
+    def download(gpgkey_url):
+        try:
+            return _download_gpgkey(gpgkey_url, cache_dir)
+        except (urllib.error.URLError, OSError) as err:
+            return err
+
+    if not gpgkey_urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(GPGKEY_DOWNLOAD_WORKERS, len(gpgkey_urls))) as executor:
+        return dict(zip(gpgkey_urls, executor.map(download, gpgkey_urls)))
+
+
+def _get_gpg_fp_from_file_cached(key_file, fingerprints_cache):
+    """
+    Return the list of public key fingerprints from the given file, reuse the result for unchanged key files
+
+    Fingerprints are cached by the hash of the file content, so the same key is
+    parsed just once, no matter where it is stored.
+    """
+    try:
+        with open(key_file, 'rb') as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        # let gpg report the problem
+        return get_gpg_fp_from_file(key_file)
+
+    if content_hash not in fingerprints_cache:
+        fps = get_gpg_fp_from_file(key_file)
+        if not fps:
+            return fps
+        fingerprints_cache[content_hash] = fps
+    return fingerprints_cache[content_hash]
+
+
 def _report(title, summary, keys, inhibitor=False):
     summary = (
         '{summary}'
@@ -298,8 +421,7 @@ def process():
     repos_missing_keys = list()
 
     pubkeys = [key.fingerprint for key in trusted_gpg_keys.items]
-    processed_gpgkey_urls = set()
-    tmpdir = None
+    gpgkey_urls = []
     for repoid in used_target_repos:
         if repoid.repoid not in target_repo_id_to_repositories_facts_map:
             api.current_logger().warning('The target repository {} metadata not available'.format(repoid.repoid))
@@ -310,45 +432,49 @@ def process():
         if gpgkeys is None:
             repos_missing_keys.append(repo.repoid)
             continue
-        for gpgkey_url in gpgkeys:
-            if gpgkey_url in processed_gpgkey_urls:
-                continue
-            processed_gpgkey_urls.add(gpgkey_url)
-
-            if gpgkey_url.startswith('file:///'):
-                key_file = _get_abs_file_path(target_userspace, gpgkey_url)
-            elif gpgkey_url.startswith('http://') or gpgkey_url.startswith('https://'):
-                # delay creating temporary directory until we need it
-                tmpdir = tempfile.mkdtemp() if tmpdir is None else tmpdir
-                # FIXME: what to do with dummy? it's fd, that should be closed also
-                dummy, tmp_file = tempfile.mkstemp(dir=tmpdir)
-                try:
-                    urllib.request.urlretrieve(gpgkey_url, tmp_file)
-                    key_file = tmp_file
-                except urllib.error.URLError as err:
-                    api.current_logger().warning(
-                        'Failed to download the gpgkey {}: {}'.format(gpgkey_url, str(err)))
-                    failed_download.append(gpgkey_url)
-                    continue
-            else:
-                unknown_protocol.append(gpgkey_url)
-                api.current_logger().error(
-                    'Skipping unknown protocol for gpgkey {}'.format(gpgkey_url))
-                continue
-            fps = get_gpg_fp_from_file(key_file)
-            if not fps:
-                invalid_keys.append(gpgkey_url)
+        gpgkey_urls.extend(url for url in gpgkeys if url not in gpgkey_urls)
+
+    remote_gpgkey_urls = [url for url in gpgkey_urls if url.startswith('http://') or url.startswith('https://')]
+    cache_dir, is_tmp_cache_dir = _get_cache_dir()
+    downloaded_gpgkeys = _download_gpgkeys(remote_gpgkey_urls, cache_dir)
+
+    fingerprints_cache_path = os.path.join(cache_dir, GPGKEY_FINGERPRINTS_CACHE)
+    fingerprints_cache = _load_json(fingerprints_cache_path)
+    orig_fingerprints_cache = dict(fingerprints_cache)
+    for gpgkey_url in gpgkey_urls:
+        if gpgkey_url.startswith('file:///'):
+            key_file = _get_abs_file_path(target_userspace, gpgkey_url)
+        elif gpgkey_url in downloaded_gpgkeys:
+            key_file = downloaded_gpgkeys[gpgkey_url]
+            if isinstance(key_file, Exception):
                 api.current_logger().warning(
-                    'Cannot get any gpg key from the file: {}'.format(gpgkey_url)
-                )
+                    'Failed to download the gpgkey {}: {}'.format(gpgkey_url, str(key_file)))
+                failed_download.append(gpgkey_url)
                 continue
-            for fp in fps:
-                if fp not in pubkeys and gpgkey_url not in missing_keys:
-                    missing_keys.append(_get_abs_file_path(target_userspace, gpgkey_url))
+        else:
+            unknown_protocol.append(gpgkey_url)
+            api.current_logger().error(
+                'Skipping unknown protocol for gpgkey {}'.format(gpgkey_url))
+            continue
+        fps = _get_gpg_fp_from_file_cached(key_file, fingerprints_cache)
+        if not fps:
+            invalid_keys.append(gpgkey_url)
+            api.current_logger().warning(
+                'Cannot get any gpg key from the file: {}'.format(gpgkey_url)
+            )
+            continue
+        for fp in fps:
+            if fp not in pubkeys and gpgkey_url not in missing_keys:
+                missing_keys.append(_get_abs_file_path(target_userspace, gpgkey_url))
 
-    if tmpdir:
+    if is_tmp_cache_dir:
         # clean up temporary directory with downloaded gpg keys
-        shutil.rmtree(tmpdir)
+        shutil.rmtree(cache_dir)
+    elif fingerprints_cache != orig_fingerprints_cache:
+        try:
+            _write_file(fingerprints_cache_path, json.dumps(fingerprints_cache), mode='w')
+        except OSError as err:
+            api.current_logger().debug('Cannot store fingerprints of gpg keys: {}'.format(str(err)))
 
     # report
     if failed_download:
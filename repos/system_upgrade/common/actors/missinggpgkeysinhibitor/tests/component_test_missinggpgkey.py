@@ -1,8 +1,11 @@
+import io
+
 import pytest
 from six.moves.urllib.error import URLError
 
 from leapp import reporting
 from leapp.exceptions import StopActorExecution, StopActorExecutionError
+from leapp.libraries.actor import missinggpgkey
 from leapp.libraries.actor.missinggpgkey import process
 from leapp.libraries.common.gpg import get_pubkeys_from_rpms
 from leapp.libraries.common.testutils import create_report_mocked, CurrentActorMocked, logger_mocked, produce_mocked
@@ -28,6 +31,11 @@ from leapp.utils.deprecation import suppress_deprecation
 # whole process as I was initially advised not to use these component tests.
 
 
+@pytest.fixture(autouse=True)
+def gpgkey_cache_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(missinggpgkey, 'GPGKEY_CACHE_DIR', str(tmp_path / 'gpgkeys_cache'))
+
+
 def _get_test_gpgkeys_missing():
     """
     Return list of Trusted GPG keys without the epel9 key we look for
@@ -402,8 +410,10 @@ def get_test_tmptargetrepositoriesfacts_ftp():
     )
 
 
-def _urlretrive_mocked(url, filename=None, reporthook=None, data=None):
-    return filename
+def _urlopen_mocked(request, timeout=None):
+    response = io.BytesIO(b'key data')
+    response.headers = {}
+    return response
 
 
 def test_perform_https_gpgkey(monkeypatch):
@@ -419,7 +429,7 @@ def test_perform_https_gpgkey(monkeypatch):
     monkeypatch.setattr(api, 'current_logger', logger_mocked())
     monkeypatch.setattr(reporting, 'create_report', create_report_mocked())
     monkeypatch.setattr('leapp.libraries.common.gpg._gpg_show_keys', _gpg_show_keys_mocked)
-    monkeypatch.setattr('six.moves.urllib.request.urlretrieve', _urlretrive_mocked)
+    monkeypatch.setattr('six.moves.urllib.request.urlopen', _urlopen_mocked)
 
     process()
     assert api.produce.called == 1
@@ -429,7 +439,7 @@ def test_perform_https_gpgkey(monkeypatch):
     assert "https://example.com/rpm-gpg/key.gpg" in reporting.create_report.reports[0]['summary']
 
 
-def _urlretrive_mocked_urlerror(url, filename=None, reporthook=None, data=None):
+def _urlopen_mocked_urlerror(request, timeout=None):
     raise URLError('error')
 
 
@@ -446,7 +456,7 @@ def test_perform_https_gpgkey_urlerror(monkeypatch):
     monkeypatch.setattr(api, 'current_logger', logger_mocked())
     monkeypatch.setattr(reporting, 'create_report', create_report_mocked())
     monkeypatch.setattr('leapp.libraries.common.gpg._gpg_show_keys', _gpg_show_keys_mocked)
-    monkeypatch.setattr('six.moves.urllib.request.urlretrieve', _urlretrive_mocked_urlerror)
+    monkeypatch.setattr('six.moves.urllib.request.urlopen', _urlopen_mocked_urlerror)
 
     process()
     assert len(api.current_logger.warnmsg) == 1
@@ -1,11 +1,15 @@
+import io
 import os
 import shutil
 import sys
 import tempfile
+import threading
 
 import distro
 import pytest
+from six.moves import urllib
 
+from leapp.libraries.actor import missinggpgkey
 from leapp.libraries.actor.missinggpgkey import _expand_vars, _get_abs_file_path, _get_repo_gpgkey_urls
 from leapp.libraries.common.testutils import CurrentActorMocked
 from leapp.libraries.stdlib import api
@@ -70,3 +74,92 @@ def test_get_abs_file_path(monkeypatch, target_userspace, file_url, exists_in_co
     monkeypatch.setattr('os.path.exists', os_path_exists_mocked)
     path = _get_abs_file_path(target_userspace, file_url)
     assert path == exp
+
+
+class UrlopenMocked(object):
+    def __init__(self, content=b'key data', headers=None, not_modified=False, error_urls=()):
+        self.content = content
+        self.headers = headers or {}
+        self.not_modified = not_modified
+        self.error_urls = error_urls
+        self.requests = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, request, timeout=None):
+        assert timeout == missinggpgkey.GPGKEY_DOWNLOAD_TIMEOUT
+        with self._lock:
+            self.requests.append(request)
+            self.threads.add(threading.current_thread().name)
+        url = request.get_full_url()
+        if url in self.error_urls:
+            raise urllib.error.URLError('error')
+        if self.not_modified and request.has_header('If-none-match'):
+            raise urllib.error.HTTPError(url, 304, 'Not Modified', {}, None)
+        response = io.BytesIO(self.content)
+        response.headers = self.headers
+        return response
+
+
+def test_download_gpgkeys(monkeypatch, tmp_path):
+    urls = ['https://example.com/key{}.gpg'.format(i) for i in range(20)]
+    urlopen = UrlopenMocked(error_urls=urls[:1])
+    monkeypatch.setattr(urllib.request, 'urlopen', urlopen)
+
+    downloaded = missinggpgkey._download_gpgkeys(urls, str(tmp_path))
+
+    assert isinstance(downloaded[urls[0]], urllib.error.URLError)
+    for url in urls[1:]:
+        with open(downloaded[url], 'rb') as f:
+            assert f.read() == b'key data'
+    assert len(urlopen.requests) == 20
+    assert len(urlopen.threads) <= missinggpgkey.GPGKEY_DOWNLOAD_WORKERS
+
+
+def test_download_gpgkey_not_modified(monkeypatch, tmp_path):
+    url = 'https://example.com/key.gpg'
+    urlopen = UrlopenMocked(headers={'ETag': '"abc"', 'Last-Modified': 'Mon, 01 Jan 2024 12:00:00 GMT'})
+    monkeypatch.setattr(urllib.request, 'urlopen', urlopen)
+    key_file = missinggpgkey._download_gpgkey(url, str(tmp_path))
+    assert not urlopen.requests[0].headers
+
+    # the cached key is validated by the server
+    urlopen.not_modified = True
+    urlopen.content = b'changed key data'
+    assert missinggpgkey._download_gpgkey(url, str(tmp_path)) == key_file
+    assert urlopen.requests[1].get_header('If-none-match') == '"abc"'
+    assert urlopen.requests[1].get_header('If-modified-since') == 'Mon, 01 Jan 2024 12:00:00 GMT'
+    with open(key_file, 'rb') as f:
+        assert f.read() == b'key data'
+
+    # the key is downloaded again when it changed
+    urlopen.not_modified = False
+    missinggpgkey._download_gpgkey(url, str(tmp_path))
+    with open(key_file, 'rb') as f:
+        assert f.read() == b'changed key data'
+
+
+def test_get_gpg_fp_from_file_cached(monkeypatch, tmp_path):
+    parsed = []
+
+    def get_gpg_fp_from_file_mocked(key_file):
+        parsed.append(key_file)
+        return ['fd431d51'] if 'invalid' not in key_file else []
+
+    monkeypatch.setattr(missinggpgkey, 'get_gpg_fp_from_file', get_gpg_fp_from_file_mocked)
+    key_files = [str(tmp_path / name) for name in ('key', 'same-key', 'invalid-key')]
+    for key_file in key_files:
+        with open(key_file, 'w') as f:
+            f.write('invalid key data' if 'invalid' in key_file else 'key data')
+
+    cache = {}
+    for dummy_i in range(2):
+        assert missinggpgkey._get_gpg_fp_from_file_cached(key_files[0], cache) == ['fd431d51']
+        assert missinggpgkey._get_gpg_fp_from_file_cached(key_files[1], cache) == ['fd431d51']
+        assert missinggpgkey._get_gpg_fp_from_file_cached(key_files[2], cache) == []
+    # unchanged keys are parsed just once, invalid keys are not cached
+    assert parsed == [key_files[0], key_files[2], key_files[2]]
+    assert len(cache) == 1
+
+    # files that cannot be read are handed over to gpg
+    assert missinggpgkey._get_gpg_fp_from_file_cached(str(tmp_path / 'missing'), cache) == ['fd431d51']
@@ -0,0 +1,26 @@
+from leapp.actors import Actor
+from leapp.libraries.actor import removeupgradecaches
+from leapp.models import TargetUserSpaceInfo
+from leapp.tags import IPUWorkflowTag, PreparationPhaseTag
+
+
+class RemoveUpgradeCaches(Actor):
+    """
+    Remove caches kept under /var/lib/leapp to speed up repeated upgrade attempts
+
+    The caches are used only before the reboot into the upgrade environment,
+    so remove them to free the space before the upgrade transaction.
+
+    Removed caches:
+    - templates of disk images used for the source system overlay
+    - the cache of the generated upgrade initramfs
+    - the cache of the compiled PES events
+    """
+
+    name = 'remove_upgrade_caches'
+    consumes = (TargetUserSpaceInfo,)
+    produces = ()
+    tags = (IPUWorkflowTag, PreparationPhaseTag)
+
+    def process(self):
+        removeupgradecaches.process()
@@ -0,0 +1,45 @@
+import os
+import shutil
+import sys
+
+from leapp.libraries.common import overlaygen, utils
+from leapp.libraries.stdlib import api
+from leapp.models import TargetUserSpaceInfo
+
+INITRAMFS_CACHE_DIR = '/var/lib/leapp/initramfs_cache'
+"""
+Cache of the generated upgrade initramfs (see the upgrade_initramfs_generator actor)
+"""
+
+PES_EVENTS_CACHE_DIR = '/var/lib/leapp/pes-events-cache'
+"""
+Cache of the compiled PES events (see the target_content_resolver actor)
+"""
+
+
+def _remove_cache_dir(path, description):
+    if not os.path.isdir(path):
+        return
+    api.current_logger().debug('Removing the {} {}.'.format(description, path))
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=utils.report_and_ignore_shutil_rmtree_error)  # noqa: E501; pylint: disable=unexpected-keyword-arg
+    else:
+        shutil.rmtree(path, onerror=utils.report_and_ignore_shutil_rmtree_error)  # noqa: E501; pylint: disable=deprecated-argument
+
+
+def remove_initramfs_cache():
+    _remove_cache_dir(INITRAMFS_CACHE_DIR, 'upgrade initramfs cache')
+
+
+def remove_pes_events_cache():
+    _remove_cache_dir(PES_EVENTS_CACHE_DIR, 'compiled PES events cache')
+
+
+def process():
+    userspace_info = next(api.consume(TargetUserSpaceInfo), None)
+    if userspace_info:
+        overlaygen.remove_disk_image_templates(userspace_info.scratch)
+    else:
+        api.current_logger().debug('Missing TargetUserSpaceInfo. Skipping removal of disk image templates.')
+    remove_initramfs_cache()
+    remove_pes_events_cache()
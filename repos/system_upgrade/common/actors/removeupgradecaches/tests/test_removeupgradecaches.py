@@ -0,0 +1,45 @@
+import pytest
+
+from leapp.libraries.actor import removeupgradecaches
+from leapp.libraries.common import overlaygen
+from leapp.libraries.common.testutils import CurrentActorMocked, logger_mocked
+from leapp.libraries.stdlib import api
+from leapp.models import TargetUserSpaceInfo
+
+
+@pytest.mark.parametrize('has_userspace_info', (True, False))
+def test_remove_upgrade_caches(monkeypatch, tmp_path, has_userspace_info):
+    msgs = []
+    if has_userspace_info:
+        msgs.append(TargetUserSpaceInfo(path='/var/lib/leapp/scratch/mounts/root_/system_overlay',
+                                        scratch='/var/lib/leapp/scratch',
+                                        mounts='/var/lib/leapp/scratch/mounts'))
+    removed = []
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(msgs=msgs))
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(overlaygen, 'remove_disk_image_templates', removed.append)
+    cache_dir = tmp_path / 'initramfs_cache'
+    (cache_dir / 'entry').mkdir(parents=True)
+    (cache_dir / 'entry' / 'initramfs-upgrade.x86_64.img').write_text('initramfs')
+    monkeypatch.setattr(removeupgradecaches, 'INITRAMFS_CACHE_DIR', str(cache_dir))
+    pes_cache_dir = tmp_path / 'pes-events-cache'
+    pes_cache_dir.mkdir()
+    (pes_cache_dir / 'pes-events.x86_64.8.10-9.6.json').write_text('{}')
+    monkeypatch.setattr(removeupgradecaches, 'PES_EVENTS_CACHE_DIR', str(pes_cache_dir))
+
+    removeupgradecaches.process()
+
+    assert removed == (['/var/lib/leapp/scratch'] if has_userspace_info else [])
+    assert not cache_dir.exists()
+    assert not pes_cache_dir.exists()
+
+
+def test_remove_missing_caches(monkeypatch, tmp_path):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(removeupgradecaches, 'INITRAMFS_CACHE_DIR', str(tmp_path / 'initramfs_cache'))
+    monkeypatch.setattr(removeupgradecaches, 'PES_EVENTS_CACHE_DIR', str(tmp_path / 'pes-events-cache'))
+
+    removeupgradecaches.remove_initramfs_cache()
+    removeupgradecaches.remove_pes_events_cache()
+
+    assert not api.current_logger.dbgmsg
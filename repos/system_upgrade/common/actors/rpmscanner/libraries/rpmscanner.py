@@ -2,7 +2,7 @@ import warnings
 
 from leapp.exceptions import StopActorExecutionError
 from leapp.libraries.common import rpms
-from leapp.libraries.common.dnflibs import dnfmodule
+from leapp.libraries.common.dnflibs import dnfsnapshot
 from leapp.libraries.stdlib import api
 from leapp.models import InstalledRPM, RPM
 
@@ -17,7 +17,7 @@ except ImportError:
 no_dnf = False
 no_dnf_warning_msg = "package `dnf` is unavailable"
 try:
-    import dnf
+    import dnf  # noqa: F401; pylint: disable=unused-import
 except ImportError:
     no_dnf = True
     warnings.warn(no_dnf_warning_msg, ImportWarning)
@@ -46,40 +46,7 @@ def _get_package_repository_data_yum():
 
 
 def _get_package_repository_data_dnf():
-    dnf_base = dnf.Base()
-    pkg_repos = {}
-
-    try:
-        # NOTE: currently we do not initialize/load DNF plugins here as we are
-        # working just with the local stuff (load_system_repo=True)
-        dnf_base.fill_sack(load_system_repo=True, load_available_repos=False)
-    except dnf.exceptions.RepoError as e:
-        err_msg = str(e)
-        repoid = err_msg.split('repo:')[-1].strip() if 'repo:' in err_msg else 'unknown repo'
-        repoid = repoid.strip('"').strip("'").replace('\\"', '')
-        raise StopActorExecutionError(
-            message='DNF failed to load repositories: {}'.format(str(e)),
-            details={
-                'hint': 'Ensure the repository {} definition is correct or remove it '
-                        'if the repository is not needed anymore.'
-                        .format(repoid)
-            }
-        )
-
-    try:
-        for pkg in dnf_base.sack.query():
-            pkg_repos[pkg.name] = pkg._from_repo.lstrip('@')
-    except ValueError as e:
-        if 'locale' not in str(e):  # reraise if error is not related to locales
-            raise e
-        raise StopActorExecutionError(
-            message='Failed to get installed RPM packages because of an invalid locale',
-            details={
-                'hint': 'Please run leapp with a valid locale. ' +
-                        'You can get a list of installed locales by running `locale -a`.'
-            })
-
-    return pkg_repos
+    return dnfsnapshot.get_installed_packages_repositories()
 
 
 def get_package_repository_data():
@@ -104,9 +71,9 @@ def map_modular_rpms_to_modules():
     :rtype: dict
 
     .. seealso::
-        :func:`leapp.libraries.common.dnflibs.dnfmodule.get_modules`
+        :func:`leapp.libraries.common.dnflibs.dnfsnapshot.get_module_streams`
     """
-    modules = dnfmodule.get_modules()
+    modules = dnfsnapshot.get_module_streams()
     # empty on RHEL 7 because of no modules
     if not modules:
         return {}
@@ -115,14 +82,14 @@ def map_modular_rpms_to_modules():
     # value: tuple of 2 strings representing a module and its stream
     rpm_streams = {}
     for module in modules:
-        for rpm in module.getArtifacts():
+        for rpm in module.artifacts:
             # we transform the NEVRA string into a tuple
             name, epoch_version, release_arch = rpm.rsplit('-', 2)
             epoch, version = epoch_version.split(':', 1)
             release, arch = release_arch.rsplit('.', 1)
             rpm_key = (name, epoch, version, release, arch)
             # stream could be int or float, convert it to str just in case
-            rpm_streams[rpm_key] = (module.getName(), str(module.getStream()))
+            rpm_streams[rpm_key] = (module.name, str(module.stream))
     return rpm_streams
 
 
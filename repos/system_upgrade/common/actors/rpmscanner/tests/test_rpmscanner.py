@@ -2,10 +2,9 @@ import sys
 
 import pytest
 
-from leapp.exceptions import StopActorExecutionError
 from leapp.libraries.actor import rpmscanner
 from leapp.libraries.common import rpms, testutils
-from leapp.libraries.common.dnflibs import dnfmodule
+from leapp.libraries.common.dnflibs import dnfsnapshot
 from leapp.libraries.stdlib import api
 from leapp.models import InstalledRPM, RPM
 from leapp.snactor.fixture import current_actor_context
@@ -78,45 +77,29 @@ ARTIFACTS_SUBVERSION_113 = [
 ]
 
 
-class ModuleMocked:
-    def __init__(self, name, stream, artifacts):
-        self.name = name
-        self.stream = stream
-        self.artifacts = artifacts
-
-    def getName(self):
-        return self.name
-
-    def getStream(self):
-        return self.stream
-
-    def getArtifacts(self):
-        return self.artifacts
-
-
 MODULES = [
-    ModuleMocked('afterburn', 'rolling', ARTIFACTS_AFTERBURN),
-    ModuleMocked('subversion', '1.10', ARTIFACTS_SUBVERSION_110),
-    ModuleMocked('subversion', '1.13', ARTIFACTS_SUBVERSION_113)
+    dnfsnapshot.ModuleStream('afterburn', 'rolling', False, ARTIFACTS_AFTERBURN),
+    dnfsnapshot.ModuleStream('subversion', '1.10', True, ARTIFACTS_SUBVERSION_110),
+    dnfsnapshot.ModuleStream('subversion', '1.13', False, ARTIFACTS_SUBVERSION_113)
 ]
 
 
 @pytest.mark.skipif(no_yum and no_dnf, reason='yum/dnf is unavailable')
 def test_actor_execution(monkeypatch, current_actor_context):
-    monkeypatch.setattr(rpmscanner.dnfmodule, 'get_modules', lambda: [])
+    monkeypatch.setattr(rpmscanner.dnfsnapshot, 'get_module_streams', lambda: [])
     current_actor_context.run()
     assert current_actor_context.consume(InstalledRPM)
     assert current_actor_context.consume(InstalledRPM)[0].items
 
 
 def test_map_modular_rpms_to_modules_empty(monkeypatch):
-    monkeypatch.setattr(dnfmodule, 'get_modules', lambda: [])
+    monkeypatch.setattr(dnfsnapshot, 'get_module_streams', lambda: [])
     mapping = rpmscanner.map_modular_rpms_to_modules()
     assert not mapping
 
 
 def test_map_modular_rpms_to_modules(monkeypatch):
-    monkeypatch.setattr(dnfmodule, 'get_modules', lambda: MODULES)
+    monkeypatch.setattr(dnfsnapshot, 'get_module_streams', lambda: MODULES)
     mapping = rpmscanner.map_modular_rpms_to_modules()
     assert mapping[
         ('afterburn', '0', '4.2.0', '1.module_f31+6825+8330d585', 'x86_64')
@@ -154,7 +137,7 @@ PACKAGE_REPOS = {
 
 
 def test_process(monkeypatch):
-    monkeypatch.setattr(dnfmodule, 'get_modules', lambda: MODULES)
+    monkeypatch.setattr(dnfsnapshot, 'get_module_streams', lambda: MODULES)
     monkeypatch.setattr(rpmscanner, 'get_package_repository_data', lambda: PACKAGE_REPOS)
     monkeypatch.setattr(rpms, 'get_installed_rpms', lambda: INSTALLED_RPMS)
     monkeypatch.setattr(api, 'produce', testutils.produce_mocked())
@@ -195,16 +178,6 @@ def test_process(monkeypatch):
     assert not items['passwd'].stream
 
 
-@pytest.mark.skipif(no_dnf, reason='dnf is unavailable')
-def test_get_package_repository_data_dnf_repo_error(monkeypatch):
-    # pylint: disable=bad-option-value,useless-option-value,no-self-use
-    class MockDnfBase:
-        def fill_sack(self, *args, **kwargs):
-            raise rpmscanner.dnf.exceptions.RepoError('Cannot find a valid baseurl for repo: broken-repo')
-
-    monkeypatch.setattr(rpmscanner.dnf, 'Base', MockDnfBase)
-
-    with pytest.raises(StopActorExecutionError) as exc_info:
-        rpmscanner._get_package_repository_data_dnf()
-
-    assert 'Ensure the repository broken-repo definition' in exc_info.value.details['hint']
+def test_get_package_repository_data_dnf(monkeypatch):
+    monkeypatch.setattr(dnfsnapshot, 'get_installed_packages_repositories', lambda: PACKAGE_REPOS)
+    assert rpmscanner._get_package_repository_data_dnf() == PACKAGE_REPOS
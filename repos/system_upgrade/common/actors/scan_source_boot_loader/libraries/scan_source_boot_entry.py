@@ -1,7 +1,8 @@
 import os
 
 from leapp.exceptions import StopActorExecutionError
-from leapp.libraries.stdlib import api, CalledProcessError, run
+from leapp.libraries.common import bootentries
+from leapp.libraries.stdlib import api, CalledProcessError
 from leapp.models import DefaultSourceBootEntry
 
 
@@ -27,29 +28,19 @@ def extract_path_with_img_extension(initramfs_path):
 
 def scan_default_source_boot_entry():
     try:
-        default_kernel = run(['grubby', '--default-kernel'])['stdout'].strip()
-        default_kernel_info_lines = run(['grubby', '--info', default_kernel], split=True)['stdout']
-
-    except CalledProcessError as err:
+        default_entry = bootentries.get_default_boot_entry()
+    except (OSError, CalledProcessError) as err:
         details = {'details': str(err)}
         raise StopActorExecutionError('Failed to determine default boot entry.', details=details)
 
-    # Note that there can be multiple entries listed sharing the same default kernel.
-    # The parsing is done in a way that it should not fail in such a case. For the current use
-    # it does not matter -- at the moment we care primarily about the initramfs path, and these
-    # entries should typically share the initramfs.
-
-    default_kernel_info = {}
-    for line in default_kernel_info_lines:
-        key, value = line.split('=', 1)
-        default_kernel_info[key] = value.strip('"')
+    if not default_entry:
+        raise StopActorExecutionError('Failed to determine default boot entry.')
 
-    initramfs_path = default_kernel_info['initrd']
-    initramfs_path = extract_path_with_img_extension(initramfs_path)
+    initramfs_path = extract_path_with_img_extension(default_entry.initrd)
 
     default_boot_entry_message = DefaultSourceBootEntry(
         initramfs_path=initramfs_path,
-        kernel_path=default_kernel_info['kernel'],
+        kernel_path=default_entry.kernel,
     )
 
     api.produce(default_boot_entry_message)
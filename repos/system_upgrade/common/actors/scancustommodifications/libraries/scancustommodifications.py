@@ -105,9 +105,9 @@ def check_for_modifications(component):
     source_of_truth = []
     leapp_files = []
     # Let's collect data about what should have been installed from rpm
-    for rpm in rpms:
-        res = _run_command(['rpm', '-ql', rpm], 'Could not get a list of installed files from rpm {}'.format(rpm))
-        source_of_truth.extend(res)
+    if rpms:
+        source_of_truth = _run_command(['rpm', '-ql'] + rpms,
+                                       'Could not get a list of installed files from rpms {}'.format(', '.join(rpms)))
     # Let's collect data about what's really on the system
     for directory in dirs:
         res = _run_command(['find', directory, '-type', 'f'],
@@ -118,21 +118,22 @@ def check_for_modifications(component):
     # Now let's check for modifications
     modified_files = []
     modified_configs = []
-    for rpm in rpms:
-        res = _run_command(
-                ['rpm', '-V', '--nomtime', rpm], 'Could not check authenticity of the files from {}'.format(rpm),
-                # NOTE(ivasilev) check is False here as in case of any changes found exit code will be 1
-                checked=False)
-        if res:
-            api.current_logger().warning('Modifications to leapp files detected!\n%s', res)
-            for modification_str in res:
-                modification = tuple(modification_str.split())
-                if len(modification) == 3 and modification[1] == 'c':
-                    # Dealing with a configuration that will be displayed as ('S.5......', 'c', '/file/path')
-                    modified_configs.append(modification)
-                else:
-                    # Modification of any other rpm file detected
-                    modified_files.append(modification)
+    # All rpms are verified in a single rpm call
+    res = _run_command(
+            ['rpm', '-V', '--nomtime'] + rpms,
+            'Could not check authenticity of the files from {}'.format(', '.join(rpms)),
+            # NOTE(ivasilev) check is False here as in case of any changes found exit code will be 1
+            checked=False) if rpms else []
+    if res:
+        api.current_logger().warning('Modifications to leapp files detected!\n%s', res)
+        for modification_str in res:
+            modification = tuple(modification_str.split())
+            if len(modification) == 3 and modification[1] == 'c':
+                # Dealing with a configuration that will be displayed as ('S.5......', 'c', '/file/path')
+                modified_configs.append(modification)
+            else:
+                # Modification of any other rpm file detected
+                modified_files.append(modification)
     return ([_modification_model(filename=f[1], component=component, rpm_checks_str=f[0], change_type='modified')
              # Let's filter out pyc files not to clutter the output as pyc will be present even in case of
              # a plain open & save-not-changed that we agreed not to react upon.
@@ -55,14 +55,17 @@ def test_deduce_actor_name_from_file(a_file, name):
     assert scancustommodifications.deduce_actor_name(a_file) == name
 
 
+LEAPP_RPMS = ['leapp-upgrade-el8toel9', 'leapp-upgrade-el8toel9-fapolicyd']
+
+
 def mocked__run_command(list_of_args, log_message, checked=True):
-    if list_of_args == ['rpm', '-ql', 'leapp-upgrade-el8toel9']:
+    if list_of_args == ['rpm', '-ql'] + LEAPP_RPMS:
         # get source of truth
         return FILES_FROM_RPM.strip().split('\n')
     if list_of_args and list_of_args[0] == 'find':
         # listing files in directory
         return FILES_ON_SYSTEM.strip().split('\n')
-    if list_of_args == ['rpm', '-V', '--nomtime', 'leapp-upgrade-el8toel9']:
+    if list_of_args == ['rpm', '-V', '--nomtime'] + LEAPP_RPMS:
         # checking authenticity
         return VERIFIED_FILES.strip().split('\n')
     return []
@@ -84,3 +87,20 @@ def test_check_for_modifications(monkeypatch):
     assert len(configurations) == 1
     assert configurations[0].filename == 'etc/leapp/files/pes-events.json'
     assert configurations[0].rpm_checks_str == 'S.5....T.'
+
+
+def test_check_for_modifications_rpm_calls(monkeypatch):
+    commands = []
+
+    def run_command_mocked(list_of_args, log_message, checked=True):
+        commands.append(list_of_args)
+        return mocked__run_command(list_of_args, log_message, checked)
+
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(arch='x86_64', src_ver='8.9', dst_ver='9.3'))
+    monkeypatch.setattr(scancustommodifications, '_run_command', run_command_mocked)
+    scancustommodifications.check_for_modifications('repository')
+    # all leapp rpms are queried and verified at once
+    assert [cmd for cmd in commands if cmd[0] == 'rpm'] == [
+        ['rpm', '-ql'] + LEAPP_RPMS,
+        ['rpm', '-V', '--nomtime'] + LEAPP_RPMS,
+    ]
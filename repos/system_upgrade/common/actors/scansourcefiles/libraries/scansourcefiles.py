@@ -1,5 +1,6 @@
 import os
 
+from leapp.libraries.common import rpms
 from leapp.libraries.common.config.version import get_source_major_version
 from leapp.libraries.stdlib import api, CalledProcessError, run
 from leapp.models import FileInfo, TrackedFilesInfoSource
@@ -49,10 +50,7 @@ def is_modified(input_file):
 
     Ignores mode, user, type, ...
     """
-    result = run(['rpm', '-Vf', '--nomtime', input_file], checked=False)
-    if not result['exit_code']:
-        return False
-    status = result['stdout'].split()[0]
+    status = rpms.verify_files([input_file])[input_file]
     return status == 'missing' or '5' in status
 
 
@@ -75,6 +73,8 @@ def scan_file(input_file):
 
 
 def scan_files(files):
+    # verify all files in one rpm call, results are reused by is_modified
+    rpms.verify_files(files)
     return [scan_file(fname) for fname in files]
 
 
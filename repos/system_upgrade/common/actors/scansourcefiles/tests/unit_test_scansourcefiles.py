@@ -3,29 +3,29 @@ import os
 import pytest
 
 from leapp.libraries.actor import scansourcefiles
-from leapp.libraries.common import testutils
+from leapp.libraries.common import rpms, testutils
 from leapp.libraries.stdlib import api, CalledProcessError
 from leapp.models import FileInfo, TrackedFilesInfoSource
 
 
 @pytest.mark.parametrize(
-    ('run_output', 'expected_output_is_modified'),
+    ('verify_status', 'expected_output_is_modified'),
     (
-        ({'exit_code': 0}, False),
-        ({'exit_code': 1, 'stdout': 'missing     /boot/efi/EFI (Permission denied)'}, True),
-        ({'exit_code': 1, 'stdout': 'S.5......  c /etc/openldap/ldap.conf'}, True),
-        ({'exit_code': 1, 'stdout': '..?......  c /etc/libaudit.conf'}, False),
-        ({'exit_code': 1, 'stdout': '.....UG..  g /var/run/avahi-daemon'}, False),
+        ('', False),
+        ('missing', True),
+        ('S.5......', True),
+        ('..?......', False),
+        ('.....UG..', False),
     )
 )
-def test_is_modified(monkeypatch, run_output, expected_output_is_modified):
+def test_is_modified(monkeypatch, verify_status, expected_output_is_modified):
     input_file = '/file'
 
-    def mocked_run(cmd, *args, **kwargs):
-        assert cmd == ['rpm', '-Vf', '--nomtime', input_file]
-        return run_output
+    def mocked_verify_files(paths):
+        assert paths == [input_file]
+        return {input_file: verify_status}
 
-    monkeypatch.setattr(scansourcefiles, 'run', mocked_run)
+    monkeypatch.setattr(rpms, 'verify_files', mocked_verify_files)
     assert scansourcefiles.is_modified(input_file) == expected_output_is_modified
 
 
@@ -108,9 +108,13 @@ def test_scan_files(monkeypatch, input_files):
     def scan_file_mocked(input_file):
         return FileInfo(path=input_file, **base_data)
 
+    verified_files = []
     monkeypatch.setattr(scansourcefiles, 'scan_file', scan_file_mocked)
+    monkeypatch.setattr(rpms, 'verify_files', verified_files.append)
     expected_output_list = [FileInfo(path=input_file, **base_data) for input_file in input_files]
     assert scansourcefiles.scan_files(input_files) == expected_output_list
+    # all files are verified at once
+    assert verified_files == [input_files]
 
 
 @pytest.mark.parametrize(
@@ -3,10 +3,8 @@ import os
 from collections import defaultdict
 from pathlib import Path
 
-import rpm
-
 from leapp.libraries.common.config.version import get_target_major_version
-from leapp.libraries.common.rpms import has_package
+from leapp.libraries.common.rpms import create_lookup, get_rpm_files_index
 from leapp.libraries.stdlib import api, run
 from leapp.models import DistributionSignedRPM, ThirdPartyTargetPythonModules
 
@@ -49,25 +47,28 @@ def is_target_python_present(target_python):
 
 
 def identify_files_of_pypackages(syspaths):
-    ts = rpm.TransactionSet()
-    # add a trailing slash by calling os.path.join(..., '')
-    roots = tuple(os.path.join(str(path), "") for path in syspaths)
-    file_to_pkg = {}
-
-    # Iterate over all installed packages
-    for header in ts.dbMatch():
-        pkg = header['name']
-        files = header['filenames']
-        for filename in files:
-            if filename and filename.endswith(PYTHON_EXTENSIONS) and filename.startswith(roots):
-                file_to_pkg[filename] = pkg
-    return file_to_pkg
+    return get_rpm_files_index(syspaths, PYTHON_EXTENSIONS)
 
 
 def find_python_related(root):
-    # recursively search for all files matching the given extension
-    for pattern in PYTHON_EXTENSIONS:
-        yield from root.rglob("*" + pattern)
+    """
+    Recursively search for all files matching any of PYTHON_EXTENSIONS.
+
+    The directory tree is walked just once for all extensions. Symlinks to
+    directories are not followed.
+    """
+    dirs_to_scan = [str(root)]
+    while dirs_to_scan:
+        try:
+            with os.scandir(dirs_to_scan.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs_to_scan.append(entry.path)
+            elif entry.name.endswith(PYTHON_EXTENSIONS):
+                yield Path(entry.path)
 
 
 def _should_skip_file(file):
@@ -116,9 +117,12 @@ def identify_unsigned_rpms(rpms_to_check):
     """
     third_party_rpms = []
     third_party_files = []
+    if not rpms_to_check:
+        return third_party_rpms, third_party_files
 
+    signed_rpms = {name for (name,) in create_lookup(DistributionSignedRPM, field='items', keys=('name',))}
     for rpm_name, files in rpms_to_check.items():
-        if not has_package(DistributionSignedRPM, rpm_name):
+        if rpm_name not in signed_rpms:
             third_party_rpms.append(rpm_name)
             api.current_logger().warning(
                 'Found Python files from non-distribution RPM package: {}'.format(rpm_name)
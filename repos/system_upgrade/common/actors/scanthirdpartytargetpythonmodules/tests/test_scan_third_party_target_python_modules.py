@@ -74,6 +74,27 @@ def test_scan_python_files(monkeypatch):
     assert len(unowned) == 1
 
 
+def test_find_python_related(tmp_path):
+    package = tmp_path / 'package'
+    (package / '__pycache__').mkdir(parents=True)
+    for path in ('module.py', 'package/__init__.py', 'package/__pycache__/__init__.cpython-39.pyc',
+                 'package/_speedups.so', 'legacy.pyc', 'README.txt', 'package/data.json'):
+        (tmp_path / path).write_text('')
+    # directories are not followed through symlinks and not reported
+    (tmp_path / 'loop').symlink_to(tmp_path)
+    (tmp_path / 'dir.py').mkdir()
+
+    found = scanthirdpartytargetpythonmodules.find_python_related(tmp_path)
+
+    assert sorted(str(path.relative_to(tmp_path)) for path in found) == [
+        'legacy.pyc',
+        'module.py',
+        'package/__init__.py',
+        'package/__pycache__/__init__.cpython-39.pyc',
+        'package/_speedups.so',
+    ]
+
+
 @pytest.mark.parametrize('path_exists,mock_files', [
     (False, None),
     (True, [MockFile('module.pyc', Parent('__pycache__'), '/usr/lib/python3.9/site-packages/__pycache__/module.pyc')]),
@@ -110,10 +131,11 @@ def test_identify_unsigned_rpms(monkeypatch, is_signed, expected_rpm_count, expe
         '/path/to/file2.py',
     ]
 
-    def mock_has_package(model, pkg_name):
-        return is_signed
+    def mock_create_lookup(model, field, keys):
+        assert model is DistributionSignedRPM
+        return {(package_name,), ('other-package',)} if is_signed else {('other-package',)}
 
-    monkeypatch.setattr(scanthirdpartytargetpythonmodules, 'has_package', mock_has_package)
+    monkeypatch.setattr(scanthirdpartytargetpythonmodules, 'create_lookup', mock_create_lookup)
     monkeypatch.setattr(api, 'current_logger', logger_mocked())
 
     third_party_rpms, third_party_files = scanthirdpartytargetpythonmodules.identify_unsigned_rpms(rpms_to_check)
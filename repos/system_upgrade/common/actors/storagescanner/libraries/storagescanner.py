@@ -175,23 +175,56 @@ def _get_lsblk_info_for_devpath(dev_path):
     return lsblk_info_for_devpath
 
 
+def _get_lsblk_names():
+    """
+    Collect names, kernel names and human-readable sizes of all block devices
+
+    All devices are listed by a single lsblk call. The returned dictionary maps
+    MAJ:MIN of a device to its (name, kname, size) tuple.
+    """
+    cmd = ['lsblk', '-nr', '--output', 'MAJ:MIN,NAME,KNAME,SIZE']
+    return {maj_min: (name, kname, size) for maj_min, name, kname, size in _get_cmd_output(cmd, ' ', 4)}
+
+
 @aslist
 def _get_lsblk_info():
-    """ Collect storage info from lsblk command """
+    """
+    Collect storage info from lsblk command
+
+    The information is collected by two lsblk calls in total regardless of
+    the number of devices. The first one provides device paths and sizes in
+    bytes, the second one names, kernel names and human-readable sizes, which
+    are paired with the devices by their MAJ:MIN numbers. Parents of devices
+    are resolved from the same data.
+    """
     cmd = ['lsblk', '-pbnr', '--output', 'NAME,MAJ:MIN,RM,SIZE,RO,TYPE,MOUNTPOINT,PKNAME']
-    for entry in _get_cmd_output(cmd, ' ', 8):
+    entries = list(_get_cmd_output(cmd, ' ', 8))
+    if not entries:
+        return
+    names = _get_lsblk_names()
+
+    # PKNAME is the path to the kernel name of the parent (e.g. /dev/dm-0),
+    # which differs from the path listed in the NAME column for some devices
+    # (e.g. /dev/mapper/rhel-root), so both are used to look up parents
+    path_to_maj_min = {'/dev/{}'.format(kname): maj_min for maj_min, (dummy_name, kname, dummy_size) in names.items()}
+    path_to_maj_min.update((entry[0], entry[1]) for entry in entries)
+
+    for entry in entries:
         dev_path, maj_min, rm, bsize, ro, tp, mountpoint, parent_path = entry
 
-        lsblk_info_for_devpath = _get_lsblk_info_for_devpath(dev_path)
+        lsblk_info_for_devpath = names.get(maj_min)
         if not lsblk_info_for_devpath:
             return
         name, kname, size = lsblk_info_for_devpath
 
         parent_name = ""
         if parent_path:
-            parent_info = _get_lsblk_info_for_devpath(parent_path)
+            parent_info = names.get(path_to_maj_min.get(parent_path))
+            if not parent_info:
+                # The parent is not listed by lsblk, which is unexpected
+                parent_info = _get_lsblk_info_for_devpath(parent_path)
             if parent_info:
-                parent_name, _, _ = parent_info
+                parent_name = parent_info[0]
 
         yield LsblkEntry(
             name=name,
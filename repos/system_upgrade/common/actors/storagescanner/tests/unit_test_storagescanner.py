@@ -269,26 +269,18 @@ def test_get_lsblk_info(monkeypatch):
                 ['/dev/nvme0n1p1', '259:1', '0', str(39 * bytes_per_gb), '0', 'part', '', '/dev/nvme0n1'],
             ]
             yield from output_lines_split_on_whitespace
-        elif len(cmd) == 5 and cmd[:4] == ['lsblk', '-nr', '--output', 'NAME,KNAME,SIZE']:
-            # We cannot have the output in a list, since the command is called per device. Therefore, we have to map
-            # each device path to its output.
-            output_lines_split_on_whitespace_per_device = {
-                '/dev/vda': ['vda', 'vda', '40G'],
-                '/dev/vda1': ['vda1', 'vda1', '1G'],
-                '/dev/vda2': ['vda2', 'vda2', '39G'],
-                '/dev/mapper/rhel_ibm--p8--kvm--03--guest--02-root':
-                    ['rhel_ibm--p8--kvm--03--guest--02-root', 'kname1', '38G'],
-                '/dev/mapper/rhel_ibm--p8--kvm--03--guest--02-swap':
-                    ['rhel_ibm--p8--kvm--03--guest--02-swap', 'kname2', '1G'],
-                '/dev/mapper/luks-01b60fff-a2a8-4c03-893f-056bfc3f06f6':
-                    ['luks-01b60fff-a2a8-4c03-893f-056bfc3f06f6', 'dm-0', '38G'],
-                '/dev/nvme0n1p1': ['nvme0n1p1', 'nvme0n1p1', '39G'],
-                '/dev/nvme0n1': ['nvme0n1', 'nvme0n1', '40G'],
-            }
-            dev_path = cmd[4]
-            if dev_path not in output_lines_split_on_whitespace_per_device:
-                raise ValueError('Attempting to call lsblk on an unexpected device: {}'.format(dev_path))
-            yield output_lines_split_on_whitespace_per_device[dev_path]
+        elif cmd == ['lsblk', '-nr', '--output', 'MAJ:MIN,NAME,KNAME,SIZE']:
+            output_lines_split_on_whitespace = [
+                ['252:0', 'vda', 'vda', '40G'],
+                ['252:1', 'vda1', 'vda1', '1G'],
+                ['252:2', 'vda2', 'vda2', '39G'],
+                ['253:0', 'rhel_ibm--p8--kvm--03--guest--02-root', 'kname1', '38G'],
+                ['253:1', 'rhel_ibm--p8--kvm--03--guest--02-swap', 'kname2', '1G'],
+                ['254:0', 'luks-01b60fff-a2a8-4c03-893f-056bfc3f06f6', 'dm-0', '38G'],
+                ['259:1', 'nvme0n1p1', 'nvme0n1p1', '39G'],
+                ['259:0', 'nvme0n1', 'nvme0n1', '40G'],
+            ]
+            yield from output_lines_split_on_whitespace
 
         else:
             raise ValueError('Attempting to call unexpected command: {}'.format(cmd))
@@ -0,0 +1,66 @@
+from leapp.libraries.actor import storagescanner
+
+DISKS_COUNT = 250
+BYTES_PER_GB = 1 << 30
+
+
+def _make_lsblk_topology():
+    """
+    Make a synthetic topology of 1000 block devices.
+
+    Every multipath disk has a partition holding an LVM physical volume with
+    a single logical volume, so every device except disks has a parent. Names
+    of the dm devices differ from their kernel names, so their parents can be
+    resolved only via the kernel names.
+
+    :return: Tuple of the `lsblk -pbnr` and `lsblk -nr` outputs split into fields.
+    """
+    path_entries = []
+    name_entries = []
+    for i in range(DISKS_COUNT):
+        devices = (
+            ('sd{}'.format(i), 'sd{}'.format(i), '/dev/sd{}'.format(i), 'disk', ''),
+            ('mpath{}'.format(i), 'dm-{}'.format(2 * i), '/dev/mapper/mpath{}'.format(i), 'mpath', 'sd{}'.format(i)),
+            ('mpath{}p1'.format(i), 'dm-{}'.format(2 * i + 1), '/dev/mapper/mpath{}p1'.format(i), 'part',
+             'dm-{}'.format(2 * i)),
+            ('vg{}-lv'.format(i), 'dm-{}'.format(2 * DISKS_COUNT + i), '/dev/mapper/vg{}-lv'.format(i), 'lvm',
+             'dm-{}'.format(2 * i + 1)),
+        )
+        for minor, (name, kname, path, tp, parent_kname) in enumerate(devices):
+            maj_min = '{}:{}'.format(8 + minor, i)
+            parent_path = '/dev/{}'.format(parent_kname) if parent_kname else ''
+            path_entries.append([path, maj_min, '0', str(BYTES_PER_GB), '0', tp, '', parent_path])
+            name_entries.append([maj_min, name, kname, '1G'])
+    return path_entries, name_entries
+
+
+def test_get_lsblk_info_benchmark(monkeypatch):
+    """
+    Collect lsblk info of 1000 block devices and check the number of spawned processes.
+
+    The number of lsblk calls must not depend on the number of devices.
+    """
+    path_entries, name_entries = _make_lsblk_topology()
+    calls = []
+
+    def get_cmd_output_mocked(cmd, delim, expected_len):
+        calls.append(cmd)
+        if cmd == ['lsblk', '-pbnr', '--output', 'NAME,MAJ:MIN,RM,SIZE,RO,TYPE,MOUNTPOINT,PKNAME']:
+            return iter(path_entries)
+        if cmd == ['lsblk', '-nr', '--output', 'MAJ:MIN,NAME,KNAME,SIZE']:
+            return iter(name_entries)
+        raise ValueError('Attempting to call unexpected command: {}'.format(cmd))
+
+    monkeypatch.setattr(storagescanner, '_get_cmd_output', get_cmd_output_mocked)
+
+    lsblk = storagescanner._get_lsblk_info()
+
+    assert len(lsblk) == len(path_entries) == 4 * DISKS_COUNT
+    assert len(calls) == 2
+
+    parent_names = {entry.name: entry.parent_name for entry in lsblk}
+    for i in range(DISKS_COUNT):
+        assert parent_names['sd{}'.format(i)] == ''
+        assert parent_names['mpath{}'.format(i)] == 'sd{}'.format(i)
+        assert parent_names['mpath{}p1'.format(i)] == 'mpath{}'.format(i)
+        assert parent_names['vg{}-lv'.format(i)] == 'mpath{}p1'.format(i)
@@ -0,0 +1,146 @@
+"""
+Reading of signatures appended to kernel module files.
+
+The signature is read directly from the module file (decompressing it when
+needed) and formatted the same way as by `modinfo -F signature`, so it is not
+necessary to spawn modinfo for every loaded kernel module.
+"""
+import gzip
+import lzma
+import os
+import struct
+import zlib
+
+MODULE_SIGNATURE_MAGIC = b'~Module signature appended~\n'
+
+_MODULE_SIGNATURE_INFO = struct.Struct('>BBBBB3xI')
+"""
+The struct module_signature placed between the signature and the magic string
+
+Fields: algo, hash, id_type, signer_len, key_id_len, (padding), sig_len.
+"""
+
+_PKEY_ID_PKCS7 = 2
+
+_DER_SEQUENCE = 0x30
+_DER_SET = 0x31
+_DER_OCTET_STRING = 0x04
+_DER_CONTEXT_0 = 0xa0
+
+
+def _read_module_file(path):
+    """
+    Read the content of the kernel module file, decompress it if needed.
+
+    :raises ValueError: if the file is compressed by an unsupported method or it is corrupted.
+    """
+    try:
+        if path.endswith('.xz'):
+            with lzma.open(path, 'rb') as f:
+                return f.read()
+        if path.endswith('.gz'):
+            with gzip.open(path, 'rb') as f:
+                return f.read()
+    except (lzma.LZMAError, zlib.error, EOFError) as err:
+        raise ValueError('Cannot decompress {}: {}'.format(path, err))
+    if os.path.splitext(path)[1] != '.ko':
+        raise ValueError('Unsupported kernel module file: {}'.format(path))
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _iter_der_elements(data, start, end):
+    """
+    Iterate over DER encoded elements stored in data[start:end].
+
+    :return: Generator of (tag, content_start, content_end) tuples.
+    :raises ValueError: if the data are not valid DER.
+    """
+    offset = start
+    while offset < end:
+        if offset + 2 > end:
+            raise ValueError('Truncated DER element')
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+        if length & 0x80:
+            count = length & 0x7f
+            if not count or offset + count > end:
+                # indefinite length is not allowed in DER
+                raise ValueError('Invalid length of DER element')
+            length = int.from_bytes(data[offset:offset + count], 'big')
+            offset += count
+        if offset + length > end:
+            raise ValueError('Truncated DER element')
+        yield tag, offset, offset + length
+        offset += length
+
+
+def _get_der_child(data, parent, tag, last=False):
+    """
+    Get the first (or the last) child element of the parent element with the given tag.
+
+    :raises ValueError: if there is no such element.
+    """
+    found = None
+    for element in _iter_der_elements(data, parent[1], parent[2]):
+        if element[0] == tag:
+            found = element
+            if not last:
+                break
+    if not found:
+        raise ValueError('Missing DER element with tag 0x{:02x}'.format(tag))
+    return found
+
+
+def _get_pkcs7_signature(data):
+    """
+    Get the signature of the first signer from PKCS#7 (CMS) signed data.
+
+    That is the encryptedDigest of the first SignerInfo, which is what
+    modinfo reports as the signature of the module.
+    """
+    content_info = next(_iter_der_elements(data, 0, len(data)), None)
+    if not content_info or content_info[0] != _DER_SEQUENCE:
+        raise ValueError('PKCS#7 data is not a DER sequence')
+    signed_data = _get_der_child(data, _get_der_child(data, content_info, _DER_CONTEXT_0), _DER_SEQUENCE)
+    # digestAlgorithms is a SET as well, signerInfos is the last element of SignedData
+    signer_infos = _get_der_child(data, signed_data, _DER_SET, last=True)
+    signer_info = _get_der_child(data, signer_infos, _DER_SEQUENCE)
+    signature = _get_der_child(data, signer_info, _DER_OCTET_STRING)
+    return data[signature[1]:signature[2]]
+
+
+def get_module_signature(path):
+    """
+    Get the signature of the kernel module in the format used by `modinfo -F signature`.
+
+    The format is uppercase hexadecimal bytes separated by colons, without
+    whitespace, e.g. `1A:2B:3C`.
+
+    :param path: Path to the kernel module file (.ko, .ko.xz or .ko.gz).
+    :type path: str
+    :return: The signature or None if the module is not signed.
+    :rtype: str | None
+    :raises ValueError: if the module file or its signature cannot be processed
+        (e.g. unsupported compression or signature type).
+    :raises OSError: if the module file cannot be read.
+    """
+    data = _read_module_file(path)
+    if not data.endswith(MODULE_SIGNATURE_MAGIC):
+        return None
+
+    info_end = len(data) - len(MODULE_SIGNATURE_MAGIC)
+    info_start = info_end - _MODULE_SIGNATURE_INFO.size
+    if info_start < 0:
+        raise ValueError('Truncated module signature info in {}'.format(path))
+    dummy_algo, dummy_hash, id_type, dummy_signer_len, dummy_key_id_len, sig_len = _MODULE_SIGNATURE_INFO.unpack(
+        data[info_start:info_end]
+    )
+    if id_type != _PKEY_ID_PKCS7:
+        raise ValueError('Unsupported module signature type {} in {}'.format(id_type, path))
+    if sig_len > info_start:
+        raise ValueError('Truncated module signature in {}'.format(path))
+
+    signature = _get_pkcs7_signature(bytearray(data[info_start - sig_len:info_start]))
+    return ':'.join('{:02X}'.format(byte) for byte in signature) or None
@@ -5,12 +5,14 @@ import logging
 import os
 import pwd
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 import six
 
 from leapp import reporting
 from leapp.exceptions import StopActorExecutionError
-from leapp.libraries.common import repofileutils
+from leapp.libraries.actor import modulesignature
+from leapp.libraries.common import bootentries, repofileutils
 from leapp.libraries.common.config import architecture
 from leapp.libraries.stdlib import api, CalledProcessError, run
 from leapp.models import (
@@ -115,60 +117,119 @@ def get_system_groups_status():
     return GroupsFacts(groups=_get_system_groups())
 
 
-@aslist
-def _get_active_kernel_modules(logger):
-    lines = run(['lsmod'], split=True)['stdout']
-    for l in lines[1:]:
-        name = l.split(' ')[0]
-
-        # Read parameters of the given module as exposed by the
-        # `/sys` VFS, if there are no parameters exposed we just
-        # take the name of the module
-        base_path = '/sys/module/{module}'.format(module=name)
-        parameters_path = os.path.join(base_path, 'parameters')
-        if not os.path.exists(parameters_path):
-            yield ActiveKernelModule(filename=name, parameters=[])
-            continue
+KERNEL_MODULES_DIR = '/lib/modules'
+
+KERNEL_MODULES_WORKERS = 8
+"""The maximal number of kernel modules processed in parallel"""
+
+
+def _get_kernel_modules_paths():
+    """
+    Get paths to the kernel module files of the running kernel from modules.dep
 
-        # Use `modinfo` to probe for signature information
-        parameter_dict = {}
+    :return: Dictionary mapping names of kernel modules (as listed by lsmod) to paths to their files.
+    """
+    modules_dir = os.path.join(KERNEL_MODULES_DIR, os.uname()[2])
+    modules_paths = {}
+    try:
+        with open(os.path.join(modules_dir, 'modules.dep'), mode='r') as fp:
+            for line in fp:
+                path = line.split(':', 1)[0].strip()
+                if not path:
+                    continue
+                name = os.path.basename(path).split('.ko', 1)[0].replace('-', '_')
+                modules_paths.setdefault(name, os.path.join(modules_dir, path))
+    except IOError as exc:
+        api.current_logger().debug('Cannot read modules.dep of the running kernel: {}'.format(exc))
+    return modules_paths
+
+
+def _get_kernel_module_signature(name, modules_paths):
+    """
+    Get the signature of the kernel module in the format printed by `modinfo -F signature`
+
+    The signature is read from the module file resolved via modules.dep. If that
+    is not possible, `modinfo` is used instead.
+    """
+    path = modules_paths.get(name)
+    if path:
         try:
-            signature = run(['modinfo', '-F', 'signature', name], split=False)['stdout']
-        except CalledProcessError:
-            signature = None
+            return modulesignature.get_module_signature(path)
+        except (OSError, ValueError) as exc:
+            api.current_logger().debug(
+                'Cannot read the signature of kernel module "{}" from {}: {}'.format(name, path, exc)
+            )
 
-        signature_string = None
-        if signature:
-            # Remove whitespace from the signature string
-            signature_string = re.sub(r"\s+", "", signature, flags=re.UNICODE)
+    try:
+        signature = run(['modinfo', '-F', 'signature', name], split=False)['stdout']
+    except CalledProcessError:
+        return None
+    if not signature:
+        return None
+    # Remove whitespace from the signature string
+    return re.sub(r"\s+", "", signature, flags=re.UNICODE)
+
+
+def _get_active_kernel_module(name, modules_paths, logger):
+    # Read parameters of the given module as exposed by the
+    # `/sys` VFS, if there are no parameters exposed we just
+    # take the name of the module
+    base_path = '/sys/module/{module}'.format(module=name)
+    parameters_path = os.path.join(base_path, 'parameters')
+    if not os.path.exists(parameters_path):
+        return ActiveKernelModule(filename=name, parameters=[])
+
+    parameter_dict = {}
+    signature_string = _get_kernel_module_signature(name, modules_paths)
+
+    # Since we're using the `/sys` VFS we need to use `os.listdir()` to get
+    # all the property names and then just read from all the listed paths
+    parameters = sorted(os.listdir(parameters_path))
+    for param in parameters:
+        try:
+            with open(os.path.join(parameters_path, param), mode='r') as fp:
+                parameter_dict[param] = fp.read().strip()
+        except IOError as exc:
+            # Some parameters are write-only, in that case we just log the name of parameter
+            # and the module and continue
+            if exc.errno in (errno.EACCES, errno.EPERM):
+                msg = 'Unable to read parameter "{param}" of kernel module "{name}"'
+                logger.warning(msg.format(param=param, name=name))
+            else:
+                raise exc
+
+    # Project the dictionary as a list of key values
+    items = [
+        KernelModuleParameter(name=k, value=v)
+        for (k, v) in six.iteritems(parameter_dict)
+    ]
+
+    return ActiveKernelModule(
+        filename=name,
+        parameters=items,
+        signature=signature_string
+    )
 
-        # Since we're using the `/sys` VFS we need to use `os.listdir()` to get
-        # all the property names and then just read from all the listed paths
-        parameters = sorted(os.listdir(parameters_path))
-        for param in parameters:
-            try:
-                with open(os.path.join(parameters_path, param), mode='r') as fp:
-                    parameter_dict[param] = fp.read().strip()
-            except IOError as exc:
-                # Some parameters are write-only, in that case we just log the name of parameter
-                # and the module and continue
-                if exc.errno in (errno.EACCES, errno.EPERM):
-                    msg = 'Unable to read parameter "{param}" of kernel module "{name}"'
-                    logger.warning(msg.format(param=param, name=name))
-                else:
-                    raise exc
-
-        # Project the dictionary as a list of key values
-        items = [
-            KernelModuleParameter(name=k, value=v)
-            for (k, v) in six.iteritems(parameter_dict)
-        ]
-
-        yield ActiveKernelModule(
-            filename=name,
-            parameters=items,
-            signature=signature_string
-        )
+
+def _get_active_kernel_modules(logger, workers=KERNEL_MODULES_WORKERS):
+    """
+    Get facts about loaded kernel modules
+
+    Signatures of the modules are read directly from the module files instead
+    of spawning `modinfo` for every module, and the modules are processed
+    in a pool of threads.
+    """
+    lines = run(['lsmod'], split=True)['stdout']
+    names = [l.split(' ')[0] for l in lines[1:]]
+    if not names:
+        return []
+    modules_paths = _get_kernel_modules_paths()
+
+    def _get_module(name):
+        return _get_active_kernel_module(name, modules_paths, logger)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as executor:
+        return list(executor.map(_get_module, names))
 
 
 def get_active_kernel_modules_status(logger):
@@ -232,20 +293,17 @@ def get_repositories_status():
 
 def _bootloader_entries_contain_enforcing_one():
     """
-    True if grubby reports enforcing=1 in any boot loader entry's kernel arguments.
+    True if enforcing=1 is in any boot loader entry's kernel arguments.
     """
     try:
-        out = run(['/usr/sbin/grubby', '--info', 'ALL'], split=False)['stdout']
+        entries = bootentries.get_boot_entries()
     except (OSError, CalledProcessError):
         api.current_logger().debug(
-            'grubby --info ALL failed; assuming no bootloader enforcing=1', exc_info=True
+            'Cannot get boot loader entries; assuming no bootloader enforcing=1', exc_info=True
         )
         return False
 
-    for line in out.splitlines():
-        if line.startswith('args=') and 'enforcing=1' in line[len('args='):].strip('"').split():
-            return True
-    return False
+    return any('enforcing=1' in entry.args.split() for entry in entries)
 
 
 def get_selinux_status():
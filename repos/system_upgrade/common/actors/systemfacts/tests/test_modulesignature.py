@@ -0,0 +1,97 @@
+import gzip
+import lzma
+import struct
+
+import pytest
+
+from leapp.libraries.actor import modulesignature
+
+OID_SIGNED_DATA = bytes.fromhex('06092a864886f70d010702')
+OID_DATA = bytes.fromhex('06092a864886f70d010701')
+OID_SHA256 = bytes.fromhex('0609608648016503040201')
+OID_RSA = bytes.fromhex('06092a864886f70d010101')
+SIGNATURE = bytes(range(256)) + b'\x01\x02'
+
+
+def _der(tag, *contents):
+    content = b''.join(contents)
+    if len(content) < 0x80:
+        return bytes([tag, len(content)]) + content
+    length = len(content).to_bytes((len(content).bit_length() + 7) // 8, 'big')
+    return bytes([tag, 0x80 | len(length)]) + length + content
+
+
+def _make_pkcs7(signature):
+    """
+    Make PKCS#7 signed data with detached content and a single signer as produced by sign-file
+    """
+    signer_info = _der(
+        0x30,
+        _der(0x02, b'\x01'),
+        _der(0x30, _der(0x30, _der(0x31, _der(0x30, _der(0x0c, b'Build key')))), _der(0x02, b'\x42')),
+        _der(0x30, OID_SHA256),
+        _der(0x30, OID_RSA, _der(0x05)),
+        _der(0x04, signature),
+    )
+    signed_data = _der(
+        0x30,
+        _der(0x02, b'\x01'),
+        _der(0x31, _der(0x30, OID_SHA256)),
+        _der(0x30, OID_DATA),
+        _der(0x31, signer_info),
+    )
+    return _der(0x30, OID_SIGNED_DATA, _der(0xa0, signed_data))
+
+
+def _make_module(signature=None, id_type=2):
+    content = b'\x7fELF' + b'\x00' * 1000
+    if signature is None:
+        return content
+    pkcs7 = _make_pkcs7(signature)
+    info = struct.pack('>BBBBB3xI', 0, 0, id_type, 0, 0, len(pkcs7))
+    return content + pkcs7 + info + modulesignature.MODULE_SIGNATURE_MAGIC
+
+
+def _write_module(tmp_path, filename, content):
+    path = str(tmp_path / filename)
+    if filename.endswith('.xz'):
+        content = lzma.compress(content)
+    elif filename.endswith('.gz'):
+        content = gzip.compress(content)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+@pytest.mark.parametrize('filename', ('mod.ko', 'mod.ko.xz', 'mod.ko.gz'))
+@pytest.mark.parametrize('signature', (SIGNATURE, b'\xab\x0c'))
+def test_get_module_signature(tmp_path, filename, signature):
+    path = _write_module(tmp_path, filename, _make_module(signature))
+
+    expected = ':'.join('{:02X}'.format(byte) for byte in signature)
+    assert modulesignature.get_module_signature(path) == expected
+
+
+def test_get_module_signature_unsigned(tmp_path):
+    path = _write_module(tmp_path, 'mod.ko.xz', _make_module())
+    assert modulesignature.get_module_signature(path) is None
+
+
+@pytest.mark.parametrize('filename, content', (
+    ('mod.ko.zst', _make_module(SIGNATURE)),
+    ('mod.ko', _make_module(SIGNATURE, id_type=1)),
+    ('mod.ko', _make_module(SIGNATURE)[:-len(modulesignature.MODULE_SIGNATURE_MAGIC) - 40]
+     + _make_module(SIGNATURE)[-len(modulesignature.MODULE_SIGNATURE_MAGIC) - 12:]),
+))
+def test_get_module_signature_unsupported(tmp_path, filename, content):
+    path = _write_module(tmp_path, filename, content)
+    with pytest.raises(ValueError):
+        modulesignature.get_module_signature(path)
+
+
+def test_get_module_signature_corrupted_xz(tmp_path):
+    path = str(tmp_path / 'mod.ko.xz')
+    with open(path, 'wb') as f:
+        f.write(lzma.compress(_make_module(SIGNATURE))[:-10])
+    with pytest.raises(ValueError):
+        modulesignature.get_module_signature(path)
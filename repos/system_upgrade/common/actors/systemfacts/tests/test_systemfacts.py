@@ -147,6 +147,69 @@ def test_failed_parsed_repofiles(monkeypatch):
         get_repositories_status()
 
 
+def test_get_kernel_modules_paths(monkeypatch, tmp_path):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(systemfacts, 'KERNEL_MODULES_DIR', str(tmp_path))
+    monkeypatch.setattr(systemfacts.os, 'uname', lambda: ('Linux', 'host', '5.14.0-1.el9.x86_64', '', 'x86_64'))
+    modules_dir = tmp_path / '5.14.0-1.el9.x86_64'
+    modules_dir.mkdir()
+    (modules_dir / 'modules.dep').write_text(
+        'kernel/fs/xfs/xfs.ko.xz: kernel/lib/libcrc32c.ko.xz\n'
+        'kernel/lib/libcrc32c.ko.xz:\n'
+        'kernel/drivers/hid/hid-generic.ko.xz: kernel/drivers/hid/hid.ko.xz\n'
+        '/opt/extra/vendor.ko:\n'
+    )
+
+    assert systemfacts._get_kernel_modules_paths() == {
+        'xfs': str(modules_dir / 'kernel/fs/xfs/xfs.ko.xz'),
+        'libcrc32c': str(modules_dir / 'kernel/lib/libcrc32c.ko.xz'),
+        'hid_generic': str(modules_dir / 'kernel/drivers/hid/hid-generic.ko.xz'),
+        'vendor': '/opt/extra/vendor.ko',
+    }
+
+
+def test_get_kernel_module_signature(monkeypatch):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    read_paths = []
+
+    def get_module_signature_mocked(path):
+        read_paths.append(path)
+        if path.endswith('.zst'):
+            raise ValueError('Unsupported kernel module file')
+        return 'AB:CD'
+
+    def run_mocked(cmd, split=False):
+        assert cmd[:3] == ['modinfo', '-F', 'signature']
+        if cmd[3] == 'unsigned':
+            return {'stdout': ''}
+        return {'stdout': '\t\t01:02:\n\t\t03:04\n'}
+
+    monkeypatch.setattr(systemfacts.modulesignature, 'get_module_signature', get_module_signature_mocked)
+    monkeypatch.setattr(systemfacts, 'run', run_mocked)
+    modules_paths = {'xfs': '/lib/modules/xfs.ko.xz', 'zstd_module': '/lib/modules/zstd_module.ko.zst'}
+
+    assert systemfacts._get_kernel_module_signature('xfs', modules_paths) == 'AB:CD'
+    assert systemfacts._get_kernel_module_signature('zstd_module', modules_paths) == '01:02:03:04'
+    assert systemfacts._get_kernel_module_signature('unknown', modules_paths) == '01:02:03:04'
+    assert systemfacts._get_kernel_module_signature('unsigned', modules_paths) is None
+    assert read_paths == ['/lib/modules/xfs.ko.xz', '/lib/modules/zstd_module.ko.zst']
+
+
+@pytest.mark.parametrize('workers', (1, 4))
+def test_get_active_kernel_modules(monkeypatch, workers):
+    names = ['mod{}'.format(i) for i in range(20)]
+    lsmod_output = ['Module                  Size  Used by']
+    lsmod_output += ['{} 16384 0'.format(name) for name in names]
+    monkeypatch.setattr(systemfacts, 'run', lambda cmd, split=False: {'stdout': lsmod_output})
+    monkeypatch.setattr(systemfacts, '_get_kernel_modules_paths', lambda: {'mod0': '/lib/modules/mod0.ko'})
+    monkeypatch.setattr(systemfacts, '_get_active_kernel_module',
+                        lambda name, modules_paths, logger: (name, modules_paths))
+
+    modules = systemfacts._get_active_kernel_modules(logger_mocked(), workers=workers)
+
+    assert modules == [(name, {'mod0': '/lib/modules/mod0.ko'}) for name in names]
+
+
 @pytest.mark.parametrize('is_enabled', (True, False))
 @mock.patch('leapp.libraries.actor.systemfacts.run')
 def test_get_secure_boot_state_ok(mocked_run: mock.MagicMock, is_enabled):
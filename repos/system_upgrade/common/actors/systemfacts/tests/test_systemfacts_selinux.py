@@ -4,6 +4,7 @@ import pytest
 
 from leapp.libraries.actor import systemfacts
 from leapp.libraries.actor.systemfacts import get_selinux_status
+from leapp.libraries.common import bootentries
 from leapp.models import SELinuxFacts
 
 no_selinux = False
@@ -21,21 +22,18 @@ reason_to_skip_msg = "Selinux is not available"
 # FIXME: create valid tests...
 
 
-def _run_result(stdout):
-    return {'stdout': stdout, 'stderr': '', 'signal': None, 'exit_code': 0, 'pid': 1}
+def _mocked_boot_entries(grubby_stdout):
+    return lambda: bootentries.parse_grubby_info(grubby_stdout)
 
 
 @pytest.fixture(autouse=True)
-def stub_grubby_info_all_without_enforcing(monkeypatch):
+def stub_boot_entries_without_enforcing(monkeypatch):
     """
-    Avoid invoking real grubby from get_selinux_status(); default: no enforcing=1 in boot entries.
+    Avoid reading real boot entries from get_selinux_status(); default: no enforcing=1 in boot entries.
     """
-
-    def mocked_run(cmd, split=False, **dummy_kwargs):
-        assert cmd == ['/usr/sbin/grubby', '--info', 'ALL'], f"Unexpected grubby cmd: {cmd}"
-        return _run_result('index=0\nkernel="/boot/vmlinuz-1"\nargs="ro rhgb quiet"\nroot="UUID=xxx"\n')
-
-    monkeypatch.setattr(systemfacts, 'run', mocked_run)
+    monkeypatch.setattr(systemfacts.bootentries, 'get_boot_entries', _mocked_boot_entries(
+        'index=0\nkernel="/boot/vmlinuz-1"\nargs="ro rhgb quiet"\nroot="UUID=xxx"\n'
+    ))
 
 
 @pytest.mark.skipif(no_selinux, reason=reason_to_skip_msg)
@@ -141,11 +139,7 @@ def test_bootloader_enforcing_one_detected(monkeypatch, grubby_stdout, expected)
     monkeypatch.setattr(selinux, 'is_selinux_enabled', lambda: 1)
     monkeypatch.setattr(selinux, 'selinux_getpolicytype', lambda: [0, 'targeted'])
 
-    def mocked_run(cmd, split=False, **dummy_kwargs):
-        assert cmd == ['/usr/sbin/grubby', '--info', 'ALL'], f"Unexpected grubby cmd: {cmd}"
-        return _run_result(grubby_stdout)
-
-    monkeypatch.setattr(systemfacts, 'run', mocked_run)
+    monkeypatch.setattr(systemfacts.bootentries, 'get_boot_entries', _mocked_boot_entries(grubby_stdout))
 
     fact = get_selinux_status()
     assert fact.enforcing_via_any_cmdline is expected
@@ -1,5 +1,7 @@
+import hashlib
 import json
 import os
+import tempfile
 from collections import defaultdict, namedtuple
 from enum import IntEnum
 from itertools import chain
@@ -7,10 +9,22 @@ from itertools import chain
 from leapp import reporting
 from leapp.exceptions import StopActorExecution
 from leapp.libraries.common import fetch
-from leapp.libraries.common.config import architecture
+from leapp.libraries.common.config import architecture, version
 from leapp.libraries.common.rpms import get_leapp_packages, LeappComponents
 from leapp.libraries.stdlib import api
 
+PES_EVENTS_CACHE_DIR = '/var/lib/leapp/pes-events-cache'
+"""
+Directory holding the compiled PES events.
+
+The compiled form contains only entries relevant for the current architecture
+and upgrade path, indexed by names of their input packages. It is bound to
+the source JSON file by its checksum, so it is rebuilt whenever the file changes.
+The directory is removed by the remove_upgrade_caches actor before the upgrade.
+"""
+
+PES_EVENTS_CACHE_FORMAT_VERSION = 1
+
 # NOTE(mhecko): The modulestream field contains a set of modulestreams until the very end when we generate a Package
 # for every modulestream in this set.
 _Package = namedtuple('Package', ['name',         # str
@@ -60,28 +74,234 @@ class Action(IntEnum):
     RENAMED = 7
 
 
-def get_pes_events(pes_json_directory, pes_json_filename):
+def _iter_pes_entries(pes_json_filename, other_fields=None):
+    """
+    Iterate over raw entries of the PES events file without loading the whole file into memory.
+
+    :param dict other_fields: Filled with values of other top-level fields of the PES events file
+    :raises ValueError: When the file does not contain any PES entries
+    """
+    # NOTE(pstodulk): stream_data_asset raises StopActorExecutionError, see
+    # the code for more info. Keeping the handling on the framework in such
+    # a case as we have no work to do in such a case here.
+    entries = fetch.stream_data_asset(api.current_actor(),
+                                      pes_json_filename,
+                                      asset_fulltext_name='PES events file',
+                                      docs_url='',
+                                      docs_title='',
+                                      entries_field='packageinfo',
+                                      other_fields=other_fields)
+    has_entries = False
+    for entry in entries:
+        has_entries = True
+        yield entry
+    if not has_entries:
+        raise ValueError('Found PES data with invalid structure')
+
+
+def _compute_file_checksum(path):
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def _get_compiled_pes_events_path(pes_json_filename):
+    configuration = api.current_actor().configuration
+    compiled_filename = '{name}.{arch}.{src}-{dst}.json'.format(
+        name=os.path.splitext(pes_json_filename)[0],
+        arch=configuration.architecture,
+        src=configuration.version.source,
+        dst=configuration.version.target,
+    )
+    return os.path.join(PES_EVENTS_CACHE_DIR, compiled_filename)
+
+
+def is_release_relevant(release):
+    """
+    Check whether the release happened between the source OS version and the target OS version.
+
+    :param release: The release as a (major, minor) tuple, e.g. Event.to_release
+    """
+    configuration = api.current_actor().configuration
+    relevant_releases_match_list = [
+        '> {0}'.format(configuration.version.source),
+        '<= {0}'.format(configuration.version.target)
+    ]
+    return version.matches_version(relevant_releases_match_list, '{}.{}'.format(*release))
+
+
+def _get_packageset_names(packageset):
+    packageset = packageset or {}
+    return [package['name'] for package in packageset.get('package', packageset.get('packages', []))]
+
+
+def _compile_pes_events(entries, checksum):
+    """
+    Compile the raw PES entries into the form stored in the PES events cache.
+
+    All entries are parsed, so invalid data are detected the same way as without the cache.
+    Only entries matching the current architecture and having a release relevant for the IPU
+    are kept. The kept entries are indexed by names of their input packages.
+
+    :return: A tuple (compiled, parsed_entries), where `compiled` is a dict to be stored on disk
+             and `parsed_entries` contains a list of Events for every compiled entry
+    """
+    arch = api.current_actor().configuration.architecture
+
+    compiled_entries = []
+    parsed_entries = []
+    for entry in entries:
+        events = parse_entry(entry)
+        if not events:
+            # Entries without input packages do not produce any event
+            continue
+        # All events generated from a single entry share the architectures and releases
+        if events[0].architectures and arch not in events[0].architectures:
+            continue
+        if not is_release_relevant(events[0].to_release):
+            continue
+        compiled_entries.append(entry)
+        parsed_entries.append(events)
+
+    index = defaultdict(list)
+    for entry_idx, entry in enumerate(compiled_entries):
+        for pkg_name in set(_get_packageset_names(entry.get('in_packageset'))):
+            index[pkg_name].append(entry_idx)
+
+    compiled = {
+        'format_version': PES_EVENTS_CACHE_FORMAT_VERSION,
+        'checksum': checksum,
+        'architecture': arch,
+        'source_version': api.current_actor().configuration.version.source,
+        'target_version': api.current_actor().configuration.version.target,
+        'entries': compiled_entries,
+        'index': index,
+    }
+    return compiled, parsed_entries
+
+
+def _load_compiled_pes_events(compiled_path, checksum):
+    """
+    Load the compiled PES events if they are up-to-date with the source PES data.
+
+    :return: The compiled PES events as a dict or None if missing or stale
+    """
+    try:
+        with open(compiled_path) as f:
+            compiled = json.load(f)
+    except (EnvironmentError, ValueError):
+        return None
+
+    configuration = api.current_actor().configuration
+    expected_header = {
+        'format_version': PES_EVENTS_CACHE_FORMAT_VERSION,
+        'checksum': checksum,
+        'architecture': configuration.architecture,
+        'source_version': configuration.version.source,
+        'target_version': configuration.version.target,
+    }
+    if not isinstance(compiled, dict) or any(compiled.get(k) != v for k, v in expected_header.items()):
+        api.current_logger().debug('The compiled PES events {} are stale.'.format(compiled_path))
+        return None
+    return compiled
+
+
+def _store_compiled_pes_events(compiled_path, compiled):
+    try:
+        os.makedirs(os.path.dirname(compiled_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(compiled_path), prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(compiled, f)
+        os.replace(tmp_path, compiled_path)
+    except EnvironmentError as err:
+        # The cache is just an optimization, the upgrade can continue without it
+        api.current_logger().warning('Cannot store the compiled PES events into {}: {}'.format(compiled_path, err))
+
+
+def _select_relevant_entries(compiled, pkg_names):
+    """
+    Select indices of compiled entries that can affect any of the given packages.
+
+    An entry is relevant when any of its input packages is one of the given packages,
+    or one of the output packages of another relevant entry (chained events).
+
+    :return: Sorted list of indices of the relevant compiled entries
+    """
+    entries = compiled['entries']
+    index = compiled['index']
+
+    selected = set()
+    names_to_visit = list(set(pkg_names))
+    visited_names = set(names_to_visit)
+    while names_to_visit:
+        pkg_name = names_to_visit.pop()
+        for entry_idx in index.get(pkg_name, ()):
+            if entry_idx in selected:
+                continue
+            selected.add(entry_idx)
+            for out_pkg_name in _get_packageset_names(entries[entry_idx].get('out_packageset')):
+                if out_pkg_name not in visited_names:
+                    visited_names.add(out_pkg_name)
+                    names_to_visit.append(out_pkg_name)
+    return sorted(selected)
+
+
+def _get_relevant_pes_events(pes_json_directory, pes_json_filename, pkg_names):
+    local_path = os.path.join(pes_json_directory, pes_json_filename)
+    compiled_path = _get_compiled_pes_events_path(pes_json_filename)
+
+    checksum = None
+    compiled = None
+    try:
+        checksum = _compute_file_checksum(local_path)
+    except EnvironmentError:
+        # Let the load_data_asset function to handle the missing/unreadable file
+        pass
+    if checksum:
+        compiled = _load_compiled_pes_events(compiled_path, checksum)
+
+    if compiled:
+        api.current_logger().debug('Using the compiled PES events from {}'.format(compiled_path))
+        fetch.produce_consumed_data_asset(api.current_actor(),
+                                          pes_json_filename,
+                                          asset_fulltext_name='PES events file',
+                                          docs_url='',
+                                          docs_title='',
+                                          provided_data_streams=compiled.get('provided_data_streams'))
+        selected = _select_relevant_entries(compiled, pkg_names)
+        return list(chain(*[parse_entry(compiled['entries'][entry_idx]) for entry_idx in selected]))
+
+    other_fields = {}
+    compiled, parsed_entries = _compile_pes_events(_iter_pes_entries(pes_json_filename, other_fields), checksum)
+    # The other fields are complete only after all the entries are read
+    compiled['provided_data_streams'] = other_fields.get(fetch.ASSET_PROVIDED_DATA_STREAMS_FIELD)
+    if checksum:
+        _store_compiled_pes_events(compiled_path, compiled)
+    selected = _select_relevant_entries(compiled, pkg_names)
+    return list(chain(*[parsed_entries[entry_idx] for entry_idx in selected]))
+
+
+def get_pes_events(pes_json_directory, pes_json_filename, pkg_names=None):
     """
     Get all the events from the source JSON file exported from PES.
 
+    When `pkg_names` is specified, only events relevant for the IPU that can affect
+    the given packages are returned. In such a case the events are loaded from the compiled
+    PES events stored in PES_EVENTS_CACHE_DIR when they are up-to-date with the source file.
+    Otherwise the source file is parsed and the compiled PES events are regenerated.
+
+    :param pkg_names: Names of packages (e.g. installed ones) to get the relevant events for.
+    :type pkg_names: Optional[Iterable[str]]
     :return: List of Event tuples, where each event contains event type and input/output pkgs
     """
     try:
-        # NOTE(pstodulk): load_data_assert raises StopActorExecutionError, see
-        # the code for more info. Keeping the handling on the framework in such
-        # a case as we have no work to do in such a case here.
-        events_data = fetch.load_data_asset(api.current_actor(),
-                                            pes_json_filename,
-                                            asset_fulltext_name='PES events file',
-                                            docs_url='',
-                                            docs_title='')
-        if not events_data:
-            return None
-
-        if not events_data.get('packageinfo'):
-            raise ValueError('Found PES data with invalid structure')
-
-        all_events = list(chain(*[parse_entry(entry) for entry in events_data['packageinfo']]))
+        if pkg_names is not None:
+            return _get_relevant_pes_events(pes_json_directory, pes_json_filename, pkg_names)
+
+        # Parse the entries as they are read, so the whole PES data are never held in memory
+        all_events = chain.from_iterable(parse_entry(entry) for entry in _iter_pes_entries(pes_json_filename))
         arch = api.current_actor().configuration.architecture
         events_matching_arch = [e for e in all_events if not e.architectures or arch in e.architectures]
         return events_matching_arch
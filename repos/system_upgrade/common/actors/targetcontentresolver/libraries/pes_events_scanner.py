@@ -3,7 +3,7 @@ from functools import partial
 
 from leapp import reporting
 from leapp.libraries.actor import repomap_calc
-from leapp.libraries.actor.pes_event_parsing import Action, get_pes_events, Package
+from leapp.libraries.actor.pes_event_parsing import Action, get_pes_events, is_release_relevant, Package
 from leapp.libraries.common import rpms
 from leapp.libraries.common.config import get_target_distro_id, version
 from leapp.libraries.common.distro import DISTRO_REPORT_NAMES
@@ -65,26 +65,62 @@ def _get_relevant_releases(events):
 
     Relevant release happened between the source OS version and the target OS version.
     """
-    # Collect releases that happened between source OS version and target OS version
-    relevant_releases_match_list = [
-        '> {0}'.format(api.current_actor().configuration.version.source),
-        '<= {0}'.format(api.current_actor().configuration.version.target)
-    ]
     releases = {event.to_release for event in events}
-    releases = [r for r in releases if version.matches_version(relevant_releases_match_list, '{}.{}'.format(*r))]
-    return sorted(releases)
+    return sorted(release for release in releases if is_release_relevant(release))
+
+
+def _index_events_by_release(events):
+    """
+    Index events by their to_release and by names of their input packages.
+
+    Events without input packages are indexed under the None key.
+
+    :return: A dict mapping a release to a dict mapping a package name to a list of (position, event) pairs,
+             where the position is the index of the event in the given list of events.
+    """
+    index = defaultdict(lambda: defaultdict(list))
+    for position, event in enumerate(events):
+        in_pkg_names = {pkg.name for pkg in event.in_pkgs} or {None}
+        for pkg_name in in_pkg_names:
+            index[event.to_release][pkg_name].append((position, event))
+    return index
+
+
+def _get_release_events_involving_pkgs(release_event_index, pkgs):
+    """
+    Get events of a single release having an input package with the same name as any of the given packages.
+
+    Events without input packages are always included. The events are returned in their original order.
+
+    :param release_event_index: An entry of the index created by _index_events_by_release
+    :param pkgs: Packages for which the events should be looked up
+    """
+    pkg_names = {pkg.name for pkg in pkgs}
+    pkg_names.add(None)
+    if len(pkg_names) > len(release_event_index):
+        pkg_names = pkg_names.intersection(release_event_index)
+
+    relevant_events = {}
+    for pkg_name in pkg_names:
+        for position, event in release_event_index.get(pkg_name, ()):
+            relevant_events[position] = event
+    return [relevant_events[position] for position in sorted(relevant_events)]
 
 
 def _compute_pkg_changes_between_consequent_releases(source_installed_pkgs,
-                                                     events,
-                                                     release,
+                                                     release_events,
                                                      seen_pkgs,
                                                      pkgs_to_demodularize):
+    """
+    Apply events of a single release on the given packages.
+
+    :param release_events: Events of the release in their original order. Events not involving any
+                           of the seen packages can be omitted as they cannot have any effect.
+    """
     logger = api.current_logger()
     # Start with the installed packages and modify the set according to release events
     target_pkgs = set(source_installed_pkgs)
-
-    release_events = [e for e in events if e.to_release == release]
+    pkgs_to_demodularize = set(pkgs_to_demodularize)
 
     def log_replaced_pkgs(removed, added):
         removed_pkgs_str = ', '.join(str(pkg) for pkg in removed) or '[]'
@@ -110,23 +146,23 @@ def _compute_pkg_changes_between_consequent_releases(source_installed_pkgs,
                 # back, but now with the new repositories. As the Package class has
                 # a custom __hash__ and __eq__ comparing only name and
                 # modulestream, the pkg.repository field is ignored and therefore
-                # the union() call does not update the entries.
-                target_pkgs = target_pkgs.difference(seen_in_pkgs)
-                target_pkgs = seen_in_pkgs.union(target_pkgs)
+                # the update() call does not update the entries.
+                target_pkgs.difference_update(seen_in_pkgs)
+                target_pkgs.update(seen_in_pkgs)
 
         elif event.action == Action.DEPRECATED:
-            if event.in_pkgs.intersection(source_installed_pkgs):
+            if not event.in_pkgs.isdisjoint(source_installed_pkgs):
                 # Remove packages with old repositories add packages with the new one
                 removed_pkgs = target_pkgs.intersection(event.in_pkgs)
                 log_replaced_pkgs(removed_pkgs, event.in_pkgs)
 
-                target_pkgs = target_pkgs.difference(event.in_pkgs)
-                target_pkgs = target_pkgs.union(event.in_pkgs)
+                target_pkgs.difference_update(event.in_pkgs)
+                target_pkgs.update(event.in_pkgs)
         else:
             # All other packages have the same semantics - they remove their in_pkgs from the system with given
             # from_release and add out_pkgs to the system matching to_release
-            are_all_in_pkgs_present = all(in_pkg in source_installed_pkgs for in_pkg in event.in_pkgs)
-            is_any_in_pkg_present = any(in_pkg in source_installed_pkgs for in_pkg in event.in_pkgs)
+            are_all_in_pkgs_present = event.in_pkgs.issubset(source_installed_pkgs)
+            is_any_in_pkg_present = not event.in_pkgs.isdisjoint(source_installed_pkgs)
 
             # For MERGE to be relevant it is sufficient for only one of its in_pkgs to be installed
             if are_all_in_pkgs_present or (event.action == Action.MERGED and is_any_in_pkg_present):
@@ -134,14 +170,14 @@ def _compute_pkg_changes_between_consequent_releases(source_installed_pkgs,
                 log_replaced_pkgs(removed_pkgs, event.out_pkgs)
 
                 # In pkgs are present, event can be applied
-                # Note: We do a .difference(event.out_packages) followed by an .union(event.out_packages) to overwrite
-                # #     repositories of the packages (Package has overwritten __hash__ and __eq__, ignoring
-                # #     the repository field)
-                target_pkgs = target_pkgs.difference(event.in_pkgs)
-                target_pkgs = target_pkgs.difference(event.out_pkgs)
-                target_pkgs = target_pkgs.union(event.out_pkgs)
+                # Note: We do a .difference_update(event.out_packages) followed by an .update(event.out_packages)
+                # #     to overwrite repositories of the packages (Package has overwritten __hash__ and __eq__,
+                # #     ignoring the repository field)
+                target_pkgs.difference_update(event.in_pkgs)
+                target_pkgs.difference_update(event.out_pkgs)
+                target_pkgs.update(event.out_pkgs)
 
-        pkgs_to_demodularize = pkgs_to_demodularize.difference(event.in_pkgs)
+        pkgs_to_demodularize.difference_update(event.in_pkgs)
 
     return (target_pkgs, pkgs_to_demodularize)
 
@@ -204,15 +240,21 @@ def _compute_packages_on_target_system(source_pkgs, events, releases):
     did_processing_cross_major_version = False
     pkgs_to_demodularize = set()  # Modified by compute_pkg_changes
 
+    # Build the index once, so every release step visits only events involving packages seen so far.
+    # Events not involving any of the seen packages (target pkgs are always a subset) cannot have any effect.
+    event_index = _index_events_by_release(events)
+
     for release in releases:
         if not did_processing_cross_major_version and release[0] > source_major_version:
             did_processing_cross_major_version = True
             pkgs_to_demodularize = {pkg for pkg in target_pkgs if pkg.modulestream}
 
-        target_pkgs, pkgs_to_demodularize = _compute_pkg_changes_between_consequent_releases(target_pkgs, events,
-                                                                                             release, seen_pkgs,
+        release_events = _get_release_events_involving_pkgs(event_index.get(release, {}), seen_pkgs)
+        target_pkgs, pkgs_to_demodularize = _compute_pkg_changes_between_consequent_releases(target_pkgs,
+                                                                                             release_events,
+                                                                                             seen_pkgs,
                                                                                              pkgs_to_demodularize)
-        seen_pkgs = seen_pkgs.union(target_pkgs)
+        seen_pkgs.update(target_pkgs)
 
     demodularized_pkgs = {Package(pkg.name, pkg.repository, None) for pkg in pkgs_to_demodularize}
     demodularized_target_pkgs = target_pkgs.difference(pkgs_to_demodularize).union(demodularized_pkgs)
@@ -496,15 +538,18 @@ def scan_pes_events(repomap_handler, blocklisted_repoids, enabled_repoids, insta
     :rtype: Optional[set]
     """
     # Retrieve data - installed_pkgs, transaction configuration, pes events
-    events = get_pes_events('/etc/leapp/files', 'pes-events.json')
-    if not events:
-        return None
-
-    releases = _get_relevant_releases(events)
     installed_pkgs = _rpms_to_package_set(installed_rpms)
     transaction_configuration = _get_transaction_configuration()
     pkgs_to_begin_computation_with = _apply_transaction_configuration(installed_pkgs, transaction_configuration)
 
+    # Load only events that can affect the packages we begin the computation with
+    events = get_pes_events('/etc/leapp/files', 'pes-events.json',
+                            pkg_names={pkg.name for pkg in pkgs_to_begin_computation_with})
+    if events is None:
+        return None
+
+    releases = _get_relevant_releases(events)
+
     # Keep track of what repoids have the source packages to be able to determine what are the PESIDs of the computed
     # packages of the target system, so we can distinguish what needs to be repomapped
     repoids_of_source_pkgs = {pkg.repository for pkg in pkgs_to_begin_computation_with}
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from leapp.libraries.common.config import get_source_distro_id, get_target_distro_id, get_target_product_channel
 from leapp.libraries.common.config.version import get_source_major_version, get_target_major_version
 from leapp.libraries.stdlib import api
@@ -48,11 +50,25 @@ class RepoMapDataHandler:
         :param prio_channel: Prefer repositories with this channel when looking for target equivalents.
         :type prio_channel: str
         """
-        # NOTE: currently I am keeping this default data structure that is not
-        # ideal for work, but there is not any significant impact..
         self.repositories = repo_map.repositories
         self.mapping = repo_map.mapping
 
+        # The lists above are searched repeatedly for every source repository,
+        # index them once to not scan them on each lookup.
+        # {(repoid, major_version, distro): [PESIDRepositoryEntry]}
+        self._repos_by_repoid = defaultdict(list)
+        # {(pesid, major_version, distro): [PESIDRepositoryEntry]}
+        self._repos_by_pesid = defaultdict(list)
+        for pesid_repo in self.repositories:
+            self._repos_by_repoid[(pesid_repo.repoid, pesid_repo.major_version, pesid_repo.distro)].append(pesid_repo)
+            self._repos_by_pesid[(pesid_repo.pesid, pesid_repo.major_version, pesid_repo.distro)].append(pesid_repo)
+
+        # {source_pesid: sorted list of target pesids}
+        target_pesids = defaultdict(set)
+        for repomap in self.mapping:
+            target_pesids[repomap.source].update(repomap.target)
+        self._target_pesids = {source: sorted(targets) for source, targets in target_pesids.items()}
+
         self.source_distro = source_distro or get_source_distro_id()
         self.target_distro = target_distro or get_target_distro_id()
         # FIXME(pstodulk): what about default_channel -> fallback_channel
@@ -116,14 +132,7 @@ class RepoMapDataHandler:
                  entry could be found.
         :rtype: Optional[PESIDRepositoryEntry]
         """
-        matching_pesid_repos = []
-        for pesid_repo in self.repositories:
-            if (
-                pesid_repo.repoid == repoid
-                and pesid_repo.major_version == major_version
-                and pesid_repo.distro == distro
-            ):
-                matching_pesid_repos.append(pesid_repo)
+        matching_pesid_repos = self._repos_by_repoid.get((repoid, major_version, distro), [])
 
         if len(matching_pesid_repos) == 1:
             # Perform no heuristics if only a single pesid repository with matching repoid found
@@ -149,11 +158,7 @@ class RepoMapDataHandler:
         :return: The list of target PES IDs the provided source_pesid is mapped to.
         :rtype: List[PESIDRepositoryEntry]
         """
-        pesids = set()
-        for repomap in self.mapping:
-            if repomap.source == source_pesid:
-                pesids.update(repomap.target)
-        return sorted(pesids)
+        return list(self._target_pesids.get(source_pesid, []))
 
     def get_pesid_repos(self, pesid, major_version, distro):
         """
@@ -169,15 +174,7 @@ class RepoMapDataHandler:
         :return: A list of PESIDRepositoryEntries that match the provided PES ID, OS major version, and OS release ID.
         :rtype: List[PESIDRepositoryEntry]
         """
-        pesid_repos = []
-        for pesid_repo in self.repositories:
-            if (
-                pesid_repo.pesid == pesid
-                and pesid_repo.major_version == major_version
-                and pesid_repo.distro == distro
-            ):
-                pesid_repos.append(pesid_repo)
-        return pesid_repos
+        return list(self._repos_by_pesid.get((pesid, major_version, distro), []))
 
     def get_source_pesid_repos(self, pesid):
         """
@@ -1,3 +1,4 @@
+import json
 import os.path
 from collections import namedtuple
 
@@ -5,6 +6,7 @@ import pytest
 
 from leapp import reporting
 from leapp.exceptions import StopActorExecution
+from leapp.libraries.actor import pes_event_parsing
 from leapp.libraries.actor.pes_event_parsing import (
     Action,
     Event,
@@ -156,10 +158,10 @@ def test_parse_pes_events_with_modulestreams(current_actor_context):
 
 
 def test_get_pes_events_invalid_data_reported(monkeypatch):
-    def load_data_asset_mocked(*args, **kwargs):
+    def stream_data_asset_mocked(*args, **kwargs):
         raise ValueError()
 
-    monkeypatch.setattr(fetch, 'load_data_asset', load_data_asset_mocked)
+    monkeypatch.setattr(fetch, 'stream_data_asset', stream_data_asset_mocked)
     created_reports = create_report_mocked()
     monkeypatch.setattr(reporting, "create_report", created_reports)
     monkeypatch.setattr(api, "current_actor", CurrentActorMocked())
@@ -168,3 +170,87 @@ def test_get_pes_events_invalid_data_reported(monkeypatch):
         get_pes_events("doesn't", "matter")
 
     assert created_reports.called
+
+
+def _make_pes_entry(event_id, action, in_pkgs, out_pkgs=(), release=(9, 0), architectures=None):
+    return {
+        'id': event_id,
+        'action': action,
+        'in_packageset': {'package': [{'name': name, 'repository': 'repo'} for name in in_pkgs]},
+        'out_packageset': {'package': [{'name': name, 'repository': 'repo'} for name in out_pkgs]},
+        'release': {'major_version': release[0], 'minor_version': release[1]},
+        'architectures': architectures or [],
+    }
+
+
+class _StreamDataAssetMocked:
+    def __init__(self, path):
+        self.path = path
+        self.called = 0
+
+    def __call__(self, *args, **kwargs):
+        self.called += 1
+        with open(self.path) as f:
+            data = json.load(f)
+        entries = data.pop(kwargs['entries_field'])
+        if kwargs.get('other_fields') is not None:
+            kwargs['other_fields'].update(data)
+        return iter(entries)
+
+
+def test_get_pes_events_compiled_cache(monkeypatch, tmp_path):
+    pes_json_path = tmp_path / 'pes-events.json'
+    entries = [
+        _make_pes_entry(1, Action.RENAMED, ['pkg-a'], ['pkg-b'], release=(9, 0)),
+        _make_pes_entry(2, Action.REMOVED, ['pkg-b'], release=(9, 2)),
+        _make_pes_entry(3, Action.REMOVED, ['not-installed'], release=(9, 0)),
+        _make_pes_entry(4, Action.REMOVED, ['pkg-a'], release=(9, 0), architectures=['s390x']),
+        _make_pes_entry(5, Action.REMOVED, ['pkg-a'], release=(8, 10)),
+    ]
+    pes_json_path.write_text(json.dumps({'packageinfo': entries}))
+
+    stream_data_asset_mocked = _StreamDataAssetMocked(str(pes_json_path))
+    produced_assets = []
+    monkeypatch.setattr(fetch, 'stream_data_asset', stream_data_asset_mocked)
+    monkeypatch.setattr(fetch, 'produce_consumed_data_asset', lambda *args, **kwargs: produced_assets.append(args))
+    monkeypatch.setattr(pes_event_parsing, 'PES_EVENTS_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(arch='x86_64', src_ver='8.10', dst_ver='9.6'))
+
+    events = get_pes_events(str(tmp_path), 'pes-events.json', pkg_names={'pkg-a'})
+    assert [event.id for event in events] == [1, 2]
+    assert stream_data_asset_mocked.called == 1
+    assert len(os.listdir(str(tmp_path / 'cache'))) == 1
+
+    # The compiled PES events are up-to-date, the JSON file is not loaded anymore
+    events = get_pes_events(str(tmp_path), 'pes-events.json', pkg_names={'pkg-a'})
+    assert [event.id for event in events] == [1, 2]
+    assert stream_data_asset_mocked.called == 1
+    assert len(produced_assets) == 1
+
+    events = get_pes_events(str(tmp_path), 'pes-events.json', pkg_names={'pkg-b', 'not-installed'})
+    assert [event.id for event in events] == [2, 3]
+    assert stream_data_asset_mocked.called == 1
+
+    # The source file has changed, the compiled PES events are stale
+    entries.append(_make_pes_entry(6, Action.REMOVED, ['pkg-a'], release=(9, 4)))
+    pes_json_path.write_text(json.dumps({'packageinfo': entries}))
+    events = get_pes_events(str(tmp_path), 'pes-events.json', pkg_names={'pkg-a'})
+    assert [event.id for event in events] == [1, 2, 6]
+    assert stream_data_asset_mocked.called == 2
+
+
+def test_get_pes_events_compiled_cache_invalid_data_reported(monkeypatch, tmp_path):
+    pes_json_path = tmp_path / 'pes-events.json'
+    pes_json_path.write_text(json.dumps({'packageinfo': [{'action': 10}]}))
+
+    monkeypatch.setattr(fetch, 'stream_data_asset', _StreamDataAssetMocked(str(pes_json_path)))
+    monkeypatch.setattr(pes_event_parsing, 'PES_EVENTS_CACHE_DIR', str(tmp_path / 'cache'))
+    created_reports = create_report_mocked()
+    monkeypatch.setattr(reporting, 'create_report', created_reports)
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
+
+    with pytest.raises(StopActorExecution):
+        get_pes_events(str(tmp_path), 'pes-events.json', pkg_names={'pkg-a'})
+
+    assert created_reports.called
+    assert not os.path.exists(str(tmp_path / 'cache'))
@@ -231,7 +231,8 @@ def test_actor_performs(monkeypatch):
               (9, 0), (9, 1), []),
     ]
 
-    monkeypatch.setattr(pes_events_scanner, 'get_pes_events', lambda data_folder, json_filename: events)
+    monkeypatch.setattr(pes_events_scanner, 'get_pes_events',
+                        lambda data_folder, json_filename, pkg_names=None: events)
 
     _RPM = partial(RPM, epoch='', packager='', version='', release='', arch='', pgpsig='')
 
@@ -338,7 +339,7 @@ def test_blacklisted_repoid_is_not_produced(monkeypatch):
     ]
 
     monkeypatch.setattr(pes_events_scanner, '_rpms_to_package_set', lambda rpm_list: installed_pkgs)
-    monkeypatch.setattr(pes_events_scanner, 'get_pes_events', lambda folder, filename: events)
+    monkeypatch.setattr(pes_events_scanner, 'get_pes_events', lambda folder, filename, pkg_names=None: events)
     monkeypatch.setattr(pes_events_scanner, '_apply_transaction_configuration', lambda pkgs, transaction_cfg: pkgs)
     monkeypatch.setattr(pes_events_scanner, '_replace_pesids_with_repoids_in_packages',
                         lambda pkgs, src_pkgs_repoids, repo_map_msg, enabled_repoids: pkgs)
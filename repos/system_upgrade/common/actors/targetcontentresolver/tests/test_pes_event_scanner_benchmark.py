@@ -0,0 +1,69 @@
+from leapp.libraries.actor import pes_events_scanner
+from leapp.libraries.actor.pes_event_parsing import Action, Event, Package
+from leapp.libraries.common.testutils import CurrentActorMocked
+from leapp.libraries.stdlib import api
+
+EVENTS_COUNT = 100000
+INSTALLED_PKGS_COUNT = 5000
+RELEASES = [(9, minor) for minor in range(7)]
+ACTIONS = (Action.REMOVED, Action.RENAMED, Action.PRESENT)
+
+
+def _make_event(event_id):
+    """
+    Make a synthetic PES event with a single input package named 'pkg-<event_id>'.
+
+    The action and the release are picked in cycles based on the event_id.
+    """
+    action = ACTIONS[event_id % len(ACTIONS)]
+    release = RELEASES[event_id % len(RELEASES)]
+    out_pkgs = set()
+    if action == Action.RENAMED:
+        out_pkgs = {Package('pkg-{}-renamed'.format(event_id), 'rhel9-BaseOS', None)}
+    in_pkgs = {Package('pkg-{}'.format(event_id), 'rhel9-BaseOS', None)}
+    return Event(event_id, action, in_pkgs, out_pkgs, (8, 10), release, [])
+
+
+def test_compute_packages_on_target_system_benchmark(monkeypatch):
+    """
+    Apply 100k synthetic PES events on a system with 5k installed packages.
+
+    Every installed package is the input of exactly one event, the rest of the events
+    involves packages that are not installed. Only the events involving installed packages
+    are expected to be visited when the events of particular releases are applied.
+    """
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(src_ver='8.10', dst_ver='9.6'))
+
+    events = [_make_event(event_id) for event_id in range(EVENTS_COUNT)]
+
+    step = EVENTS_COUNT // INSTALLED_PKGS_COUNT
+    installed_event_ids = range(0, EVENTS_COUNT, step)
+    installed_pkgs = {Package('pkg-{}'.format(event_id), 'rhel8-BaseOS', None) for event_id in installed_event_ids}
+
+    visited_events = []
+    orig_compute_pkg_changes = pes_events_scanner._compute_pkg_changes_between_consequent_releases
+
+    def compute_pkg_changes_counted(source_installed_pkgs, release_events, seen_pkgs, pkgs_to_demodularize):
+        visited_events.extend(release_events)
+        return orig_compute_pkg_changes(source_installed_pkgs, release_events, seen_pkgs, pkgs_to_demodularize)
+
+    monkeypatch.setattr(pes_events_scanner,
+                        '_compute_pkg_changes_between_consequent_releases',
+                        compute_pkg_changes_counted)
+
+    releases = pes_events_scanner._get_relevant_releases(events)
+    target_pkgs, dummy_demodularized_pkgs = pes_events_scanner._compute_packages_on_target_system(
+        installed_pkgs, events, releases
+    )
+
+    assert releases == RELEASES
+    assert len(visited_events) == INSTALLED_PKGS_COUNT
+
+    expected_target_pkg_names = set()
+    for event_id in installed_event_ids:
+        action = ACTIONS[event_id % len(ACTIONS)]
+        if action == Action.RENAMED:
+            expected_target_pkg_names.add('pkg-{}-renamed'.format(event_id))
+        elif action == Action.PRESENT:
+            expected_target_pkg_names.add('pkg-{}'.format(event_id))
+    assert {pkg.name for pkg in target_pkgs} == expected_target_pkg_names
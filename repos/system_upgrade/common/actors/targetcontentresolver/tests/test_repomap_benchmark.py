@@ -0,0 +1,103 @@
+from leapp.libraries.actor.repomap_calc import RepoMapDataHandler
+from leapp.libraries.common.testutils import CurrentActorMocked
+from leapp.libraries.stdlib import api
+from leapp.models import PESIDRepositoryEntry, RepoMapEntry, RepositoriesMapping
+
+PESIDS_COUNT = 500
+CHANNELS = ('ga', 'eus', 'e4s', 'beta', 'aus')
+ENABLED_REPOIDS_COUNT = 50
+
+
+def _make_repomap():
+    """
+    Make a synthetic repomap with 5k repositories.
+
+    Every source pesid has 5 repositories (one per channel) on the source and 5 on the target
+    system and it is mapped to the target pesid of the same family and to one shared pesid.
+    """
+    repositories = []
+    mapping = []
+    for i in range(PESIDS_COUNT):
+        for channel in CHANNELS:
+            repositories.append(PESIDRepositoryEntry(
+                pesid='src-pesid{}'.format(i), major_version='8', repoid='src-repoid{}-{}'.format(i, channel),
+                arch='x86_64', repo_type='rpm', channel=channel, rhui='', distro='rhel',
+            ))
+            repositories.append(PESIDRepositoryEntry(
+                pesid='dst-pesid{}'.format(i), major_version='9', repoid='dst-repoid{}-{}'.format(i, channel),
+                arch='x86_64', repo_type='rpm', channel=channel, rhui='', distro='rhel',
+            ))
+        mapping.append(RepoMapEntry(source='src-pesid{}'.format(i), target=['dst-pesid{}'.format(i), 'dst-pesid0']))
+    return RepositoriesMapping(mapping=mapping, repositories=repositories)
+
+
+class LinearRepoMapDataHandler(RepoMapDataHandler):
+    """
+    RepoMapDataHandler with the previous lookups scanning the whole repomap
+    """
+
+    def get_pesid_repo_entry(self, repoid, major_version, distro):
+        matching_pesid_repos = [
+            pesid_repo for pesid_repo in self.repositories
+            if (pesid_repo.repoid, pesid_repo.major_version, pesid_repo.distro) == (repoid, major_version, distro)
+        ]
+        if len(matching_pesid_repos) == 1:
+            return matching_pesid_repos[0]
+        cdn_pesid_repo = None
+        for pesid_repo in matching_pesid_repos:
+            if pesid_repo.rhui == self.cloud_provider:
+                return pesid_repo
+            if not pesid_repo.rhui:
+                cdn_pesid_repo = pesid_repo
+        return cdn_pesid_repo
+
+    def get_target_pesids(self, source_pesid):
+        pesids = set()
+        for repomap in self.mapping:
+            if repomap.source == source_pesid:
+                pesids.update(repomap.target)
+        return sorted(pesids)
+
+    def get_pesid_repos(self, pesid, major_version, distro):
+        return [
+            pesid_repo for pesid_repo in self.repositories
+            if (pesid_repo.pesid, pesid_repo.major_version, pesid_repo.distro) == (pesid, major_version, distro)
+        ]
+
+
+class CountedList(list):
+    """
+    List counting how many times it has been iterated over
+    """
+
+    iterations = 0
+
+    def __iter__(self):
+        self.iterations += 1
+        return super(CountedList, self).__iter__()
+
+
+def test_expected_target_pesid_repos_benchmark(monkeypatch):
+    """
+    Map enabled source repositories using the 5k entries repomap without scanning the whole repomap.
+
+    The repomap is expected to be scanned just once when the handler is created, not on each lookup.
+    The result is compared with the previous linear lookups.
+    """
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(arch='x86_64', src_ver='8.10', dst_ver='9.6'))
+    repomap = _make_repomap()
+    step = PESIDS_COUNT // ENABLED_REPOIDS_COUNT
+    src_repoids = ['src-repoid{}-{}'.format(i, CHANNELS[i % len(CHANNELS)]) for i in range(0, PESIDS_COUNT, step)]
+
+    expected = LinearRepoMapDataHandler(repomap, 'rhel', 'rhel').get_expected_target_pesid_repos(src_repoids)
+
+    handler = RepoMapDataHandler(repomap, 'rhel', 'rhel')
+    handler.repositories = CountedList(handler.repositories)
+    handler.mapping = CountedList(handler.mapping)
+    result = handler.get_expected_target_pesid_repos(src_repoids)
+
+    assert handler.repositories.iterations == 0
+    assert handler.mapping.iterations == 0
+    assert result == expected
+    assert len(result) == ENABLED_REPOIDS_COUNT
+    assert all(repo.repoid.startswith('dst-repoid') for repo in result.values())
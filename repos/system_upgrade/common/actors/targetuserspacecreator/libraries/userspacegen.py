@@ -1,12 +1,15 @@
+import hashlib
 import itertools
+import json
 import os
 import re
 import shutil
+import stat
 
 from leapp import reporting
 from leapp.exceptions import StopActorExecution, StopActorExecutionError
 from leapp.libraries.actor import constants
-from leapp.libraries.common import distro, mounting, overlaygen, repofileutils, rhsm, utils
+from leapp.libraries.common import distro, filecopy, mounting, overlaygen, repofileutils, rhsm, utils
 from leapp.libraries.common.config import (
     get_env,
     get_product_type,
@@ -68,6 +71,19 @@ from leapp.utils.deprecation import suppress_deprecation
 
 PROD_CERTS_FOLDER = 'prod-certs'
 PERSISTENT_PACKAGE_CACHE_DIR = '/var/lib/leapp/persistent_package_cache'
+PERSISTENT_USERSPACE_MANIFEST = '/var/lib/leapp/persistent_userspace_manifest.json'
+USERSPACE_MANIFEST_FORMAT_VERSION = 1
+USERSPACE_INPUT_PATHS = (
+    '/etc/yum.repos.d',
+    '/etc/yum/repos.d',
+    '/etc/distro.repos.d',
+    '/etc/dnf',
+    '/etc/pki',
+    '/etc/rhsm',
+)
+"""
+Paths inside the scratch container whose content affects the installation of the target userspace
+"""
 DEDICATED_LEAPP_PART_URL = 'https://access.redhat.com/solutions/7011704'
 FMT_LIST_SEPARATOR = '\n    - '
 
@@ -207,21 +223,216 @@ def _handle_transaction_err_msg_size(err):
     raise StopActorExecutionError(message=message, details=details)
 
 
+def _is_userspace_reuse_enabled():
+    return get_env('LEAPP_DEVEL_REUSE_TARGET_USERSPACE', None) == '1'
+
+
+def _update_digest_with_path(digest, root, relpath=''):
+    """
+    Update the digest with names, types and content of all files in the path tree.
+
+    :param digest: A hashlib object to update.
+    :param root: The path to the hashed tree (on the host).
+    :param relpath: The path inside of the tree, used for the recursion.
+    """
+    path = os.path.join(root, relpath) if relpath else root
+    digest.update(relpath.encode('utf-8') + b'\0')
+    if os.path.islink(path):
+        digest.update(b'l' + os.readlink(path).encode('utf-8') + b'\0')
+    elif os.path.isdir(path):
+        digest.update(b'd\0')
+        for name in sorted(os.listdir(path)):
+            _update_digest_with_path(digest, root, os.path.join(relpath, name))
+    elif os.path.isfile(path):
+        digest.update(b'f')
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    else:
+        # missing path or a special file
+        digest.update(b'-\0')
+
+
+def _get_target_userspace_inputs_digest(context, enabled_repos):
+    """
+    Compute the digest of all inputs affecting the installation of the target userspace packages.
+
+    The requested packages are not part of the digest, they are stored
+    separately in the manifest so newly requested packages can be installed
+    into an existing target userspace.
+
+    :param context: The scratch container in which the installation is executed.
+    :param enabled_repos: The list of target repoids used for the installation.
+    :return: The hex digest of the inputs.
+    """
+    digest = hashlib.sha256()
+    inputs = {
+        'target_distro': get_target_distro_id(),
+        'target_version': get_target_version(),
+        'target_product_type': get_product_type('target'),
+        'architecture': api.current_actor().configuration.architecture,
+        'enabled_repos': sorted(enabled_repos),
+        'nogpgcheck': is_nogpgcheck_set(),
+        'skip_rhsm': rhsm.skip_rhsm(),
+    }
+    digest.update(json.dumps(inputs, sort_keys=True).encode('utf-8'))
+    for path in USERSPACE_INPUT_PATHS:
+        _update_digest_with_path(digest, context.full_path(path))
+    if not is_nogpgcheck_set():
+        _update_digest_with_path(digest, get_path_to_gpg_certs())
+    return digest.hexdigest()
+
+
+def _get_target_userspace_manifest(context, userspace_dir, enabled_repos, packages):
+    """
+    Create the manifest describing the target userspace created from the given inputs.
+
+    :return: The manifest dict or None if the inputs cannot be processed.
+    """
+    try:
+        inputs_digest = _get_target_userspace_inputs_digest(context, enabled_repos)
+    except OSError as err:
+        api.current_logger().warning(
+            'Cannot compute the digest of the target userspace inputs, the userspace will not be reused: {}'
+            .format(str(err))
+        )
+        return None
+    return {
+        'format_version': USERSPACE_MANIFEST_FORMAT_VERSION,
+        'userspace_dir': userspace_dir,
+        'inputs_digest': inputs_digest,
+        'packages': sorted(packages),
+    }
+
+
+def _load_userspace_manifest():
+    try:
+        with open(PERSISTENT_USERSPACE_MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_userspace_manifest(manifest):
+    # write the manifest atomically, so an interrupted write cannot leave
+    # a partial manifest describing the existing target userspace
+    tmp_path = '{}.tmp'.format(PERSISTENT_USERSPACE_MANIFEST)
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, PERSISTENT_USERSPACE_MANIFEST)
+
+
+def _remove_userspace_manifest():
+    try:
+        os.unlink(PERSISTENT_USERSPACE_MANIFEST)
+    except FileNotFoundError:
+        pass
+
+
+def _get_reusable_userspace_packages(manifest):
+    """
+    Return packages installed in the existing target userspace if it can be reused.
+
+    The existing target userspace can be reused when it has been created from
+    the same inputs (see the manifest) and all packages installed in it
+    are still requested. New packages can be installed into it.
+
+    :param manifest: The manifest of the target userspace for the current inputs.
+    :return: Set of packages installed in the existing target userspace or
+        None if the target userspace has to be created from scratch.
+    """
+    if not manifest:
+        return None
+    stored_manifest = _load_userspace_manifest()
+    if not stored_manifest:
+        return None
+
+    reason = None
+    stored_packages = set(stored_manifest.get('packages', []))
+    if stored_manifest.get('format_version') != USERSPACE_MANIFEST_FORMAT_VERSION:
+        reason = 'the manifest format has changed'
+    elif stored_manifest.get('userspace_dir') != manifest['userspace_dir']:
+        reason = 'the path to the target userspace has changed'
+    elif not os.path.isdir(manifest['userspace_dir']):
+        reason = 'the target userspace does not exist'
+    elif stored_manifest.get('inputs_digest') != manifest['inputs_digest']:
+        reason = 'repositories, certificates, or the target system have changed'
+    elif not stored_packages.issubset(manifest['packages']):
+        reason = 'some packages are not requested anymore'
+
+    if reason:
+        api.current_logger().info('Cannot reuse the existing target userspace: {}.'.format(reason))
+        return None
+    return stored_packages
+
+
+def _reset_reused_target_userspace(userspace_dir):
+    """
+    Revert changes in the reused target userspace that cannot be applied repeatedly.
+    """
+    # The links are created again when RHSM is set into the container mode
+    for link in ('etc/rhsm-host', 'etc/pki/entitlement-host'):
+        link_path = os.path.join(userspace_dir, link)
+        if os.path.islink(link_path):
+            os.unlink(link_path)
+    # Backups left behind when the previous preparation of the repository access failed
+    for backup in ('etc/pki.backup', 'etc/yum.repos.d.backup'):
+        run(['rm', '-rf', os.path.join(userspace_dir, backup)])
+
+
 def prepare_target_userspace(context, userspace_dir, enabled_repos, packages):
     """
     Implement the creation of the target userspace.
+
+    When the LEAPP_DEVEL_REUSE_TARGET_USERSPACE envar is set to '1', the target
+    userspace created previously is reused if it has been created from the same
+    inputs. Only packages that have not been installed in it are installed then.
     """
-    _backup_to_persistent_package_cache(userspace_dir)
+    manifest = None
+    if _is_userspace_reuse_enabled():
+        manifest = _get_target_userspace_manifest(context, userspace_dir, enabled_repos, packages)
+    installed_packages = _get_reusable_userspace_packages(manifest)
+    # Remove the manifest until the target userspace is prepared successfully
+    _remove_userspace_manifest()
+
+    if installed_packages is not None:
+        missing_packages = sorted(set(packages) - installed_packages)
+        api.current_logger().info(
+            'Reusing the existing target userspace, packages to install: {}'
+            .format(', '.join(missing_packages) or 'none')
+        )
+        _reset_reused_target_userspace(userspace_dir)
+        if missing_packages:
+            _install_target_userspace_packages(
+                context, userspace_dir, enabled_repos, missing_packages, incremental=True
+            )
+    else:
+        _backup_to_persistent_package_cache(userspace_dir)
+
+        run(['rm', '-rf', userspace_dir])
+        _create_target_userspace_directories(userspace_dir)
+        _install_target_userspace_packages(context, userspace_dir, enabled_repos, packages)
+
+    if manifest:
+        _store_userspace_manifest(manifest)
 
-    run(['rm', '-rf', userspace_dir])
-    _create_target_userspace_directories(userspace_dir)
 
+def _install_target_userspace_packages(context, userspace_dir, enabled_repos, packages, incremental=False):
+    """
+    Install packages into the target userspace.
+
+    :param incremental: If True, packages are installed into an existing
+        target userspace, so the package cache is not restored and GPG keys
+        are not imported again.
+    """
     target_major_version = get_target_major_version()
     install_root_dir = '/el{}target'.format(target_major_version)
     with mounting.BindMount(source=userspace_dir, target=os.path.join(context.base_dir, install_root_dir.lstrip('/'))):
-        _restore_persistent_package_cache(userspace_dir)
-        if not is_nogpgcheck_set():
-            _import_gpg_keys(context, install_root_dir, target_major_version)
+        if not incremental:
+            _restore_persistent_package_cache(userspace_dir)
+            if not is_nogpgcheck_set():
+                _import_gpg_keys(context, install_root_dir, target_major_version)
 
         repos_opt = [['--enablerepo', repo] for repo in enabled_repos]
         repos_opt = list(itertools.chain(*repos_opt))
@@ -301,6 +512,37 @@ def _query_rpm_for_pkg_files(context, pkgs):
     return files_owned_by_rpm
 
 
+def _get_rpm_files_ownership(context, dirpath):
+    """
+    Return the mapping of files inside the dirpath tree to RPMs owning them.
+
+    All files installed by RPMs are listed by a single rpm query instead of
+    querying the owner of each file separately, which is considerably faster
+    for directories with many files (e.g. /etc/pki).
+
+    :param context: The context in which the rpm query is executed.
+    :param dirpath: Path to the directory (inside the context).
+    :return: Dict mapping absolute file paths to the set of NEVRAs of
+        the RPMs owning them.
+    """
+    cmd = ['rpm', '-qa', '--queryformat', r'[%{FILENAMES}\t%{NAME}-%{VERSION}-%{RELEASE}.%{ARCH}\n]']
+    try:
+        result = context.call(cmd, split=True)
+    except CalledProcessError as err:
+        api.current_logger().warning(
+            'Cannot get the list of files owned by rpms: {}'.format(str(err))
+        )
+        return {}
+
+    prefix = os.path.join(os.path.normpath(dirpath), '')
+    ownership = {}
+    for line in result['stdout']:
+        path, dummy_sep, nevra = line.rpartition('\t')
+        if path.startswith(prefix):
+            ownership.setdefault(path, set()).add(nevra)
+    return ownership
+
+
 def _get_files_owned_by_rpms(context, dirpath, pkgs=None, recursive=False):
     """
     Return the list of file names inside dirpath owned by RPMs.
@@ -340,13 +582,13 @@ def _get_files_owned_by_rpms(context, dirpath, pkgs=None, recursive=False):
     else:
         file_list = os.listdir(searchdir)
 
+    rpm_files_ownership = _get_rpm_files_ownership(context, dirpath)
     for fname in file_list:
-        try:
-            result = context.call(['rpm', '-qf', os.path.join(dirpath, fname)])
-        except CalledProcessError:
+        owners = rpm_files_ownership.get(os.path.join(dirpath, fname))
+        if not owners:
             api.current_logger().debug('SKIP the {} file: not owned by any rpm'.format(fname))
             continue
-        if pkgs and not [pkg for pkg in pkgs if pkg in result['stdout']]:
+        if pkgs and not [pkg for pkg in pkgs if any(pkg in owner for owner in owners)]:
             api.current_logger().debug('SKIP the {} file: not owned by any searched rpm'.format(fname))
             continue
         api.current_logger().debug('Found the file owned by an rpm: {}.'.format(fname))
@@ -362,13 +604,19 @@ def _mkdir_with_copied_mode(path, mode_from):
     :param path: The directory path to create.
     :param mode_from: A file or directory whose mode we will copy to the
         newly created directory.
-    :raises subprocess.CalledProcessError: mkdir or chmod fails. For instance,
-        the directory already exists, the file to get permissions from does
-        not exist, a parent directory does not exist.
+    :raises OSError: mkdir or chmod fails. For instance, the file to get
+        permissions from does not exist or the path exists and it is not
+        a directory.
     """
+    mode = stat.S_IMODE(os.stat(mode_from).st_mode)
     # Create with maximally restrictive permissions
-    run(['mkdir', '-m', '0', '-p', path])
-    run(['chmod', '--reference={}'.format(mode_from), path])
+    utils.makedirs(os.path.dirname(path))
+    try:
+        os.mkdir(path, 0)
+    except FileExistsError:
+        if not os.path.isdir(path):
+            raise
+    os.chmod(path, mode)
 
 
 def _choose_copy_or_link(symlink, srcdir):
@@ -496,11 +744,10 @@ def _copy_symlinks(symlinks_to_process, srcdir):
             continue
 
         if action == "copy":
-            # Note: source_path could be a directory, so '-a' or '-r' must be
-            # given to cp.
-            run(['cp', '-a', source_path, target_linkpath])
+            # Note: source_path could be a directory
+            filecopy.copy_path(source_path, target_linkpath)
         elif action == 'link':
-            run(["ln", "-s", source_path, target_linkpath])
+            os.symlink(source_path, target_linkpath)
         else:
             # This will not happen unless _copy_or_link() has a bug.
             raise RuntimeError("Programming error: _copy_or_link() returned an unknown action:{}".format(action))
@@ -518,7 +765,10 @@ def _copy_decouple(srcdir, dstdir):
 
     .. warning::
         `dstdir` must already exist.
+
+    Regular files are copied in parallel once all directories are created.
     """
+    files_to_copy = []
     for root, directories, files in os.walk(srcdir):
         # relative path from srcdir because srcdir is replaced with dstdir for
         # the copy.
@@ -555,11 +805,13 @@ def _copy_decouple(srcdir, dstdir):
                 symlinks_to_process.append((source_filepath, target_filepath))
                 continue
 
-            # Not a symlink so we can copy it now too
-            run(['cp', '-a', source_filepath, target_filepath])
+            # Not a symlink so we can copy it too
+            files_to_copy.append((source_filepath, target_filepath))
 
         _copy_symlinks(symlinks_to_process, srcdir)
 
+    filecopy.copy_files(files_to_copy)
+
 
 def _copy_certificates(context, target_userspace):
     """
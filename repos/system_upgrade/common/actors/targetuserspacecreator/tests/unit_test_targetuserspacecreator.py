@@ -1,5 +1,6 @@
 from __future__ import division, print_function
 
+import json
 import os
 import subprocess
 import sys
@@ -1317,18 +1318,27 @@ def test_perform_ok(monkeypatch, distro, cert_path):
 
 class _MockContext():
 
-    def __init__(self, base_dir, owned_by_rpms):
+    def __init__(self, base_dir, owned_by_rpms, owner='pkg-1.0-1.noarch'):
         self.base_dir = base_dir
         # list of files owned, no base_dir prefixed
         self.owned_by_rpms = owned_by_rpms
+        self.owner = owner
+        self.calls = []
 
     def full_path(self, path):
         return os.path.join(self.base_dir, os.path.abspath(path).lstrip('/'))
 
-    def call(self, cmd):
-        assert len(cmd) == 3 and cmd[0] == 'rpm' and cmd[1] == '-qf'
-        if cmd[2] in self.owned_by_rpms:
-            return {'exit_code': 0}
+    def call(self, cmd, split=False):
+        self.calls.append(cmd)
+        assert cmd[:3] == ['rpm', '-qa', '--queryformat'] and split
+        stdout = ['{}\t{}'.format(path, self.owner) for path in self.owned_by_rpms]
+        stdout.append('/usr/share/doc/unrelated\tunrelated-1.0-1.noarch')
+        return {'exit_code': 0, 'stdout': stdout}
+
+
+class _MockContextRpmFailing(_MockContext):
+
+    def call(self, cmd, split=False):
         raise CalledProcessError("Command failed with exit code 1", cmd, 1)
 
 
@@ -1345,12 +1355,43 @@ def test__get_files_owned_by_rpms(monkeypatch):
     search_dir = '/some/path'
     # output doesn't include full paths
     owned = ['fileA', 'script.sh']
-    # but the rpm -qf call happens with the full path
+    # but the rpm query output contains full paths
     owned_fullpath = [os.path.join(search_dir, f) for f in owned]
     context = _MockContext('/base/dir', owned_fullpath)
 
     out = userspacegen._get_files_owned_by_rpms(context, '/some/path', recursive=False)
     assert sorted(owned) == sorted(out)
+    # the ownership of all files is resolved by a single rpm query
+    assert len(context.calls) == 1
+
+
+@pytest.mark.parametrize('pkgs, expected_owned', (
+    (['pkg'], ['fileA', 'script.sh']),
+    (['pkg', 'other'], ['fileA', 'script.sh']),
+    (['other'], []),
+))
+def test__get_files_owned_by_rpms_pkgs_filter(monkeypatch, pkgs, expected_owned):
+    monkeypatch.setattr(os, 'listdir', lambda path: ['fileA', 'fileB.txt', 'script.sh'])
+    logger = logger_mocked()
+    monkeypatch.setattr(api, 'current_logger', logger)
+
+    context = _MockContext('/base/dir', ['/some/path/fileA', '/some/path/script.sh'])
+
+    out = userspacegen._get_files_owned_by_rpms(context, '/some/path', pkgs=pkgs)
+    assert sorted(expected_owned) == sorted(out)
+    if not expected_owned:
+        assert any('not owned by any searched rpm' in msg for msg in logger.dbgmsg)
+
+
+def test__get_files_owned_by_rpms_rpm_fails(monkeypatch):
+    monkeypatch.setattr(os, 'listdir', lambda path: ['fileA', 'script.sh'])
+    logger = logger_mocked()
+    monkeypatch.setattr(api, 'current_logger', logger)
+
+    context = _MockContextRpmFailing('/base/dir', ['/some/path/fileA'])
+
+    assert not userspacegen._get_files_owned_by_rpms(context, '/some/path')
+    assert logger.warnmsg
 
 
 def test__get_files_owned_by_rpms_recursive(monkeypatch):
@@ -1394,7 +1435,7 @@ def test__get_files_owned_by_rpms_recursive(monkeypatch):
         'ca-trust/extracted/pem/directory-hash/a94d09e5.0',
         'ca-trust/extracted/pem/directory-hash/a94d09e5.0',
     ]
-    # the rpm -qf call happens with the full path
+    # the rpm query output contains full paths
     owned_fullpath = [os.path.join(search_dir, f) for f in owned]
     context = _MockContext('/base/dir', owned_fullpath)
 
@@ -1414,6 +1455,122 @@ def test__get_files_owned_by_rpms_recursive(monkeypatch):
     assert has_dbgmsg('Found the file owned by an rpm: rpm-gpg/RPM-GPG-KEY-2.')
 
 
+def _mock_userspace_reuse(monkeypatch, tmp_path, reuse_enabled, inputs_digest='digest'):
+    userspace_dir = str(tmp_path / 'el9userspace')
+    manifest_path = str(tmp_path / 'manifest.json')
+    envars = {'LEAPP_DEVEL_REUSE_TARGET_USERSPACE': '1'} if reuse_enabled else {}
+    monkeypatch.setattr(userspacegen.api, 'current_actor', CurrentActorMocked(envars=envars))
+    monkeypatch.setattr(userspacegen.api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(userspacegen, 'PERSISTENT_USERSPACE_MANIFEST', manifest_path)
+    monkeypatch.setattr(userspacegen, '_get_target_userspace_inputs_digest', lambda *args: inputs_digest)
+    monkeypatch.setattr(userspacegen, '_backup_to_persistent_package_cache', lambda *args: None)
+    monkeypatch.setattr(userspacegen, 'run', lambda cmd: None)
+
+    installed = []
+
+    def install_mocked(context, userspace_dir, enabled_repos, packages, incremental=False):
+        installed.append((sorted(packages), incremental))
+
+    def create_dirs_mocked(userspace_dir):
+        os.makedirs(userspace_dir, exist_ok=True)
+        installed.append('created')
+
+    monkeypatch.setattr(userspacegen, '_install_target_userspace_packages', install_mocked)
+    monkeypatch.setattr(userspacegen, '_create_target_userspace_directories', create_dirs_mocked)
+    return userspace_dir, manifest_path, installed
+
+
+def test_prepare_target_userspace_reuse_disabled(monkeypatch, tmp_path):
+    userspace_dir, manifest_path, installed = _mock_userspace_reuse(monkeypatch, tmp_path, reuse_enabled=False)
+    with open(manifest_path, 'w') as f:
+        f.write('{}')
+
+    userspacegen.prepare_target_userspace(None, userspace_dir, ['repo'], ['pkgA'])
+
+    assert installed == ['created', (['pkgA'], False)]
+    assert not os.path.exists(manifest_path)
+
+
+@pytest.mark.parametrize('new_digest, new_packages, expected_installed', (
+    # nothing changed - nothing is installed
+    ('digest', ['pkgA', 'pkgB'], []),
+    # a new package is requested - just the new package is installed
+    ('digest', ['pkgA', 'pkgB', 'pkgC'], [(['pkgC'], True)]),
+    # a package is not requested anymore - create the userspace from scratch
+    ('digest', ['pkgA'], ['created', (['pkgA'], False)]),
+    # inputs changed - create the userspace from scratch
+    ('new-digest', ['pkgA', 'pkgB'], ['created', (['pkgA', 'pkgB'], False)]),
+))
+def test_prepare_target_userspace_reuse(monkeypatch, tmp_path, new_digest, new_packages, expected_installed):
+    userspace_dir, manifest_path, installed = _mock_userspace_reuse(monkeypatch, tmp_path, reuse_enabled=True)
+
+    userspacegen.prepare_target_userspace(None, userspace_dir, ['repo'], ['pkgB', 'pkgA'])
+    assert installed == ['created', (['pkgA', 'pkgB'], False)]
+    assert os.path.exists(manifest_path)
+
+    # leftovers from the previous run
+    os.makedirs(os.path.join(userspace_dir, 'etc'))
+    os.symlink('/etc/rhsm', os.path.join(userspace_dir, 'etc', 'rhsm-host'))
+
+    del installed[:]
+    monkeypatch.setattr(userspacegen, '_get_target_userspace_inputs_digest', lambda *args: new_digest)
+    userspacegen.prepare_target_userspace(None, userspace_dir, ['repo'], new_packages)
+
+    assert installed == expected_installed
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    assert manifest['inputs_digest'] == new_digest
+    assert manifest['packages'] == sorted(new_packages)
+    if 'created' not in expected_installed:
+        assert not os.path.lexists(os.path.join(userspace_dir, 'etc', 'rhsm-host'))
+
+
+def test_prepare_target_userspace_reuse_missing_userspace(monkeypatch, tmp_path):
+    userspace_dir, manifest_path, installed = _mock_userspace_reuse(monkeypatch, tmp_path, reuse_enabled=True)
+    userspacegen.prepare_target_userspace(None, userspace_dir, ['repo'], ['pkgA'])
+    os.rmdir(userspace_dir)
+
+    del installed[:]
+    userspacegen.prepare_target_userspace(None, userspace_dir, ['repo'], ['pkgA'])
+
+    assert installed == ['created', (['pkgA'], False)]
+
+
+def test_store_userspace_manifest_interrupted(monkeypatch, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    monkeypatch.setattr(userspacegen, 'PERSISTENT_USERSPACE_MANIFEST', manifest_path)
+    userspacegen._store_userspace_manifest({'packages': ['pkgA']})
+
+    def dump_interrupted(obj, f):
+        f.write('{"packages": [')
+        raise KeyboardInterrupt()
+
+    monkeypatch.setattr(userspacegen.json, 'dump', dump_interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        userspacegen._store_userspace_manifest({'packages': ['pkgA', 'pkgB']})
+
+    # the previously stored manifest is kept untouched
+    with open(manifest_path) as f:
+        assert json.load(f) == {'packages': ['pkgA']}
+
+
+def test_get_target_userspace_inputs_digest(monkeypatch, tmp_path):
+    monkeypatch.setattr(userspacegen.api, 'current_actor', CurrentActorMocked())
+    monkeypatch.setattr(userspacegen, 'is_nogpgcheck_set', lambda: True)
+    monkeypatch.setattr(userspacegen.rhsm, 'skip_rhsm', lambda: True)
+    repofile = tmp_path / 'etc' / 'yum.repos.d' / 'test.repo'
+    repofile.parent.mkdir(parents=True)
+    repofile.write_text('[repo]')
+    context = _MockContext(str(tmp_path), [])
+
+    digest = userspacegen._get_target_userspace_inputs_digest(context, ['repoA', 'repoB'])
+    assert digest == userspacegen._get_target_userspace_inputs_digest(context, ['repoB', 'repoA'])
+    assert digest != userspacegen._get_target_userspace_inputs_digest(context, ['repoA'])
+
+    repofile.write_text('[repo]\nenabled=0')
+    assert digest != userspacegen._get_target_userspace_inputs_digest(context, ['repoA', 'repoB'])
+
+
 def test_writing_stream_varfile(monkeypatch):
 
     monkeypatch.setattr(userspacegen.api, 'current_actor', CurrentActorMocked())
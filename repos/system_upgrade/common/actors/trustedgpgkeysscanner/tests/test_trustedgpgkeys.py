@@ -1,5 +1,3 @@
-import os
-
 from leapp import reporting
 from leapp.libraries.actor import trustedgpgkeys
 from leapp.libraries.common.gpg import get_pubkeys_from_rpms
@@ -32,20 +30,6 @@ def _get_test_installed_rmps(fps):
     return InstalledRPM(items=rpms)
 
 
-class MockedGetGpgFromFile:
-    def __init__(self, file_fps_tuples):
-        # e.g. file_fps_tuple = [('/mydir/myfile', ['0000ff31', '0000ff32'])]
-        self._data = {}
-        for fname, fps in file_fps_tuples:
-            self._data[fname] = fps
-
-    def get_files(self):
-        return self._data.keys()
-
-    def __call__(self, fname):
-        return self._data.get(fname, [])
-
-
 def test_get_pubkeys(monkeypatch):
     """
     Very basic test of _get_pubkeys function
@@ -53,14 +37,14 @@ def test_get_pubkeys(monkeypatch):
     rpm_fps = ['9570ff31', '99900000']
     file_fps = ['0000ff31', '0000ff32']
     installed_rpms = _get_test_installed_rmps(rpm_fps)
-    mocked_gpg_files = MockedGetGpgFromFile([('/mydir/myfile', ['0000ff31', '0000ff32'])])
+    file_fps_tuples = [('/mydir/myfile', ['0000ff31', '0000ff32'])]
 
-    def _mocked_listdir(dummy):
-        return [os.path.basename(i) for i in mocked_gpg_files.get_files()]
+    def _mocked_get_gpg_fps_from_dir(dir_path):
+        assert dir_path == '/mydir/'
+        return file_fps_tuples
 
-    monkeypatch.setattr(trustedgpgkeys.os, 'listdir', _mocked_listdir)
     monkeypatch.setattr(trustedgpgkeys, 'get_path_to_gpg_certs', lambda: '/mydir/')
-    monkeypatch.setattr(trustedgpgkeys, 'get_gpg_fp_from_file', mocked_gpg_files)
+    monkeypatch.setattr(trustedgpgkeys, 'get_gpg_fps_from_dir', _mocked_get_gpg_fps_from_dir)
 
     pubkeys = trustedgpgkeys._get_pubkeys(installed_rpms)
     assert len(pubkeys) == len(rpm_fps + file_fps)
@@ -0,0 +1,364 @@
+"""
+Snapshot of boot loader entries shared by actors.
+
+Several actors need to know the boot entries or the default boot entry and
+each call of grubby forks a shell script which parses all BLS snippets and
+the grubenv again. The snapshot is taken by parsing BLS snippets in
+/boot/loader/entries and the grubenv (or the zipl configuration on s390x)
+directly, in the same way as grubby does. When these files cannot be
+parsed or BLS is not enabled in /etc/default/grub (the legacy grubby reads
+grub.cfg then), grubby is used instead. The snapshot is stored in a cache file and
+reused by other actors (each actor runs in its own process) as long as the
+boot loader configuration stays the same during the leapp execution.
+
+Call :func:`invalidate` after modifying boot entries (e.g. by grubby).
+"""
+import json
+import os
+import re
+from collections import namedtuple
+
+from leapp.libraries import stdlib
+from leapp.libraries.common.config import architecture
+from leapp.libraries.stdlib import api
+
+BOOT_ENTRIES_SNAPSHOT_PATH = '/var/lib/leapp/boot_entries_snapshot.json'
+BOOT_ENTRIES_SNAPSHOT_FORMAT_VERSION = 1
+
+BLS_ENTRIES_DIR = '/boot/loader/entries'
+GRUBENV_PATH = '/boot/grub2/grubenv'
+ZIPL_CONFIG_PATH = '/etc/zipl.conf'
+DEFAULT_GRUB_PATH = '/etc/default/grub'
+
+BootEntry = namedtuple('BootEntry', ('index', 'id', 'title', 'kernel', 'args', 'root', 'initrd'))
+"""
+Boot loader entry as reported by `grubby --info`
+
+The `args` are kernel arguments without the `root` argument. The `initrd`
+can contain more space separated paths or unexpanded grubenv variables
+(e.g. `$tuned_initrd`). Values missing in the entry are empty strings.
+"""
+
+_SNAPSHOT_CACHE = {}
+"""The snapshot loaded in the current process (under the 'key' and 'data' keys)"""
+
+_VARIABLE_RE = re.compile(r'\$(?:\{(\w+)\}|(\w+))')
+
+
+class _CannotParseEntries(Exception):
+    """
+    The boot entries cannot be parsed directly, grubby has to be used
+    """
+
+
+def _get_paths_state(paths):
+    """
+    Get names, sizes and modification times of the given files and files in the given directories.
+
+    :return: Sorted list of [path, size, mtime_ns] lists.
+    """
+    state = []
+    for root_path in paths:
+        if os.path.isdir(root_path):
+            paths_to_stat = [os.path.join(root_path, name) for name in os.listdir(root_path)]
+        else:
+            paths_to_stat = [root_path]
+        for path in paths_to_stat:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            state.append([path, st.st_size, st.st_mtime_ns])
+    return sorted(state)
+
+
+def _is_zipl():
+    return architecture.matches_architecture(architecture.ARCH_S390X)
+
+
+def _get_path_prefix():
+    """
+    Get the prefix of paths in BLS snippets, grubby prefixes them with /boot when it is a separate partition
+    """
+    if not _is_zipl() and os.path.ismount('/boot'):
+        return '/boot'
+    return ''
+
+
+def _get_snapshot_key():
+    """
+    Get the key identifying input data of the snapshot.
+
+    The snapshot is valid only during the leapp execution it has been taken
+    in and until the boot loader configuration changes.
+    """
+    return {
+        'format_version': BOOT_ENTRIES_SNAPSHOT_FORMAT_VERSION,
+        'execution_id': os.environ.get('LEAPP_EXECUTION_ID'),
+        'path_prefix': _get_path_prefix(),
+        'inputs': _get_paths_state((BLS_ENTRIES_DIR, GRUBENV_PATH, ZIPL_CONFIG_PATH, DEFAULT_GRUB_PATH)),
+    }
+
+
+def _read_key_value_file(path, separator):
+    """
+    Read `key<separator>value` lines of the file, comments and lines without the separator are skipped
+
+    :return: Dict of keys and values, values of repeated keys are joined by a space
+    """
+    values = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            key, sep, value = line.partition(separator)
+            if not sep:
+                continue
+            key = key.strip()
+            value = value.strip()
+            values[key] = '{} {}'.format(values[key], value) if key in values else value
+    return values
+
+
+def _version_sort_key(value):
+    """
+    Sort key comparing numbers in the value numerically, like `sort -V`
+    """
+    return [int(part) if i % 2 else part for i, part in enumerate(re.split(r'(\d+)', value))]
+
+
+def _expand_variables(value, variables):
+    """
+    Expand $name and ${name} variables in the value, unknown variables are expanded to an empty string
+    """
+    return _VARIABLE_RE.sub(lambda match: variables.get(match.group(1) or match.group(2), ''), value)
+
+
+def _split_root(options):
+    root = ''
+    args = []
+    for option in options.split():
+        if option.startswith('root='):
+            root = option[len('root='):]
+        else:
+            args.append(option)
+    return root, ' '.join(args)
+
+
+def _get_default_index(entries, default):
+    """
+    Find the index of the default entry in the same way as grubby does
+
+    :param default: The saved_entry from grubenv or the default from the zipl configuration
+    :return: The index of the default entry or None if it cannot be found
+    """
+    if not default:
+        return 0 if entries else None
+    if default.isdigit():
+        index = int(default)
+        return index if index < len(entries) else None
+    for entry in entries:
+        if default in (entry[1], entry[2]):
+            return entry[0]
+    return None
+
+
+def _is_blscfg_enabled():
+    """
+    Check if GRUB_ENABLE_BLSCFG is true in /etc/default/grub, like grub.is_blscfg_enabled_in_defaultgrub does
+    """
+    default_grub = _read_key_value_file(DEFAULT_GRUB_PATH, '=')
+    return _strip_quotes(default_grub.get('GRUB_ENABLE_BLSCFG', '')) == 'true'
+
+
+def _parse_bls_entries():
+    """
+    Parse BLS snippets and the default entry directly from the boot loader configuration.
+
+    :raises _CannotParseEntries: when grubby is needed to get the entries
+    """
+    try:
+        # zipl always uses BLS snippets, GRUB uses them only when enabled,
+        # otherwise the snippets can be stale and grubby reads grub.cfg
+        if not _is_zipl() and not _is_blscfg_enabled():
+            raise _CannotParseEntries('BLS is not enabled in {}'.format(DEFAULT_GRUB_PATH))
+        names = [name[:-len('.conf')] for name in os.listdir(BLS_ENTRIES_DIR) if name.endswith('.conf')]
+        if _is_zipl():
+            default = _read_key_value_file(ZIPL_CONFIG_PATH, '=').get('default')
+            variables = {}
+        else:
+            grubenv = _read_key_value_file(GRUBENV_PATH, '=')
+            default = grubenv.get('saved_entry')
+            variables = grubenv
+        snippets = [(name, _read_key_value_file(os.path.join(BLS_ENTRIES_DIR, name + '.conf'), ' '))
+                    for name in sorted(names, key=_version_sort_key, reverse=True)]
+    except (OSError, UnicodeDecodeError) as e:
+        raise _CannotParseEntries('Cannot read the boot loader configuration: {}'.format(e))
+
+    if not snippets:
+        raise _CannotParseEntries('No BLS snippets found in {}'.format(BLS_ENTRIES_DIR))
+
+    prefix = _get_path_prefix()
+    entries = []
+    for index, (entry_id, snippet) in enumerate(snippets):
+        kernel = prefix + snippet.get('linux', '')
+        if not os.path.exists(kernel):
+            raise _CannotParseEntries('The kernel {} of the BLS snippet {} does not exist'.format(kernel, entry_id))
+        root, args = _split_root(_expand_variables(snippet.get('options', ''), variables))
+        # grubenv variables (e.g. $tuned_initrd) are kept unexpanded as grubby does
+        initrd = ' '.join(prefix + path if path.startswith('/') else path
+                          for path in snippet.get('initrd', '').split())
+        entries.append([index, entry_id, snippet.get('title', ''), kernel, args, root, initrd])
+
+    default_index = _get_default_index(entries, default)
+    if default_index is None:
+        raise _CannotParseEntries('Cannot find the default boot entry {}'.format(default))
+    return {'entries': entries, 'default_index': default_index}
+
+
+def _strip_quotes(value):
+    return re.match(r'^([\'"]?)(.*)\1$', value).group(2)
+
+
+def parse_grubby_info(output):
+    """
+    Parse the output of `grubby --info`.
+
+    :param output: The output of the `grubby --info` command
+    :type output: str
+    :return: Entries in the order of the output
+    :rtype: list(BootEntry)
+    """
+    records = []
+    for line in output.splitlines():
+        key, sep, value = line.partition('=')
+        if not sep:
+            continue
+        if key == 'index':
+            records.append({'index': int(value) if value.isdigit() else value})
+        elif records:
+            records[-1][key] = _strip_quotes(value)
+    return [BootEntry(*[record.get(field, '') for field in BootEntry._fields]) for record in records]
+
+
+def _get_grubby_entries():
+    """
+    Get the entries and the default entry from grubby.
+
+    :raises CalledProcessError: when grubby fails
+    :raises OSError: when grubby is not installed
+    """
+    entries = parse_grubby_info(stdlib.run(['grubby', '--info', 'ALL'], split=False)['stdout'])
+    default_index = stdlib.run(['grubby', '--default-index'], split=False)['stdout'].strip()
+    return {
+        'entries': [list(entry) for entry in entries],
+        'default_index': int(default_index) if default_index.isdigit() else None,
+    }
+
+
+def _create_snapshot():
+    try:
+        return _parse_bls_entries()
+    except _CannotParseEntries as e:
+        api.current_logger().debug('Using grubby to get boot entries: {}'.format(e))
+    return _get_grubby_entries()
+
+
+def _load_snapshot(key):
+    try:
+        with open(BOOT_ENTRIES_SNAPSHOT_PATH) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(stored, dict) or stored.get('key') != key:
+        return None
+    return stored.get('data')
+
+
+def _store_snapshot(key, data):
+    tmp_path = BOOT_ENTRIES_SNAPSHOT_PATH + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': key, 'data': data}, f, separators=(',', ':'))
+        os.rename(tmp_path, BOOT_ENTRIES_SNAPSHOT_PATH)
+    except OSError as e:
+        api.current_logger().warning(
+            'Cannot store the boot entries snapshot into {}: {}'.format(BOOT_ENTRIES_SNAPSHOT_PATH, e)
+        )
+
+
+def get_snapshot():
+    """
+    Get the snapshot of boot entries, take it if it does not exist or it is outdated.
+
+    :returns: Dict with the 'entries' list and the 'default_index' (None if unknown)
+    :rtype: dict
+    :raises CalledProcessError: when grubby is used and fails
+    :raises OSError: when grubby is used and it is not installed
+    """
+    key = _get_snapshot_key()
+    if _SNAPSHOT_CACHE.get('key') == key:
+        return _SNAPSHOT_CACHE['data']
+
+    data = _load_snapshot(key)
+    if data is None:
+        api.current_logger().debug('Taking a new snapshot of boot entries.')
+        data = _create_snapshot()
+        _store_snapshot(key, data)
+    _SNAPSHOT_CACHE.update(key=key, data=data)
+    return data
+
+
+def invalidate():
+    """
+    Drop the snapshot, call it after the boot entries have been modified.
+    """
+    _SNAPSHOT_CACHE.clear()
+    try:
+        os.unlink(BOOT_ENTRIES_SNAPSHOT_PATH)
+    except OSError:
+        pass
+
+
+def get_boot_entries():
+    """
+    Get all boot loader entries ordered by their index.
+
+    :rtype: list(BootEntry)
+
+    .. seealso::
+        :func:`get_snapshot` for exceptions raised when taking the snapshot
+    """
+    return [BootEntry(*entry) for entry in get_snapshot()['entries']]
+
+
+def get_kernel_boot_entries(kernel_path):
+    """
+    Get boot loader entries of the given kernel, like `grubby --info <kernel_path>`.
+
+    :param kernel_path: Path to the kernel image, e.g. /boot/vmlinuz-5.14.0-427.el9.x86_64
+    :type kernel_path: str
+    :rtype: list(BootEntry)
+
+    .. seealso::
+        :func:`get_snapshot` for exceptions raised when taking the snapshot
+    """
+    return [entry for entry in get_boot_entries() if entry.kernel == kernel_path]
+
+
+def get_default_boot_entry():
+    """
+    Get the default boot loader entry.
+
+    :returns: The default entry or None if it cannot be determined
+    :rtype: BootEntry or None
+
+    .. seealso::
+        :func:`get_snapshot` for exceptions raised when taking the snapshot
+    """
+    snapshot = get_snapshot()
+    for entry in snapshot['entries']:
+        if entry[0] == snapshot['default_index']:
+            return BootEntry(*entry)
+    return None
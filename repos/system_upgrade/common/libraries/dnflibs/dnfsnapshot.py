@@ -0,0 +1,239 @@
+"""
+Snapshot of the DNF data about the source system shared by actors.
+
+Loading of the rpmdb, repositories and module metadata into dnf.Base is
+expensive and several actors need just a small subset of it: repositories
+the installed packages come from, module streams and installed comps groups
+and environments. The snapshot of these data is taken once, stored in
+a cache file and reused by other actors (each actor runs in its own process)
+as long as the rpmdb, the DNF history and the DNF configuration stay the same
+during the leapp execution.
+"""
+import json
+import os
+import warnings
+from collections import namedtuple
+
+from leapp.exceptions import StopActorExecutionError
+from leapp.libraries.common.dnflibs import create_dnf_base, dnfmodule
+from leapp.libraries.stdlib import api
+
+try:
+    import dnf
+except ImportError:
+    dnf = None
+    warnings.warn('Could not import the `dnf` python module.', ImportWarning)
+
+DNF_SNAPSHOT_PATH = '/var/lib/leapp/dnf_snapshot.json'
+DNF_SNAPSHOT_FORMAT_VERSION = 1
+
+DNF_SNAPSHOT_INPUT_PATHS = ('/var/lib/rpm', '/var/lib/dnf', '/etc/dnf', '/etc/yum.repos.d')
+"""
+Paths the snapshot depends on: rpmdb, DNF history and DNF configuration (including repositories)
+"""
+
+_VOLATILE_FILE_SUFFIXES = ('-shm', '.lock')
+_VOLATILE_FILE_PREFIXES = ('__db.',)
+"""
+Files changed even by read-only access to the databases (e.g. Berkeley DB
+environment files of rpmdb or shared memory files of SQLite), ignored in
+the snapshot key
+"""
+
+ModuleStream = namedtuple('ModuleStream', ('name', 'stream', 'enabled', 'artifacts'))
+"""
+Module stream known to DNF, artifacts are NEVRA strings of packages of the module stream
+"""
+
+CompsEntry = namedtuple('CompsEntry', ('id', 'name'))
+"""
+Installed comps group or environment
+"""
+
+_EMPTY_SNAPSHOT = {
+    'installed_packages_repositories': {},
+    'module_streams': [],
+    'comps_groups': [],
+    'comps_environments': [],
+}
+
+_SNAPSHOT_CACHE = {}
+"""The snapshot loaded in the current process (under the 'key' and 'data' keys)"""
+
+
+def _get_paths_state(paths):
+    """
+    Get names, sizes and modification times of all files in the given path trees.
+
+    :return: Sorted list of [path, size, mtime_ns] lists.
+    """
+    state = []
+    for root_path in paths:
+        for root, dummy_dirs, filenames in os.walk(root_path):
+            for filename in filenames:
+                if filename.endswith(_VOLATILE_FILE_SUFFIXES) or filename.startswith(_VOLATILE_FILE_PREFIXES):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    # e.g. a broken symlink or a file removed in the meanwhile
+                    continue
+                state.append([path, st.st_size, st.st_mtime_ns])
+    return sorted(state)
+
+
+def _get_snapshot_key():
+    """
+    Get the key identifying input data of the snapshot.
+
+    The snapshot is valid only during the leapp execution it has been taken
+    in and until the rpmdb, the DNF history or the DNF configuration change.
+    """
+    return {
+        'format_version': DNF_SNAPSHOT_FORMAT_VERSION,
+        'execution_id': os.environ.get('LEAPP_EXECUTION_ID'),
+        'inputs': _get_paths_state(DNF_SNAPSHOT_INPUT_PATHS),
+    }
+
+
+def _get_installed_packages_repositories(base):
+    pkg_repos = {}
+    try:
+        for pkg in base.sack.query().installed():
+            pkg_repos[pkg.name] = pkg._from_repo.lstrip('@')
+    except ValueError as e:
+        if 'locale' not in str(e):  # reraise if error is not related to locales
+            raise e
+        raise StopActorExecutionError(
+            message='Failed to get installed RPM packages because of an invalid locale',
+            details={
+                'hint': 'Please run leapp with a valid locale. ' +
+                        'You can get a list of installed locales by running `locale -a`.'
+            })
+    return pkg_repos
+
+
+def _get_module_streams(base):
+    modules = dnfmodule.get_modules(base)
+    # if modules are not supported, base.sack._moduleContainer won't exist
+    # luckily in that case modules are empty and the element won't even be accessed
+    return [
+        [module.getName(), module.getStream(), bool(base.sack._moduleContainer.isEnabled(module)),
+         list(module.getArtifacts())]
+        for module in modules
+    ]
+
+
+def _get_installed_comps(comps_iter, history_lookup):
+    return sorted([entry.id, entry.ui_name] for entry in comps_iter if history_lookup.get(entry.id))
+
+
+def _create_snapshot():
+    """
+    Collect the snapshot data from a newly created dnf.Base.
+
+    .. seealso::
+        :func:`leapp.libraries.common.dnflibs.create_dnf_base` for exceptions raised when creating dnf.Base
+    """
+    base = create_dnf_base()
+    return {
+        'installed_packages_repositories': _get_installed_packages_repositories(base),
+        'module_streams': _get_module_streams(base),
+        'comps_groups': _get_installed_comps(base.comps.groups_iter(), base.history.group),
+        'comps_environments': _get_installed_comps(base.comps.environments_iter(), base.history.env),
+    }
+
+
+def _load_snapshot(key):
+    try:
+        with open(DNF_SNAPSHOT_PATH) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(stored, dict) or stored.get('key') != key:
+        return None
+    return stored.get('data')
+
+
+def _store_snapshot(key, data):
+    tmp_path = DNF_SNAPSHOT_PATH + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': key, 'data': data}, f, separators=(',', ':'))
+        os.rename(tmp_path, DNF_SNAPSHOT_PATH)
+    except OSError as e:
+        api.current_logger().warning('Cannot store the DNF snapshot into {}: {}'.format(DNF_SNAPSHOT_PATH, e))
+
+
+def get_snapshot():
+    """
+    Get the snapshot of DNF data, take it if it does not exist or it is outdated.
+
+    The snapshot is empty if the DNF python module is not present.
+
+    :returns: The snapshot data, see :func:`_create_snapshot`
+    :rtype: dict
+
+    .. seealso::
+        :func:`leapp.libraries.common.dnflibs.create_dnf_base` for exceptions raised when creating dnf.Base
+    """
+    if not dnf:
+        return _EMPTY_SNAPSHOT
+
+    key = _get_snapshot_key()
+    if _SNAPSHOT_CACHE.get('key') == key:
+        return _SNAPSHOT_CACHE['data']
+
+    data = _load_snapshot(key)
+    if data is None:
+        api.current_logger().debug('Taking a new snapshot of DNF data.')
+        data = _create_snapshot()
+        # the creation of dnf.Base could touch some of the input files
+        key = _get_snapshot_key()
+        _store_snapshot(key, data)
+    else:
+        api.current_logger().debug('Using the DNF snapshot stored in {}.'.format(DNF_SNAPSHOT_PATH))
+    _SNAPSHOT_CACHE.update(key=key, data=data)
+    return data
+
+
+def get_installed_packages_repositories():
+    """
+    Get repositories the installed packages have been installed from.
+
+    :returns: Mapping of package names to repository ids
+    :rtype: dict
+
+    .. seealso::
+        :func:`get_snapshot` for exceptions raised when taking the snapshot
+    """
+    return dict(get_snapshot()['installed_packages_repositories'])
+
+
+def get_module_streams():
+    """
+    Get all module streams known to DNF on the source system.
+
+    :rtype: List[ModuleStream]
+
+    .. seealso::
+        :func:`get_snapshot` for exceptions raised when taking the snapshot
+    """
+    return [ModuleStream(name, stream, enabled, list(artifacts))
+            for name, stream, enabled, artifacts in get_snapshot()['module_streams']]
+
+
+def get_installed_comps():
+    """
+    Get installed comps groups and environments sorted by their ids.
+
+    :returns: Tuple of lists of installed groups and installed environments
+    :rtype: Tuple[List[CompsEntry], List[CompsEntry]]
+
+    .. seealso::
+        :func:`get_snapshot` for exceptions raised when taking the snapshot
+    """
+    snapshot = get_snapshot()
+    return ([CompsEntry(*entry) for entry in snapshot['comps_groups']],
+            [CompsEntry(*entry) for entry in snapshot['comps_environments']])
@@ -1,5 +1,10 @@
+import binascii
+import errno
 import os
 import re
+import struct
+import uuid
+from collections import namedtuple
 
 from leapp.libraries.common.partitions import (
     _get_partition_for_dir,
@@ -13,6 +18,26 @@ EFI_MOUNTPOINT = '/boot/efi/'
 """The path to the required mountpoint for ESP."""
 
 
+EFIVARS_DIR = '/sys/firmware/efi/efivars'
+"""The mountpoint of efivarfs with UEFI variables."""
+
+EFI_GLOBAL_VARIABLE_GUID = '8be4df61-93ca-11d2-aa0d-00e098032b8c'
+LOAD_OPTION_ACTIVE = 0x00000001
+
+EFIBootVariables = namedtuple('EFIBootVariables', ('current_bootnum', 'next_bootnum', 'boot_order', 'entries'))
+"""
+UEFI boot manager variables
+
+Boot numbers are strings of 4 hexadecimal digits, e.g. '0001'. The boot_order
+is a tuple of boot numbers and the entries is a tuple of (boot_number, label,
+active, efi_bin_source) tuples, see :class:`EFIBootLoaderEntry`. Variables
+which are not set are None.
+"""
+
+_BOOT_VARIABLES_CACHE = {}
+"""The boot manager variables loaded in the current process (under the 'data' key)"""
+
+
 class EFIError(Exception):
     """
     Exception raised when EFI operation failed.
@@ -105,6 +130,194 @@ class EFIBootLoaderEntry:
         return EFIBootLoaderEntry._efi_path_to_canonical(match.groups('path')[0])
 
 
+def _read_efi_variable(name):
+    """
+    Read the value of the global UEFI variable from efivarfs.
+
+    :return: The value without the leading attributes or None if the variable does not exist
+    :rtype: bytes or None
+    """
+    path = os.path.join(EFIVARS_DIR, '{}-{}'.format(name, EFI_GLOBAL_VARIABLE_GUID))
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            return None
+        raise
+    # the value is prefixed by 4 bytes of UEFI variable attributes
+    return data[4:]
+
+
+def _bootnum_from_uint16(data):
+    return '{:04X}'.format(struct.unpack('<H', data)[0])
+
+
+def _device_path_node_to_text(node_type, subtype, data):
+    if (node_type, subtype) == (4, 1):
+        # hard drive media device path
+        part_number, part_start, part_size, signature, dummy_mbr_type, signature_type = struct.unpack(
+            '<IQQ16sBB', data
+        )
+        if signature_type == 2:
+            return 'HD({},GPT,{},0x{:x},0x{:x})'.format(
+                part_number, uuid.UUID(bytes_le=signature), part_start, part_size
+            )
+        if signature_type == 1:
+            return 'HD({},MBR,0x{:x},0x{:x},0x{:x})'.format(
+                part_number, struct.unpack('<I', signature[:4])[0], part_start, part_size
+            )
+    elif (node_type, subtype) == (4, 4):
+        # file path media device path
+        return 'File({})'.format(data.decode('utf-16-le').rstrip('\0'))
+    elif (node_type, subtype) in ((1, 4), (4, 3)):
+        # vendor-defined hardware and media device paths
+        name = 'VenHw' if node_type == 1 else 'VenMedia'
+        vendor_data = ',{}'.format(binascii.hexlify(data[16:]).decode()) if data[16:] else ''
+        return '{}({}{})'.format(name, uuid.UUID(bytes_le=data[:16]), vendor_data)
+    # generic text representation of device path nodes defined by the UEFI specification
+    return 'Path({},{},{})'.format(node_type, subtype, binascii.hexlify(data).decode())
+
+
+def _device_path_to_text(data):
+    """
+    Convert the binary UEFI device path to the text representation.
+
+    Hard drive and file path nodes are represented in the same way as by
+    efibootmgr, other nodes could be represented differently. Only the first
+    instance of a multi-instance device path is converted.
+    """
+    nodes = []
+    offset = 0
+    while offset + 4 <= len(data):
+        node_type, subtype, length = struct.unpack_from('<BBH', data, offset)
+        if length < 4 or offset + length > len(data):
+            raise ValueError('Invalid length of the device path node at offset {}'.format(offset))
+        if node_type == 0x7f:
+            # end of the device path (instance)
+            break
+        nodes.append(_device_path_node_to_text(node_type, subtype, data[offset + 4:offset + length]))
+        offset += length
+    return '/'.join(nodes)
+
+
+def _parse_load_option(data):
+    """
+    Parse the EFI_LOAD_OPTION stored in a Boot#### variable.
+
+    :return: Tuple of the label, whether the entry is active and the text representation of the device path
+    """
+    attributes, path_length = struct.unpack_from('<IH', data, 0)
+    label_end = 6
+    while data[label_end:label_end + 2] != b'\0\0':
+        if label_end + 2 > len(data):
+            raise ValueError('The label of the load option is not terminated')
+        label_end += 2
+    label = data[6:label_end].decode('utf-16-le')
+    path_start = label_end + 2
+    path = _device_path_to_text(data[path_start:path_start + path_length])
+    return label, bool(attributes & LOAD_OPTION_ACTIVE), path
+
+
+def _read_efivarfs_boot_variables():
+    """
+    Read the boot manager variables directly from efivarfs.
+    """
+    suffix = '-' + EFI_GLOBAL_VARIABLE_GUID
+    entries = []
+    for filename in sorted(os.listdir(EFIVARS_DIR)):
+        name = filename[:-len(suffix)]
+        if not filename.endswith(suffix) or not re.match(r'^Boot[0-9A-F]{4}$', name):
+            continue
+        data = _read_efi_variable(name)
+        if data is not None:
+            entries.append((name[len('Boot'):],) + _parse_load_option(data))
+
+    current = _read_efi_variable('BootCurrent')
+    next_ = _read_efi_variable('BootNext')
+    order = _read_efi_variable('BootOrder')
+    if order is not None:
+        order = tuple(_bootnum_from_uint16(order[i:i + 2]) for i in range(0, len(order), 2))
+    return EFIBootVariables(
+        current_bootnum=_bootnum_from_uint16(current) if current else None,
+        next_bootnum=_bootnum_from_uint16(next_) if next_ else None,
+        boot_order=order,
+        entries=tuple(entries),
+    )
+
+
+def _parse_efibootmgr_output(bootmgr_output):
+    """
+    Parse the output of `efibootmgr -v`.
+    """
+    entries = []
+    regexp_entry = re.compile(
+        r"^Boot(?P<bootnum>[a-zA-Z0-9]+)(?P<active>\*?)\s*(?P<label>.*?)\t(?P<bin_source>.*)$"
+    )
+    values = {}
+    for line in bootmgr_output.splitlines():
+        match = regexp_entry.match(line)
+        if match:
+            entries.append((
+                match.group('bootnum'),
+                match.group('label'),
+                '*' in match.group('active'),
+                match.group('bin_source'),
+            ))
+        elif ':' in line:
+            # e.g.: BootCurrent: 0002
+            key, value = line.split(':', 1)
+            values.setdefault(key, value.strip())
+
+    boot_order = values.get('BootOrder')
+    return EFIBootVariables(
+        current_bootnum=values.get('BootCurrent'),
+        next_bootnum=values.get('BootNext'),
+        boot_order=tuple(boot_order.split(',')) if boot_order is not None else None,
+        entries=tuple(entries),
+    )
+
+
+def get_boot_variables():
+    """
+    Get the UEFI boot manager variables.
+
+    The variables are read directly from efivarfs, efibootmgr is used when
+    efivarfs is not available. The result is cached in the current process,
+    see :func:`invalidate_boot_variables`.
+
+    :rtype: EFIBootVariables
+    :raises EFIError: when unable to obtain the variables
+    """
+    if 'data' in _BOOT_VARIABLES_CACHE:
+        return _BOOT_VARIABLES_CACHE['data']
+
+    boot_variables = None
+    if os.path.isdir(EFIVARS_DIR):
+        try:
+            boot_variables = _read_efivarfs_boot_variables()
+        except (OSError, ValueError, struct.error) as e:
+            api.current_logger().debug('Cannot read UEFI variables from {}: {}'.format(EFIVARS_DIR, e))
+        if boot_variables is not None and not boot_variables.entries:
+            boot_variables = None
+    if boot_variables is None:
+        try:
+            result = run(['/usr/sbin/efibootmgr', '-v'])
+        except CalledProcessError:
+            raise EFIError('Unable to get information about UEFI boot entries.')
+        boot_variables = _parse_efibootmgr_output(result['stdout'])
+
+    _BOOT_VARIABLES_CACHE['data'] = boot_variables
+    return boot_variables
+
+
+def invalidate_boot_variables():
+    """
+    Drop the cached UEFI boot manager variables, call it after they have been modified.
+    """
+    _BOOT_VARIABLES_CACHE.clear()
+
+
 class EFIBootInfo:
     """
     Data about the current UEFI boot configuration.
@@ -116,81 +329,29 @@ class EFIBootInfo:
     def __init__(self):
         if not is_efi():
             raise EFIError('Unable to collect data about UEFI on a BIOS system.')
-        try:
-            result = run(['/usr/sbin/efibootmgr', '-v'])
-        except CalledProcessError:
-            raise EFIError('Unable to get information about UEFI boot entries.')
 
-        bootmgr_output = result['stdout']
+        boot_variables = get_boot_variables()
 
-        self.current_bootnum = None
+        self.current_bootnum = boot_variables.current_bootnum
         """The boot number (str) of the current boot."""
-        self.next_bootnum = None
+        self.next_bootnum = boot_variables.next_bootnum
         """The boot number (str) of the next boot."""
-        self.boot_order = tuple()
+        self.boot_order = boot_variables.boot_order
         """The tuple of the UEFI boot loader entries in the boot order."""
-        self.entries = {}
+        self.entries = {
+            boot_number: EFIBootLoaderEntry(boot_number, label, active, efi_bin_source)
+            for boot_number, label, active, efi_bin_source in boot_variables.entries
+        }
         """The UEFI boot loader entries {'boot_number': EFIBootLoaderEntry}"""
 
-        self._parse_efi_boot_entries(bootmgr_output)
-        self._parse_current_bootnum(bootmgr_output)
-        self._parse_next_bootnum(bootmgr_output)
-        self._parse_boot_order(bootmgr_output)
-        self._print_loaded_info()
-
-    def _parse_efi_boot_entries(self, bootmgr_output):
-        """
-        Return dict of UEFI boot loader entries: {"<boot_number>": EFIBootLoader}
-        """
-
-        self.entries = {}
-        regexp_entry = re.compile(
-            r"^Boot(?P<bootnum>[a-zA-Z0-9]+)(?P<active>\*?)\s*(?P<label>.*?)\t(?P<bin_source>.*)$"
-        )
-
-        for line in bootmgr_output.splitlines():
-            match = regexp_entry.match(line)
-            if not match:
-                continue
-
-            self.entries[match.group('bootnum')] = EFIBootLoaderEntry(
-                boot_number=match.group('bootnum'),
-                label=match.group('label'),
-                active='*' in match.group('active'),
-                efi_bin_source=match.group('bin_source'),
-            )
-
         if not self.entries:
             # it's not expected that no entry exists
             raise EFIError('Unable to detect any UEFI bootloader entry.')
-
-    @staticmethod
-    def _parse_key_value(bootmgr_output, key):
-        # e.g.: <key>: <value>
-        for line in bootmgr_output.splitlines():
-            if line.startswith(key + ':'):
-                return line.split(':')[1].strip()
-
-        return None
-
-    def _parse_current_bootnum(self, bootmgr_output):
-        # e.g.: BootCurrent: 0002
-        self.current_bootnum = self._parse_key_value(bootmgr_output, 'BootCurrent')
-
         if self.current_bootnum is None:
             raise EFIError('Unable to detect current boot number.')
-
-    def _parse_next_bootnum(self, bootmgr_output):
-        # e.g.: BootNext: 0002
-        self.next_bootnum = self._parse_key_value(bootmgr_output, 'BootNext')
-
-    def _parse_boot_order(self, bootmgr_output):
-        # e.g.:  BootOrder: 0001,0002,0000,0003
-        read_boot_order = self._parse_key_value(bootmgr_output, 'BootOrder')
-        self.boot_order = tuple(read_boot_order.split(','))
-
         if self.boot_order is None:
             raise EFIError('UEFI: Unable to detect current boot order.')
+        self._print_loaded_info()
 
     def _print_loaded_info(self):
         msg = 'Bootloader setup:'
@@ -330,6 +491,8 @@ def add_boot_entry(label, efi_bin_path):
         raise EFIError(
             f"Unable to add a new UEFI bootloader entry '{label}' for EFI binary at {efi_bin_path}."
         ) from e
+    finally:
+        invalidate_boot_variables()
 
     # sanity check it's really there
     efibootinfo = EFIBootInfo()
@@ -348,6 +511,8 @@ def remove_boot_entry(boot_number):
         raise EFIError(
             f"Failed to remove boot entry with boot number '{boot_number}'"
         ) from e
+    finally:
+        invalidate_boot_variables()
 
 
 def set_bootnext(boot_number):
@@ -360,3 +525,5 @@ def set_bootnext(boot_number):
         run(['/usr/sbin/efibootmgr', '--bootnext', boot_number])
     except CalledProcessError:
         raise EFIError(f'Could not set boot entry {boot_number} as BootNext.')
+    finally:
+        invalidate_boot_variables()
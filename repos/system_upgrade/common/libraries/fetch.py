@@ -14,6 +14,7 @@ SERVICE_HOST_DEFAULT = "https://cert.cloud.redhat.com"
 REQUEST_TIMEOUT = (5, 30)
 MAX_ATTEMPTS = 3
 ASSET_PROVIDED_DATA_STREAMS_FIELD = 'provided_data_streams'
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 def _get_hint(local_path):
@@ -142,6 +143,13 @@ def read_or_fetch(filename,
     return response.content.decode(encoding)
 
 
+def _get_asset_error_hint(asset_filename, docs_url):
+    if docs_url:
+        return {'hint': ('Read documentation at the following link for more information about how to retrieve '
+                         'the valid file: {0}'.format(docs_url))}
+    return {'hint': _get_hint(os.path.join('/etc/leapp/files', asset_filename))}
+
+
 def load_data_asset(actor_requesting_asset,
                     asset_filename,
                     asset_fulltext_name,
@@ -169,11 +177,7 @@ def load_data_asset(actor_requesting_asset,
     if models.ConsumedDataAsset not in actor_requesting_asset.produces:
         raise StopActorExecutionError('The supplied `actor_requesting_asset` does not produce ConsumedDataAsset.')
 
-    if docs_url:
-        error_hint = {'hint': ('Read documentation at the following link for more information about how to retrieve '
-                               'the valid file: {0}'.format(docs_url))}
-    else:
-        error_hint = {'hint': _get_hint(os.path.join('/etc/leapp/files', asset_filename))}
+    error_hint = _get_asset_error_hint(asset_filename, docs_url)
 
     data_stream_id = get_consumed_data_stream_id()
     data_stream_major = data_stream_id.split('.', 1)[0]
@@ -194,7 +198,41 @@ def load_data_asset(actor_requesting_asset,
         msg = 'The {0} file (at {1}) is invalid - it does not contain a JSON object at the topmost level.'
         raise StopActorExecutionError(msg.format(asset_fulltext_name, asset_filename), details=error_hint)
 
-    provided_data_streams = asset_contents.get(ASSET_PROVIDED_DATA_STREAMS_FIELD)
+    produce_consumed_data_asset(actor_requesting_asset,
+                                asset_filename,
+                                asset_fulltext_name,
+                                docs_url,
+                                docs_title,
+                                asset_contents.get(ASSET_PROVIDED_DATA_STREAMS_FIELD))
+
+    return asset_contents
+
+
+def produce_consumed_data_asset(actor_requesting_asset,
+                                asset_filename,
+                                asset_fulltext_name,
+                                docs_url,
+                                docs_title,
+                                provided_data_streams):
+    """
+    Produce the :class:`leapp.model.ConsumedDataAsset` message for the given data asset.
+
+    The function is called by :func:`load_data_asset`. Call it directly only when the content
+    of the asset is obtained differently (e.g. from a cache derived from the asset), so leapp
+    is still able to uniformly report assets with incorrect versions.
+
+    :param Actor actor_requesting_asset: The actor instance requesting the asset file.
+    :param str asset_filename: The file name of the asset.
+    :param str asset_fulltext_name: A human readable asset name to display in error messages.
+    :param str docs_url: Docs url to provide if an asset is malformed or outdated.
+    :param str docs_title: Title of the documentation to where `docs_url` points to.
+    :param provided_data_streams: Value of the `provided_data_streams` field of the asset.
+    :raises StopActorExecutionError: If ConsumedDataAsset is not specified in the produces tuple
+                                     of the actor_requesting_asset actor.
+    """
+    if models.ConsumedDataAsset not in actor_requesting_asset.produces:
+        raise StopActorExecutionError('The supplied `actor_requesting_asset` does not produce ConsumedDataAsset.')
+
     if provided_data_streams and not isinstance(provided_data_streams, list):
         provided_data_streams = []  # The asset will be later reported as malformed
 
@@ -204,4 +242,199 @@ def load_data_asset(actor_requesting_asset,
                                          docs_title=docs_title,
                                          provided_data_streams=provided_data_streams))
 
-    return asset_contents
+
+class _NotAnArrayError(ValueError):
+    """
+    Raised when a streamed field of a JSON document does not contain an array.
+    """
+
+
+class _JSONObjectStream(object):
+    """
+    Incremental reader of a JSON document containing an object at the topmost level.
+
+    The document is read in chunks and values of the top-level fields are decoded
+    one by one. Arrays of the selected fields are not decoded as a whole, their items
+    are decoded one by one instead. So neither the raw text nor the decoded content
+    of the whole document is held in memory at once.
+    """
+
+    def __init__(self, fileobj, chunk_size=STREAM_CHUNK_SIZE):
+        self._file = fileobj
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, size=0):
+        """
+        Drop the already processed data from the buffer and append the next chunk of data.
+
+        :return: False if there are no more data to read, True otherwise
+        """
+        if self._eof:
+            return False
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        data = self._file.read(max(size, self._chunk_size))
+        if not data:
+            self._eof = True
+            return False
+        self._buffer += data
+        return True
+
+    def _next_char(self):
+        """
+        Return the next non-whitespace character without consuming it (empty string at the end of data).
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in ' \t\n\r':
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._read_more():
+                return self._buffer[self._pos:self._pos + 1]
+
+    def _consume_char(self, expected):
+        char = self._next_char()
+        if char not in expected:
+            raise ValueError('Expected one of {} but found {}'.format(list(expected), repr(char) or 'end of data'))
+        self._pos += 1
+        return char
+
+    def _decode_value(self):
+        self._next_char()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                # The value can be incomplete, read more data (at least double the buffer to keep it linear)
+                if not self._read_more(len(self._buffer)):
+                    raise
+                continue
+            # A scalar value (e.g. a number) ending right at the end of the buffer can be truncated
+            if end == len(self._buffer) and self._read_more():
+                continue
+            self._pos = end
+            return value
+
+    def iter_fields(self, streamed_fields=()):
+        """
+        Yield (field, value) pairs of the top-level object in the order they are present in the document.
+
+        For fields listed in `streamed_fields` a pair is yielded for each item of the array instead.
+
+        :raises ValueError: When the document is not valid JSON, does not contain an object
+                            at the topmost level or a streamed field does not contain an array.
+        """
+        self._consume_char('{')
+        if self._next_char() == '}':
+            self._pos += 1
+        else:
+            while True:
+                field = self._decode_value()
+                if not isinstance(field, str):
+                    raise ValueError('Expected a string as a field name')
+                self._consume_char(':')
+                if field not in streamed_fields:
+                    yield field, self._decode_value()
+                elif self._next_char() != '[':
+                    raise _NotAnArrayError('The {} field does not contain an array'.format(field))
+                else:
+                    self._pos += 1
+                    if self._next_char() == ']':
+                        self._pos += 1
+                    else:
+                        while True:
+                            yield field, self._decode_value()
+                            if self._consume_char(',]') == ']':
+                                break
+                if self._consume_char(',}') == '}':
+                    break
+        if self._next_char():
+            raise ValueError('Extra data found after the JSON object')
+
+
+def stream_data_asset(actor_requesting_asset,
+                      asset_filename,
+                      asset_fulltext_name,
+                      docs_url,
+                      docs_title,
+                      entries_field,
+                      other_fields=None):
+    """
+    Load the data asset incrementally, yielding entries of its top-level array one at a time.
+
+    Unlike :func:`load_data_asset`, the content of the asset is never held in memory
+    as a whole, which is suitable for big data assets processed entry by entry
+    (e.g. `packageinfo` of PES events). The :class:`leapp.model.ConsumedDataAsset`
+    message is produced as soon as the `provided_data_streams` field is read,
+    or when the whole asset is read if the field is missing.
+
+    The function returns a generator, so the asset is read only when the entries are iterated.
+
+    :param Actor actor_requesting_asset: The actor instance requesting the asset file.
+    :param str asset_filename: The file name of the asset to load.
+    :param str asset_fulltext_name: A human readable asset name to display in error messages.
+    :param str docs_url: Docs url to provide if an asset is malformed or outdated.
+    :param str docs_title: Title of the documentation to where `docs_url` points to.
+    :param str entries_field: The name of the top-level field containing the array of entries to yield.
+    :param dict other_fields: If specified, values of other top-level fields are stored into the dict
+                              as they are read. They are complete once all entries are consumed.
+    :returns: A generator yielding entries of the `entries_field` array.
+    :raises StopActorExecutionError: In following cases:
+        * ConsumedDataAsset is not specified in the produces tuple of the actor_requesting_asset actor
+        * The content of the required data file is not valid JSON format
+        * The required data cannot be obtained (e.g. due to missing file)
+    :raises ValueError: When the `entries_field` field is missing or does not contain an array.
+    """
+    if models.ConsumedDataAsset not in actor_requesting_asset.produces:
+        raise StopActorExecutionError('The supplied `actor_requesting_asset` does not produce ConsumedDataAsset.')
+
+    local_path = os.path.join('/etc/leapp/files', asset_filename)
+    if not os.path.exists(local_path):
+        _raise_error(local_path, "File {lp} does not exist.".format(lp=local_path))
+
+    api.current_logger().info(
+        'Attempting to stream the asset {0} (data_stream={1})'.format(asset_filename, get_consumed_data_stream_id())
+    )
+
+    def _produce_consumed_data_asset(provided_data_streams):
+        produce_consumed_data_asset(actor_requesting_asset,
+                                    asset_filename,
+                                    asset_fulltext_name,
+                                    docs_url,
+                                    docs_title,
+                                    provided_data_streams)
+
+    def _stream_entries():
+        is_asset_produced = False
+        has_entries_field = False
+        try:
+            with io.open(local_path, encoding='utf-8') as f:
+                for field, value in _JSONObjectStream(f).iter_fields(streamed_fields=(entries_field,)):
+                    if field == entries_field:
+                        has_entries_field = True
+                        yield value
+                        continue
+                    if other_fields is not None:
+                        other_fields[field] = value
+                    if field == ASSET_PROVIDED_DATA_STREAMS_FIELD and not is_asset_produced:
+                        _produce_consumed_data_asset(value)
+                        is_asset_produced = True
+        except EnvironmentError:
+            _raise_error(local_path, "File {lp} exists but couldn't be read".format(lp=local_path))
+        except _NotAnArrayError:
+            raise
+        except ValueError:
+            msg = 'The {0} file (at {1}) does not contain a valid JSON object.'.format(
+                asset_fulltext_name, asset_filename)
+            raise StopActorExecutionError(msg, details=_get_asset_error_hint(asset_filename, docs_url))
+
+        if not is_asset_produced:
+            _produce_consumed_data_asset(None)
+
+        if not has_entries_field:
+            raise ValueError('The {0} file (at {1}) does not contain the {2} field.'.format(
+                asset_fulltext_name, asset_filename, entries_field))
+
+    return _stream_entries()
@@ -0,0 +1,302 @@
+"""
+In-process copying of files and directory trees.
+
+The functions in this library replace spawning `cp -a` for every copied file.
+File contents are cloned (reflink) when the filesystem supports it, copied
+inside the kernel by copy_file_range otherwise, and regular files are copied
+in a pool of threads. Similar to `cp -a`, the mode, ownership, timestamps and
+extended attributes (including SELinux labels) are preserved. Failures to
+preserve ownership or extended attributes due to missing privileges or
+a missing filesystem support are not fatal.
+"""
+import errno
+import fcntl
+import os
+import shutil
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+from leapp.libraries.stdlib import api
+
+COPY_WORKERS = 8
+"""The maximal number of threads copying files in parallel"""
+
+_FICLONE = 0x40049409
+"""The FICLONE ioctl request (see ioctl_ficlone(2))"""
+
+_COPY_CHUNK_SIZE = 1024 * 1024 * 1024
+_SPARSE_COPY_CHUNK_SIZE = 1024 * 1024
+
+_IGNORED_METADATA_ERRNOS = (errno.EPERM, errno.EACCES, errno.ENOTSUP, errno.EOPNOTSUPP, errno.ENODATA, errno.EINVAL)
+"""
+Errors of chown and xattr syscalls that are ignored (`cp -a` ignores them as well)
+"""
+
+_CLONE_UNSUPPORTED_ERRNOS = (errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EBADF)
+_COPY_FILE_RANGE_UNSUPPORTED_ERRNOS = _CLONE_UNSUPPORTED_ERRNOS + (errno.ENOSYS, errno.EPERM)
+
+
+def _clone_file_data(src_fd, dst_fd):
+    """
+    Try to share the data of the src file with the dst file (reflink).
+
+    :return: True if the data has been cloned, False if cloning is not supported.
+    """
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError as err:
+        if err.errno in _CLONE_UNSUPPORTED_ERRNOS:
+            return False
+        raise
+    return True
+
+
+def _copy_file_range_data(src_fd, dst_fd):
+    """
+    Try to copy the data of the src file to the dst file inside the kernel.
+
+    :return: True if the data has been copied, False if copy_file_range is not supported.
+    """
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    copied = 0
+    while True:
+        try:
+            count = os.copy_file_range(src_fd, dst_fd, _COPY_CHUNK_SIZE)
+        except OSError as err:
+            if not copied and err.errno in _COPY_FILE_RANGE_UNSUPPORTED_ERRNOS:
+                return False
+            raise
+        if not count:
+            return True
+        copied += count
+
+
+def _copy_file_data(src, dst):
+    with open(src, 'rb') as fsrc:
+        # Create the file with restrictive permissions, the right mode is set
+        # after the data has been copied
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as fdst:
+            if _clone_file_data(fsrc.fileno(), fdst.fileno()):
+                return
+            if _copy_file_range_data(fsrc.fileno(), fdst.fileno()):
+                return
+            shutil.copyfileobj(fsrc, fdst)
+
+
+def _copy_xattrs(src, dst, follow_symlinks=True):
+    try:
+        names = os.listxattr(src, follow_symlinks=follow_symlinks)
+    except OSError as err:
+        if err.errno in _IGNORED_METADATA_ERRNOS:
+            return
+        raise
+    for name in names:
+        try:
+            value = os.getxattr(src, name, follow_symlinks=follow_symlinks)
+            os.setxattr(dst, name, value, follow_symlinks=follow_symlinks)
+        except OSError as err:
+            if err.errno not in _IGNORED_METADATA_ERRNOS:
+                raise
+            api.current_logger().debug(
+                'Cannot preserve the {} extended attribute of {}: {}'.format(name, dst, err.strerror)
+            )
+
+
+def copy_sparse_file(src, dst):
+    """
+    Copy the content of the file src to dst preserving holes in it.
+
+    The data are cloned (reflink) when the filesystem supports it. Otherwise
+    only data segments of the src file are copied, so the dst file does not
+    take more space on the disk than the src file. Metadata are not copied.
+
+    :param src: Path to the source file.
+    :param dst: Path to the destination file, overwritten if it exists.
+    """
+    with open(src, 'rb') as fsrc:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as fdst:
+            src_fd = fsrc.fileno()
+            dst_fd = fdst.fileno()
+            if _clone_file_data(src_fd, dst_fd):
+                return
+            size = os.fstat(src_fd).st_size
+            offset = 0
+            while offset < size:
+                try:
+                    data_start = os.lseek(src_fd, offset, os.SEEK_DATA)
+                except OSError as err:
+                    if err.errno != errno.ENXIO:
+                        raise
+                    # no more data till the end of the file
+                    break
+                data_end = os.lseek(src_fd, data_start, os.SEEK_HOLE)
+                while data_start < data_end:
+                    chunk = os.pread(src_fd, min(_SPARSE_COPY_CHUNK_SIZE, data_end - data_start), data_start)
+                    if not chunk:
+                        break
+                    os.pwrite(dst_fd, chunk, data_start)
+                    data_start += len(chunk)
+                offset = data_end
+            os.ftruncate(dst_fd, size)
+
+
+def copy_metadata(src, dst, follow_symlinks=True):
+    """
+    Copy ownership, extended attributes, mode and timestamps of src to dst.
+
+    :param src: Path to the file to copy the metadata from.
+    :param dst: Path to the file to copy the metadata to.
+    :param follow_symlinks: If False and both paths are symlinks, the metadata
+        of symlinks themselves are copied. The mode of a symlink is never set.
+    """
+    st = os.stat(src, follow_symlinks=follow_symlinks)
+    is_symlink = stat.S_ISLNK(st.st_mode)
+
+    # NOTE: chown clears the suid/sgid bits and file capabilities, so it has to
+    # be done before setting extended attributes and the mode
+    try:
+        os.chown(dst, st.st_uid, st.st_gid, follow_symlinks=follow_symlinks)
+    except OSError as err:
+        if err.errno not in _IGNORED_METADATA_ERRNOS:
+            raise
+        api.current_logger().debug('Cannot preserve the ownership of {}: {}'.format(dst, err.strerror))
+
+    _copy_xattrs(src, dst, follow_symlinks=follow_symlinks)
+    if not is_symlink:
+        os.chmod(dst, stat.S_IMODE(st.st_mode))
+    os.utime(dst, ns=(st.st_atime_ns, st.st_mtime_ns), follow_symlinks=follow_symlinks)
+
+
+def copy_file(src, dst):
+    """
+    Copy the file src to dst preserving its metadata.
+
+    The dst file is overwritten if it exists. Special files (fifos, devices,
+    sockets) are recreated instead of copying their content. Symlinks are
+    followed, use :func:`copy_symlink` to copy a symlink.
+
+    :param src: Path to the source file.
+    :param dst: Path to the destination file (not to a directory).
+    """
+    st = os.stat(src)
+    if stat.S_ISREG(st.st_mode):
+        _copy_file_data(src, dst)
+    else:
+        os.mknod(dst, stat.S_IFMT(st.st_mode) | 0o600, st.st_rdev)
+    copy_metadata(src, dst)
+
+
+def copy_symlink(src, dst):
+    """
+    Create the dst symlink pointing to the same path as the src symlink.
+
+    The ownership, extended attributes and timestamps of the symlink are preserved.
+    """
+    os.symlink(os.readlink(src), dst)
+    copy_metadata(src, dst, follow_symlinks=False)
+
+
+def copy_path(src, dst):
+    """
+    Copy src of any type to dst like `cp -a src dst` does when dst does not exist.
+
+    Symlinks are copied as symlinks, directories are copied recursively.
+    """
+    if os.path.islink(src):
+        copy_symlink(src, dst)
+    elif os.path.isdir(src):
+        copy_tree(src, dst, symlinks=True)
+    else:
+        copy_file(src, dst)
+
+
+def copy_files(files, workers=COPY_WORKERS):
+    """
+    Copy files in parallel preserving their metadata.
+
+    All files are processed even if some of them cannot be copied.
+
+    :param files: Iterable of (src, dst) tuples, see :func:`copy_file`.
+    :param workers: The maximal number of files copied in parallel.
+    :raises shutil.Error: if any file failed to be copied. The exception
+        contains the list of (src, dst, reason) tuples like shutil.copytree.
+    """
+    def _copy(paths):
+        try:
+            copy_file(*paths)
+        except (OSError, shutil.Error) as err:
+            return paths + (str(err),)
+        return None
+
+    files = list(files)
+    if not files:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(files)))) as executor:
+        errors = [error for error in executor.map(_copy, files) if error]
+    if errors:
+        raise shutil.Error(errors)
+
+
+def copy_tree(src, dst, symlinks=False, workers=COPY_WORKERS):
+    """
+    Recursively copy the directory tree rooted at src to dst.
+
+    The function is a drop-in replacement of shutil.copytree that additionally
+    preserves the ownership of copied files and copies regular files in parallel.
+    The dst directory must not exist, it is created together with missing
+    parent directories.
+
+    :param src: Path to the source directory.
+    :param dst: Path to the destination directory.
+    :param symlinks: If True, symlinks are copied as symlinks. Otherwise
+        the content of the files and directories they point to is copied.
+    :param workers: The maximal number of files copied in parallel.
+    :raises shutil.Error: if any file failed to be copied. The exception
+        contains the list of (src, dst, reason) tuples.
+    """
+    os.makedirs(dst)
+
+    errors = []
+    files = []
+    dirs = [(src, dst)]
+
+    def _on_walk_error(err):
+        errors.append((err.filename, os.path.join(dst, os.path.relpath(err.filename, src)), str(err)))
+
+    for root, dirnames, filenames in os.walk(src, onerror=_on_walk_error, followlinks=not symlinks):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        for is_dir, names in ((True, dirnames), (False, filenames)):
+            for name in names:
+                srcname = os.path.join(root, name)
+                dstname = os.path.join(target_root, name)
+                try:
+                    if symlinks and os.path.islink(srcname):
+                        copy_symlink(srcname, dstname)
+                    elif is_dir:
+                        # Keep the directory writable until the copy is finished,
+                        # the mode is set at the end
+                        os.mkdir(dstname, 0o700)
+                        dirs.append((srcname, dstname))
+                    else:
+                        files.append((srcname, dstname))
+                except OSError as err:
+                    errors.append((srcname, dstname, str(err)))
+
+    try:
+        copy_files(files, workers=workers)
+    except shutil.Error as err:
+        errors.extend(err.args[0])
+
+    # Set metadata of directories once their content has been copied,
+    # starting with the deepest ones
+    for srcname, dstname in reversed(dirs):
+        try:
+            copy_metadata(srcname, dstname)
+        except OSError as err:
+            errors.append((srcname, dstname, str(err)))
+
+    if errors:
+        raise shutil.Error(errors)
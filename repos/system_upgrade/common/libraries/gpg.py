@@ -1,4 +1,7 @@
+import base64
+import hashlib
 import os
+import struct
 
 from leapp.libraries.common import config
 from leapp.libraries.common.config.version import get_target_major_version
@@ -7,6 +10,16 @@ from leapp.models import GpgKey
 
 GPG_CERTS_FOLDER = 'rpm-gpg'
 
+_ARMOR_BEGIN = '-----BEGIN PGP PUBLIC KEY BLOCK-----'
+_ARMOR_END = '-----END PGP PUBLIC KEY BLOCK-----'
+_PUBLIC_KEY_PACKET_TAG = 6
+# version of the public key packet -> (fingerprint hash, prefix byte, length format, key id from fingerprint)
+_FINGERPRINT_PARAMS = {
+    4: (hashlib.sha1, b'\x99', '>H', lambda fp: fp[-16:]),
+    5: (hashlib.sha256, b'\x9a', '>I', lambda fp: fp[:16]),
+    6: (hashlib.sha256, b'\x9b', '>I', lambda fp: fp[:16]),
+}
+
 
 def get_pubkeys_from_rpms(installed_rpms):
     """
@@ -24,6 +37,121 @@ def get_pubkeys_from_rpms(installed_rpms):
     return [GpgKey(fingerprint=pkg.version, rpmdb=True) for pkg in installed_rpms.items if pkg.name == 'gpg-pubkey']
 
 
+def _dearmor(text):
+    """
+    Decode all ASCII armored public key blocks in the given text
+
+    :raises ValueError: if the text does not contain any valid armored block
+    """
+    data = b''
+    lines = iter(text.splitlines())
+    for line in lines:
+        if line.strip() != _ARMOR_BEGIN:
+            continue
+        # skip armor headers, they are separated from the data by an empty line
+        for line in lines:
+            if not line.strip():
+                break
+        encoded = []
+        for line in lines:
+            line = line.strip()
+            if line == _ARMOR_END:
+                break
+            if not line.startswith('='):
+                # lines starting with '=' contain the checksum
+                encoded.append(line)
+        else:
+            raise ValueError('Unterminated armored block')
+        try:
+            data += base64.b64decode(''.join(encoded))
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid armored block: {}'.format(e))
+    if not data:
+        raise ValueError('No armored public key block found')
+    return data
+
+
+def _iter_packets(data):
+    """
+    Yield (tag, body) of all OpenPGP packets in the binary data
+
+    :raises ValueError: if the data are not valid OpenPGP packets
+    """
+    pos = 0
+    while pos < len(data):
+        header = bytearray(data[pos:pos + 6])
+        if not header[0] & 0x80:
+            raise ValueError('Invalid OpenPGP packet header at offset {}'.format(pos))
+        if header[0] & 0x40:
+            # new format
+            tag = header[0] & 0x3f
+            if len(header) < 2:
+                raise ValueError('Truncated OpenPGP packet header at offset {}'.format(pos))
+            if header[1] < 192:
+                length, header_len = header[1], 2
+            elif header[1] < 224:
+                header_len = 3
+                if pos + header_len > len(data):
+                    raise ValueError('Truncated OpenPGP packet header at offset {}'.format(pos))
+                length = ((header[1] - 192) << 8) + header[2] + 192
+            elif header[1] == 255:
+                header_len = 6
+                if pos + header_len > len(data):
+                    raise ValueError('Truncated OpenPGP packet header at offset {}'.format(pos))
+                length = struct.unpack('>I', bytes(header[2:6]))[0]
+            else:
+                raise ValueError('Partial body lengths are not allowed for key packets')
+        else:
+            # old format
+            tag = (header[0] >> 2) & 0x0f
+            length_type = header[0] & 0x03
+            if length_type == 3:
+                length, header_len = len(data) - pos - 1, 1
+            else:
+                header_len = 1 + (1, 2, 4)[length_type]
+                if pos + header_len > len(data):
+                    raise ValueError('Truncated OpenPGP packet header at offset {}'.format(pos))
+                length = struct.unpack('>' + 'BHI'[length_type], bytes(header[1:header_len]))[0]
+        start = pos + header_len
+        pos = start + length
+        if pos > len(data):
+            raise ValueError('Truncated OpenPGP packet')
+        yield tag, data[start:pos]
+
+
+def _get_key_id(body):
+    """
+    Compute the key ID (as printed by gpg) from the body of the public key packet
+
+    :raises ValueError: for unsupported versions of the public key packet
+    """
+    version = bytearray(body[:1])[0] if body else None
+    if version not in _FINGERPRINT_PARAMS:
+        raise ValueError('Unsupported version of the public key packet: {}'.format(version))
+    hash_func, prefix, length_fmt, key_id = _FINGERPRINT_PARAMS[version]
+    fingerprint = hash_func(prefix + struct.pack(length_fmt, len(body)) + body).hexdigest()
+    return key_id(fingerprint)
+
+
+def _parse_fp_from_key_data(data):
+    """
+    Parse 8 characters fingerprints of primary public keys from the OpenPGP data
+
+    Both binary and ASCII armored data are supported. The fingerprints are the
+    same as the ones parsed from the gpg output by _parse_fp_from_gpg.
+
+    :param data: Content of the file with gpg key(s)
+    :type data: bytes
+    :raises ValueError: if the data cannot be parsed
+    """
+    if data and not bytearray(data[:1])[0] & 0x80:
+        data = _dearmor(data.decode('utf-8', 'replace'))
+    fps = [_get_key_id(body)[8:] for tag, body in _iter_packets(data) if tag == _PUBLIC_KEY_PACKET_TAG]
+    if not fps:
+        raise ValueError('No public key found')
+    return fps
+
+
 def _gpg_show_keys(key_path):
     """
     Show keys in given file in version-agnostic manner
@@ -85,11 +213,19 @@ def get_gpg_fp_from_file(key_path):
     Log warning in case no OpenPGP data found in the given file or it is not
     readable for some reason.
 
+    The file is parsed directly, gpg2 is used only when the file cannot be parsed.
+
     :param key_path: Path to the file with GPG key(s)
     :type key_path: str
     :return: List of public key fingerprints from the given file
     :rtype: list(str)
     """
+    try:
+        with open(key_path, 'rb') as f:
+            return _parse_fp_from_key_data(f.read())
+    except (OSError, ValueError) as e:
+        api.current_logger().debug('Cannot parse GPG keys from {}, using gpg2: {}'.format(key_path, str(e)))
+
     res = _gpg_show_keys(key_path)
     fp = _parse_fp_from_gpg(res)
     if not fp:
@@ -98,6 +234,19 @@ def get_gpg_fp_from_file(key_path):
     return fp
 
 
+def get_gpg_fps_from_dir(dir_path):
+    """
+    Return public key fingerprints from all files in the given directory
+
+    :param dir_path: Path to the directory with GPG key files, e.g. the one from get_path_to_gpg_certs()
+    :type dir_path: str
+    :return: Paths of the files sorted by name with the list of fingerprints from each file
+    :rtype: list(tuple(str, list(str)))
+    """
+    key_files = [os.path.join(dir_path, filename) for filename in sorted(os.listdir(dir_path))]
+    return [(key_file, get_gpg_fp_from_file(key_file)) for key_file in key_files if os.path.isfile(key_file)]
+
+
 # TODO when a need for the same function for source arises, or when there is
 # reason to deprecate this (re)name this to include "target"
 def get_path_to_gpg_certs():
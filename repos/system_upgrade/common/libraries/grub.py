@@ -2,7 +2,7 @@ import os
 import re
 
 from leapp.exceptions import StopActorExecution
-from leapp.libraries.common import mdraid, partitions
+from leapp.libraries.common import efi, mdraid, partitions
 from leapp.libraries.stdlib import api, CalledProcessError, run
 from leapp.utils.deprecation import deprecated
 
@@ -138,80 +138,30 @@ class EFIBootInfo:
         if not is_efi():
             raise StopActorExecution('Unable to collect data about UEFI on a BIOS system.')
         try:
-            result = run(['/usr/sbin/efibootmgr', '-v'])
-        except CalledProcessError:
+            boot_variables = efi.get_boot_variables()
+        except efi.EFIError:
             raise StopActorExecution('Unable to get information about UEFI boot entries.')
 
-        bootmgr_output = result['stdout']
-
-        self.current_bootnum = None
+        self.current_bootnum = boot_variables.current_bootnum
         """The boot number (str) of the current boot."""
-        self.next_bootnum = None
+        self.next_bootnum = boot_variables.next_bootnum
         """The boot number (str) of the next boot."""
-        self.boot_order = tuple()
+        self.boot_order = boot_variables.boot_order
         """The tuple of the UEFI boot loader entries in the boot order."""
-        self.entries = {}
+        self.entries = {
+            boot_number: EFIBootLoaderEntry(boot_number, label, active, efi_bin_source)
+            for boot_number, label, active, efi_bin_source in boot_variables.entries
+        }
         """The UEFI boot loader entries {'boot_number': EFIBootLoader}"""
 
-        self._parse_efi_boot_entries(bootmgr_output)
-        self._parse_current_bootnum(bootmgr_output)
-        self._parse_next_bootnum(bootmgr_output)
-        self._parse_boot_order(bootmgr_output)
-        self._print_loaded_info()
-
-    def _parse_efi_boot_entries(self, bootmgr_output):
-        """
-        Return dict of UEFI boot loader entries: {"<boot_number>": EFIBootLoader}
-        """
-
-        self.entries = {}
-        regexp_entry = re.compile(
-            r"^Boot(?P<bootnum>[a-zA-Z0-9]+)(?P<active>\*?)\s*(?P<label>.*?)\t(?P<bin_source>.*)$"
-        )
-
-        for line in bootmgr_output.splitlines():
-            match = regexp_entry.match(line)
-            if not match:
-                continue
-
-            self.entries[match.group('bootnum')] = EFIBootLoaderEntry(
-                boot_number=match.group('bootnum'),
-                label=match.group('label'),
-                active='*' in match.group('active'),
-                efi_bin_source=match.group('bin_source'),
-            )
-
         if not self.entries:
             # it's not expected that no entry exists
             raise StopActorExecution('UEFI: Unable to detect any UEFI bootloader entry.')
-
-    @staticmethod
-    def _parse_key_value(bootmgr_output, key):
-        # e.g.: <key>: <value>
-        for line in bootmgr_output.splitlines():
-            if line.startswith(key + ':'):
-                return line.split(':')[1].strip()
-
-        return None
-
-    def _parse_current_bootnum(self, bootmgr_output):
-        # e.g.: BootCurrent: 0002
-        self.current_bootnum = self._parse_key_value(bootmgr_output, 'BootCurrent')
-
         if self.current_bootnum is None:
             raise StopActorExecution('UEFI: Unable to detect current boot number.')
-
-    def _parse_next_bootnum(self, bootmgr_output):
-        # e.g.: BootNext: 0002
-        self.next_bootnum = self._parse_key_value(bootmgr_output, 'BootNext')
-
-    def _parse_boot_order(self, bootmgr_output):
-        # e.g.:  BootOrder: 0001,0002,0000,0003
-        read_boot_order = self._parse_key_value(bootmgr_output, 'BootOrder')
-        self.boot_order = tuple(read_boot_order.split(','))
-
         if self.boot_order is None:
             raise StopActorExecution('UEFI: Unable to detect current boot order.')
+        self._print_loaded_info()
 
     def _print_loaded_info(self):
         msg = 'Bootloader setup:'
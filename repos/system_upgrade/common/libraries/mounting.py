@@ -4,6 +4,7 @@ import os
 import shutil
 from collections import namedtuple
 
+from leapp.libraries.common import filecopy
 from leapp.libraries.common.config import get_all_envs
 from leapp.libraries.common.config.version import matches_source_version
 from leapp.libraries.stdlib import api, CalledProcessError, run
@@ -213,7 +214,7 @@ class IsolatedActions:
         The destination directory is considered to be in the isolated environment.
         The source directory is considered to be on the current system root.
         """
-        shutil.copytree(src, self.full_path(dst))
+        filecopy.copy_tree(src, self.full_path(dst))
 
     def copytree_from(self, src, dst):
         """
@@ -223,7 +224,7 @@ class IsolatedActions:
         The destination directory is considered to be on the current system root.
         The source directory is considered to be in the isolated environment.
         """
-        shutil.copytree(self.full_path(src), dst)
+        filecopy.copy_tree(self.full_path(src), dst)
 
     def copy_to(self, src, dst):
         """
@@ -2,10 +2,13 @@ import contextlib
 import os
 import shutil
 import sys
+import threading
+import time
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 from leapp.exceptions import StopActorExecutionError
-from leapp.libraries.common import mounting, utils
+from leapp.libraries.common import filecopy, mounting, utils
 from leapp.libraries.common.config import get_env
 from leapp.libraries.common.config.version import get_target_major_version
 from leapp.libraries.stdlib import api, CalledProcessError, run
@@ -89,6 +92,38 @@ Engineering rationale:
    limits.
 """
 
+_MAX_DISK_IMAGE_WORKERS = 8
+"""
+The maximal number of disk images created and formatted in parallel.
+
+Creation of a disk image is mostly about waiting for mkfs to initialize
+the filesystem metadata, so it is worth to process more images at once
+on systems with many mountpoints.
+"""
+
+_MIN_DISK_IMAGE_SIZE_MB = 130
+"""
+Minimal size of a disk image to be able to format it (see `_create_mount_disk_image`)
+"""
+
+_DISK_IMAGE_TEMPLATES_DIRNAME = 'diskimage-templates'
+_DISK_IMAGE_TEMPLATE_VERSION = 1
+"""
+Bump the version when parameters of formatting disk images are changed
+"""
+
+_DISK_IMAGE_TEMPLATE_SIZE_BITS = 7
+"""
+Number of significant bits kept when rounding the disk image size for templates.
+
+Sizes of disk images are rounded down so the same template can be used
+for mountpoints with a slightly different free space (e.g. in different
+phases). The rounding makes a disk image smaller by less than 1/64 of its size.
+"""
+
+_disk_image_template_locks = {}
+_disk_image_template_locks_guard = threading.Lock()
+
 
 MountPoints = namedtuple('MountPoints', ['fs_file', 'fs_vfstype'])
 
@@ -302,7 +337,7 @@ def _prepare_required_mounts(scratch_dir, mounts_dir, storage_info, scratch_rese
     # but we want to reserve some space in advance.
     scratch_disk_size = _get_fspace(scratch_dir, convert_to_mibs=True) - scratch_reserve
 
-    result = {}
+    disk_sizes = {}
     for mountpoint in mount_points:
         # keep the info about the free space rather 5% lower than the real value
         disk_size = _get_fspace(mountpoint, convert_to_mibs=True, coefficient=0.95)
@@ -314,15 +349,100 @@ def _prepare_required_mounts(scratch_dir, mounts_dir, storage_info, scratch_rese
                    'but we truncate it to %d MB to avoid bumping to max file limits.')
             api.current_logger().info(msg, mountpoint, disk_size, _MAX_DISK_IMAGE_SIZE_MB)
             disk_size = _MAX_DISK_IMAGE_SIZE_MB
+        disk_sizes[mountpoint] = disk_size
+
+    templates_dir = _prepare_disk_image_templates_dir(scratch_dir)
+    if templates_dir:
+        disk_sizes = {mp: _get_disk_image_template_size(size) for mp, size in disk_sizes.items()}
+
+    images = _create_mount_disk_images(disk_images_directory, disk_sizes, templates_dir)
+    if templates_dir:
+        _prune_disk_image_templates(templates_dir, disk_sizes.values())
 
-        image = _create_mount_disk_image(disk_images_directory, mountpoint, disk_size)
+    result = {}
+    for mountpoint in mount_points:
         result[mountpoint] = mounting.LoopMount(
-            source=image,
+            source=images[mountpoint],
             target=_mount_dir(mounts_dir, mountpoint)
         )
     return result
 
 
+def _create_mount_disk_images(disk_images_directory, disk_sizes, templates_dir=None):
+    """
+    Create disk images for all given mountpoints in parallel.
+
+    Disk images are created and formatted by `_create_mount_disk_image` in
+    a pool of at most `_MAX_DISK_IMAGE_WORKERS` threads. Time spent on each
+    disk image is logged. All disk images are processed even if some of them
+    cannot be created, so all problems are reported at once (including
+    OSError and CalledProcessError raised by the workers).
+
+    :param disk_images_directory: Path to the directory where disk images should be stored.
+    :type disk_images_directory: str
+    :param disk_sizes: Apparent sizes of disk images in MiBs per mountpoint.
+    :type disk_sizes: dict
+    :param templates_dir: Path to the directory with disk image templates or None if templates are not used.
+    :type templates_dir: Optional[str]
+    :return: Paths to created disk images per mountpoint.
+    :rtype: dict
+    :raises StopActorExecutionError: if any disk image cannot be created.
+    """
+    def _create_image(mountpoint):
+        start = time.time()
+        try:
+            return _create_mount_disk_image(disk_images_directory, mountpoint, disk_sizes[mountpoint], templates_dir)
+        finally:
+            api.current_logger().debug(
+                'Disk image for %s processed in %.2f seconds.', mountpoint, time.time() - start
+            )
+
+    mount_points = sorted(disk_sizes)
+    if not mount_points:
+        return {}
+
+    start = time.time()
+    workers = min(_MAX_DISK_IMAGE_WORKERS, len(mount_points))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [(mountpoint, executor.submit(_create_image, mountpoint)) for mountpoint in mount_points]
+
+    images = {}
+    errors = []
+    for mountpoint, future in futures:
+        try:
+            images[mountpoint] = future.result()
+        except StopActorExecutionError as e:
+            errors.append((mountpoint, e))
+        except (OSError, CalledProcessError) as e:
+            api.current_logger().error('Failed to create disk image for %s', mountpoint, exc_info=True)
+            errors.append((mountpoint, StopActorExecutionError(
+                message='Cannot create disk image for {}'.format(mountpoint),
+                details={
+                    'error message': str(e),
+                }
+            )))
+    api.current_logger().debug(
+        'Created %d disk images in %.2f seconds.', len(images), time.time() - start
+    )
+
+    if len(errors) == 1:
+        raise errors[0][1]
+    if errors:
+        details = {}
+        for mountpoint, error in errors:
+            details[mountpoint] = '{}{}'.format(
+                error.message,
+                ''.join('\n  {}: {}'.format(key, value) for key, value in sorted((error.details or {}).items()))
+            )
+        raise StopActorExecutionError(
+            message='Cannot create disk images for {} mountpoints: {}'.format(
+                len(errors), ', '.join(mountpoint for mountpoint, dummy_error in errors)
+            ),
+            details=details
+        )
+    return images
+
+
 @contextlib.contextmanager
 def _build_overlay_mount(root_mount, mounts):
     # noqa: W0135; pylint: disable=bad-option-value,contextmanager-generator-missing-cleanup
@@ -435,7 +555,7 @@ def _format_disk_image_xfs(diskimage_path):
         )
 
 
-def _create_mount_disk_image(disk_images_directory, path, disk_size):
+def _create_mount_disk_image(disk_images_directory, path, disk_size, templates_dir=None):
     """
     Creates the mount disk image and return path to it.
 
@@ -453,16 +573,22 @@ def _create_mount_disk_image(disk_images_directory, path, disk_size):
 
     The disk image is formatted with Ext4 if (envar) `LEAPP_OVL_IMG_FS_EXT4=1`.
 
+    If the templates_dir is set, the XFS disk image is cloned from a formatted
+    disk image template of the same size instead (see `_get_disk_image_template`)
+    and gets a new filesystem UUID, so more clones can be mounted at once.
+
     :param disk_images_directory: Path to the directory where disk images should be stored.
     :type disk_images_directory: str
     :param path: Path to the mountpoint of the original (host/source) partition/volume
     :type path: str
     :param disk_size: Apparent size of the disk img in MiBs
     :type disk_size: int
+    :param templates_dir: Path to the directory with disk image templates or None if templates are not used.
+    :type templates_dir: Optional[str]
     :return: Path to the created disk image
     :rtype: str
     """
-    if disk_size < 130:
+    if disk_size < _MIN_DISK_IMAGE_SIZE_MB:
         # NOTE(pstodulk): SEATBELT
         # min. required size for current params to format a disk img with a FS:
         #   XFS  -> 130 MiB
@@ -481,11 +607,35 @@ def _create_mount_disk_image(disk_images_directory, path, disk_size):
         # the minimal required size could be different
         api.current_logger().warning(
             'The apparent size for the disk image representing {path} '
-            'is too small ({disk_size} MiBs) for a formatting. Setting 130 MiBs instead.'
-            .format(path=path, disk_size=disk_size)
+            'is too small ({disk_size} MiBs) for a formatting. Setting {min_size} MiBs instead.'
+            .format(path=path, disk_size=disk_size, min_size=_MIN_DISK_IMAGE_SIZE_MB)
         )
-        disk_size = 130
+        disk_size = _MIN_DISK_IMAGE_SIZE_MB
     diskimage_path = os.path.join(disk_images_directory, _mount_name(path))
+
+    if templates_dir and get_env('LEAPP_OVL_IMG_FS_EXT4', '0') != '1':
+        template_path = _get_disk_image_template(templates_dir, disk_size)
+        try:
+            api.current_logger().debug('Cloning disk image template %s to %s', template_path, diskimage_path)
+            filecopy.copy_sparse_file(template_path, diskimage_path)
+            _generate_disk_image_uuid(diskimage_path)
+            return diskimage_path
+        except (OSError, CalledProcessError) as e:
+            api.current_logger().warning(
+                'Cannot clone the disk image template %s: %s. Creating the disk image from scratch.',
+                template_path, str(e)
+            )
+            if os.path.exists(diskimage_path):
+                os.unlink(diskimage_path)
+
+    _allocate_and_format_disk_image(diskimage_path, disk_size, disk_images_directory)
+    return diskimage_path
+
+
+def _allocate_and_format_disk_image(diskimage_path, disk_size, disk_images_directory):
+    """
+    Create the sparse disk image file of the given size and format it.
+    """
     cmd = [
         '/bin/dd',
         'if=/dev/zero', 'of={}'.format(diskimage_path),
@@ -507,7 +657,136 @@ def _create_mount_disk_image(disk_images_directory, path, disk_size):
     else:
         _format_disk_image_xfs(diskimage_path)
 
-    return diskimage_path
+
+def _generate_disk_image_uuid(diskimage_path):
+    """
+    Set a new UUID of the XFS filesystem in the disk image cloned from a template.
+
+    Clones of the same template share the filesystem UUID and XFS refuses
+    to mount another filesystem with the same UUID.
+    """
+    api.current_logger().debug('Generating a new filesystem UUID of the disk image %s', diskimage_path)
+    run(['/sbin/xfs_admin', '-U', 'generate', diskimage_path])
+
+
+def _get_disk_image_template_size(disk_size):
+    """
+    Round the disk image size down so it can be shared by more disk images.
+
+    See `_DISK_IMAGE_TEMPLATE_SIZE_BITS`.
+    """
+    granularity = 2 ** max(0, int(disk_size).bit_length() - _DISK_IMAGE_TEMPLATE_SIZE_BITS)
+    return max(_MIN_DISK_IMAGE_SIZE_MB, int(disk_size) // granularity * granularity)
+
+
+def _get_disk_image_template_path(templates_dir, disk_size):
+    return os.path.join(templates_dir, 'xfs-v{}-{}M.img'.format(_DISK_IMAGE_TEMPLATE_VERSION, disk_size))
+
+
+def get_disk_image_templates_dir(scratch_dir):
+    """
+    Return path to the directory with disk image templates for the given scratch directory.
+
+    :param scratch_dir: Path to the scratch directory.
+    :type scratch_dir: str
+    :rtype: str
+    """
+    return os.path.join(os.path.dirname(os.path.normpath(scratch_dir)), _DISK_IMAGE_TEMPLATES_DIRNAME)
+
+
+def remove_disk_image_templates(scratch_dir):
+    """
+    Remove the directory with disk image templates.
+
+    The templates are kept between phases and leapp executions to speed up
+    the creation of disk images, so they have to be removed explicitly when
+    the source overlay is not going to be created anymore (after the reboot).
+
+    :param scratch_dir: Path to the scratch directory.
+    :type scratch_dir: str
+    """
+    templates_dir = get_disk_image_templates_dir(scratch_dir)
+    if not os.path.isdir(templates_dir):
+        return
+    api.current_logger().debug('Removing disk image templates directory %s.', templates_dir)
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(templates_dir, onexc=utils.report_and_ignore_shutil_rmtree_error)  # noqa: E501; pylint: disable=unexpected-keyword-arg
+    else:
+        shutil.rmtree(templates_dir, onerror=utils.report_and_ignore_shutil_rmtree_error)  # noqa: E501; pylint: disable=deprecated-argument
+
+
+def _prepare_disk_image_templates_dir(scratch_dir):
+    """
+    Ensure the directory for disk image templates exists and return path to it.
+
+    The templates are kept next to the scratch directory as the scratch
+    directory is removed when the source overlay is not needed anymore.
+    Templates are used only for XFS disk images as formatted Ext4 disk images
+    allocate considerably more space (the lazy initialisation is disabled).
+
+    :return: Path to the directory or None if templates should not be used.
+    """
+    if get_env('LEAPP_OVL_IMG_FS_EXT4', '0') == '1':
+        return None
+    templates_dir = get_disk_image_templates_dir(scratch_dir)
+    try:
+        utils.makedirs(templates_dir)
+    except OSError as e:
+        api.current_logger().warning(
+            'Cannot create the directory for disk image templates %s: %s', templates_dir, str(e)
+        )
+        return None
+    return templates_dir
+
+
+def _get_disk_image_template(templates_dir, disk_size):
+    """
+    Return path to the formatted XFS disk image template of the given size.
+
+    The template is created when it does not exist yet. Disk images are then
+    created as copies of the template (reflink or sparse copy), which is much
+    faster than formatting every disk image again in each phase.
+
+    :param templates_dir: Path to the directory with disk image templates.
+    :type templates_dir: str
+    :param disk_size: Apparent size of the disk img in MiBs
+    :type disk_size: int
+    :return: Path to the template.
+    :rtype: str
+    """
+    template_path = _get_disk_image_template_path(templates_dir, disk_size)
+    with _disk_image_template_locks_guard:
+        lock = _disk_image_template_locks.setdefault(template_path, threading.Lock())
+
+    with lock:
+        if os.path.exists(template_path):
+            api.current_logger().debug('Using the existing disk image template %s', template_path)
+            return template_path
+
+        api.current_logger().debug('Creating disk image template %s', template_path)
+        tmp_path = '{}.tmp'.format(template_path)
+        _allocate_and_format_disk_image(tmp_path, disk_size, templates_dir)
+        os.rename(tmp_path, template_path)
+    return template_path
+
+
+def _prune_disk_image_templates(templates_dir, disk_sizes):
+    """
+    Remove disk image templates that have not been needed for the given disk sizes.
+    """
+    needed = {
+        _get_disk_image_template_path(templates_dir, max(_MIN_DISK_IMAGE_SIZE_MB, size))
+        for size in disk_sizes
+    }
+    for name in os.listdir(templates_dir):
+        path = os.path.join(templates_dir, name)
+        if path in needed:
+            continue
+        api.current_logger().debug('Removing unused disk image template %s', path)
+        try:
+            os.unlink(path)
+        except OSError as e:
+            api.current_logger().warning('Cannot remove the disk image template %s: %s', path, str(e))
 
 
 def _create_diskimages_dir(scratch_dir, diskimages_dir):
@@ -598,6 +877,10 @@ def create_source_overlay(
     problems, it's possible to switch to Ext4 FS using:
         LEAPP_OVL_IMG_FS_EXT4=1
 
+    XFS disk images are cloned from formatted templates, which are kept in
+    the directory next to the scratch_dir so they can be reused when
+    the source overlay is created again (e.g. in a following phase).
+
     :param mounts_dir: Absolute path to the directory under which all mounts should happen.
     :type mounts_dir: str
     :param scratch_dir: Absolute path to the directory in which all disk and OVL images are stored.
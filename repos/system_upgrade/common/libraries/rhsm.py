@@ -1,5 +1,6 @@
 import contextlib
 import functools
+import json
 import os
 import re
 import time
@@ -17,6 +18,18 @@ _RE_SKU_CONSUMED = re.compile(r'SKU:\s*([^\s]+)')
 _ATTEMPTS = 5
 _RETRY_SLEEP = 5
 _DEFAULT_RHSM_REPOFILE = '/etc/yum.repos.d/redhat.repo'
+_CONSUMER_CERT = '/etc/pki/consumer/cert.pem'
+_ENTITLEMENT_DIR = '/etc/pki/entitlement'
+
+RHSM_CACHE_PATH = '/var/lib/leapp/rhsm_cache.json'
+
+_RHSM_CACHE = {}
+"""
+Results of subscription-manager queries done during the leapp execution, see _call_cached
+
+The cache is shared by all actors through the RHSM_CACHE_PATH file and it is
+used only when running within leapp (the execution id is known).
+"""
 
 SCA_TEXT = "Content Access Mode is set to Simple Content Access"
 
@@ -92,6 +105,107 @@ def _handle_rhsm_exceptions(hint=None):
         )
 
 
+def _get_cache():
+    """
+    Get the cached results of subscription-manager queries for the current leapp execution.
+
+    :return: Mapping of context roots to mappings of commands to their results
+             or None if the cache cannot be used
+    :rtype: dict | None
+    """
+    execution_id = os.environ.get('LEAPP_EXECUTION_ID')
+    if not execution_id:
+        return None
+    if _RHSM_CACHE.get('execution_id') != execution_id:
+        _RHSM_CACHE.clear()
+        _RHSM_CACHE.update(execution_id=execution_id, contexts=_load_cache_file(execution_id))
+    return _RHSM_CACHE['contexts']
+
+
+def _load_cache_file(execution_id):
+    try:
+        with open(RHSM_CACHE_PATH) as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(stored, dict) or stored.get('execution_id') != execution_id:
+        return {}
+    return stored.get('contexts', {})
+
+
+def _store_cache_file():
+    tmp_path = RHSM_CACHE_PATH + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(_RHSM_CACHE, f)
+        os.rename(tmp_path, RHSM_CACHE_PATH)
+    except OSError as e:
+        api.current_logger().warning('Cannot store the RHSM cache into {}: {}'.format(RHSM_CACHE_PATH, e))
+
+
+def _get_context_key(context):
+    return context.full_path('/')
+
+
+def _call_cached(context, cmd, **kwargs):
+    """
+    Call the subscription-manager query or get its result from the cache.
+
+    Only successful results are cached, until :func:`invalidate_cache` is called
+    for the context or the leapp execution ends.
+
+    :param context: An instance of a mounting.IsolatedActions class
+    :type context: mounting.IsolatedActions class
+    :param cmd: The subscription-manager command to execute
+    :type cmd: List(string)
+    :param kwargs: Parameters passed to context.call
+    :return: The stdout and the exit_code of the command
+    :rtype: dict
+    """
+    contexts = _get_cache()
+    context_key = _get_context_key(context)
+    cmd_key = ' '.join(cmd)
+    if contexts is not None and cmd_key in contexts.get(context_key, {}):
+        api.current_logger().debug('Using the cached result of: {}'.format(cmd_key))
+        return contexts[context_key][cmd_key]
+
+    result = context.call(cmd, **kwargs)
+    result = {'stdout': result['stdout'], 'exit_code': result.get('exit_code', 0)}
+    # failures (e.g. network errors) can be transient, so do not cache them
+    if contexts is not None and result['exit_code'] == 0:
+        contexts.setdefault(context_key, {})[cmd_key] = result
+        _store_cache_file()
+    return result
+
+
+def invalidate_cache(context):
+    """
+    Drop cached results of subscription-manager queries for the given context.
+
+    Call it whenever the RHSM configuration inside the context changes, e.g. the release
+    is set or the product certificate is switched.
+
+    :param context: An instance of a mounting.IsolatedActions class
+    :type context: mounting.IsolatedActions class
+    """
+    contexts = _get_cache()
+    if contexts is not None and contexts.pop(_get_context_key(context), None) is not None:
+        _store_cache_file()
+
+
+def _has_entitlement_certs(context):
+    """
+    Check whether there are any entitlement certificates inside the context.
+
+    :return: True or False, None if the entitlement directory cannot be read (e.g. RHSM is not installed)
+    """
+    try:
+        filenames = os.listdir(context.full_path(_ENTITLEMENT_DIR))
+    except OSError:
+        return None
+    return any(f.endswith('.pem') and not f.endswith('-key.pem') for f in filenames)
+
+
 def skip_rhsm():
     """Check whether we should skip RHSM related code."""
     return get_env('LEAPP_NO_RHSM', '0') == '1'
@@ -117,8 +231,11 @@ def get_attached_skus(context):
     :return: SKUs the current system is attached to.
     :rtype: List(string)
     """
+    if _has_entitlement_certs(context) is False:
+        # subscriptions are consumed through entitlement certificates, no need to ask subscription-manager
+        return []
     with _handle_rhsm_exceptions():
-        result = context.call(['subscription-manager', 'list', '--consumed'], split=False)
+        result = _call_cached(context, ['subscription-manager', 'list', '--consumed'], split=False)
         return _RE_SKU_CONSUMED.findall(result['stdout'])
 
 
@@ -133,7 +250,7 @@ def get_rhsm_status(context):
     :rtype: String
     """
     with _handle_rhsm_exceptions():
-        result = context.call(['subscription-manager', 'status'])
+        result = _call_cached(context, ['subscription-manager', 'status'])
         return result['stdout']
 
 
@@ -245,7 +362,7 @@ def get_enabled_repo_ids(context):
     :rtype: List(string)
     """
     with _handle_rhsm_exceptions():
-        result = context.call(['subscription-manager', 'repos', '--list-enabled'], split=False)
+        result = _call_cached(context, ['subscription-manager', 'repos', '--list-enabled'], split=False)
         return _RE_REPO_UID.findall(result['stdout'])
 
 
@@ -258,8 +375,11 @@ def unset_release(context):
     :param context: An instance of a mounting.IsolatedActions class
     :type context: mounting.IsolatedActions class
     """
-    with _handle_rhsm_exceptions():
-        context.call(['subscription-manager', 'release', '--unset'], split=False)
+    try:
+        with _handle_rhsm_exceptions():
+            context.call(['subscription-manager', 'release', '--unset'], split=False)
+    finally:
+        invalidate_cache(context)
 
 
 @with_rhsm
@@ -273,8 +393,11 @@ def set_release(context, release):
     :param release: Release to set the subscription-manager to.
     :type release: str
     """
-    with _handle_rhsm_exceptions():
-        context.call(['subscription-manager', 'release', '--set', release], split=False)
+    try:
+        with _handle_rhsm_exceptions():
+            context.call(['subscription-manager', 'release', '--set', release], split=False)
+    finally:
+        invalidate_cache(context)
 
 
 @with_rhsm
@@ -288,7 +411,7 @@ def get_release(context):
     :rtype: string
     """
     with _handle_rhsm_exceptions():
-        result = context.call(['subscription-manager', 'release'], split=False)
+        result = _call_cached(context, ['subscription-manager', 'release'], split=False)
         result = _RE_RELEASE.findall(result['stdout'])
         return result[0] if result else ''
 
@@ -302,8 +425,11 @@ def refresh(context):
     :param context: An instance of a mounting.IsolatedActions class
     :type context: mounting.IsolatedActions class
     """
-    with _handle_rhsm_exceptions():
-        context.call(['subscription-manager', 'refresh'], split=False)
+    try:
+        with _handle_rhsm_exceptions():
+            context.call(['subscription-manager', 'refresh'], split=False)
+    finally:
+        invalidate_cache(context)
 
 
 @with_rhsm
@@ -401,6 +527,7 @@ def switch_certificate(context, rhsm_info, cert_path):
     for path in ('/etc/pki/product', '/etc/pki/product-default'):
         if os.path.isdir(context.full_path(path)):
             context.copy_to(cert_path, os.path.join(path, os.path.basename(cert_path)))
+    invalidate_cache(context)
 
 
 def is_rhsm_registered(context):
@@ -408,16 +535,19 @@ def is_rhsm_registered(context):
     Check whether the system is registered with Red Hat Subscription Manager
 
     Note that this doesn't differentiate between SCA and SKU access.
-    If subscription-manager isn't installed it's assumed the system is not
-    registered and false is returned.
+    If subscription-manager isn't installed or the consumer certificate is
+    missing it's assumed the system is not registered and false is returned.
 
     :param context: An instance of a mounting.IsolatedActions class
     :type context: mounting.IsolatedActions class
     :return: True if it is registered, false otherwise
     :rtype: bool
     """
+    if not os.path.exists(context.full_path(_CONSUMER_CERT)):
+        # the consumer certificate is created when the system is registered
+        return False
     try:
-        result = context.call(['subscription-manager', 'identity'], checked=False)
+        result = _call_cached(context, ['subscription-manager', 'identity'], checked=False)
     except OSError as e:
         api.current_logger().error('Failed to execute subscription-manager executable: {}'.format(e))
         return False
@@ -1,7 +1,17 @@
+import os
+import re
+import warnings
+
 from leapp.libraries import stdlib
 from leapp.libraries.common.config.version import get_source_major_version
 from leapp.models import InstalledRPM
 
+try:
+    import rpm
+except ImportError:
+    rpm = None
+    warnings.warn('Could not import the `rpm` python module.', ImportWarning)
+
 
 class LeappComponents:
     """
@@ -74,15 +84,17 @@ def get_installed_rpms():
         return []
 
 
-def create_lookup(model, field, keys, context=stdlib.api):
-    """
-    Create a lookup set from one of the model fields.
+_LOOKUP_CACHE = {}
+"""
+Lookup sets built from messages consumed via stdlib.api, see _get_lookup
 
-    :param model: model class
-    :param field: model field, its value will be taken for lookup data
-    :param key: property of the field's data that will be used to build a resulting set
-    :param context: context of the execution
-    """
+Messages consumed by an actor do not change during its execution, so the sets
+are reused until messages are consumed by another actor (or the consume
+function is replaced, e.g. in tests).
+"""
+
+
+def _build_lookup(model, field, keys, context):
     data = getattr(next((m for m in context.consume(model)), model()), field)
     try:
         return {tuple(getattr(obj, key) for key in keys) for obj in data} if data else set()
@@ -94,12 +106,54 @@ def create_lookup(model, field, keys, context=stdlib.api):
         return set()
 
 
+def _get_lookup(model, field, keys, context):
+    """
+    Get the lookup set described by parameters of create_lookup, memoized when possible.
+
+    Only lookups from messages consumed via stdlib.api are memoized. Other
+    contexts (e.g. the ActorContext used in tests) can provide different
+    messages each time, so the lookup is always built from scratch for them.
+
+    The returned set must not be modified.
+    """
+    if context is not stdlib.api:
+        return _build_lookup(model, field, keys, context)
+
+    cache_key = (model, field, tuple(keys))
+    owner = (stdlib.api.current_actor(), stdlib.api.consume)
+    cached = _LOOKUP_CACHE.get(cache_key)
+    if cached and cached[0][0] is owner[0] and cached[0][1] is owner[1]:
+        return cached[1]
+
+    lookup = frozenset(_build_lookup(model, field, keys, context))
+    _LOOKUP_CACHE[cache_key] = (owner, lookup)
+    return lookup
+
+
+def create_lookup(model, field, keys, context=stdlib.api):
+    """
+    Create a lookup set from one of the model fields.
+
+    The set is built only once per actor when messages are consumed via
+    stdlib.api, subsequent calls just copy it.
+
+    :param model: model class
+    :param field: model field, its value will be taken for lookup data
+    :param key: property of the field's data that will be used to build a resulting set
+    :param context: context of the execution
+    """
+    return set(_get_lookup(model, field, keys, context))
+
+
 def has_package(model, package_name, arch=None, version=None, release=None, context=stdlib.api):
     """
     Expects a DistributionSignedRPM or ThirdPartyRPM model.
     Can be useful in cases like a quick item presence check, ex. check in actor that
     a certain package is installed.
 
+    The lookup of packages is built just once per actor and combination of
+    the used filters, so the function can be called repeatedly.
+
     :param model: model class
     :param package_name: package to be checked
     :param arch: filter by architecture. None means all arches.
@@ -118,44 +172,107 @@ def has_package(model, package_name, arch=None, version=None, release=None, cont
 
     attributes = [package_name]
     attributes += [attr for attr in (arch, version, release) if attr is not None]
-    rpm_lookup = create_lookup(model, field='items', keys=keys, context=context)
+    rpm_lookup = _get_lookup(model, field='items', keys=keys, context=context)
     return tuple(attributes) in rpm_lookup
 
 
-def _read_rpm_modifications(config):
+_VERIFY_LINE_RE = re.compile(r'^(?P<status>\S+)\s+(?:[a-z]\s+)?(?P<path>/.*?)(?: \([^)]*\))?$')
+_NOT_OWNED_LINE_RE = re.compile(r'^file (?P<path>/.*) is not owned by any package$')
+
+_VERIFY_CACHE = {}
+"""
+Results of the rpm verification of files for the current actor, see _get_verify_cache
+
+Files are verified once per actor, no matter how many times they are checked.
+"""
+
+
+def _get_verify_cache():
+    """
+    Get results of the rpm verification of files done by the current actor: path -> status
+
+    The results are dropped when files are verified by another actor (or
+    the current actor is replaced, e.g. in tests), as the files could have
+    been modified meanwhile.
+    """
+    actor = stdlib.api.current_actor()
+    if _VERIFY_CACHE.get('owner') is not actor:
+        _VERIFY_CACHE.clear()
+        _VERIFY_CACHE.update(owner=actor, statuses={})
+    return _VERIFY_CACHE['statuses']
+
+
+def _run_rpm_verify(paths):
     """
-    Ask RPM database whether the configuration file was modified.
+    Verify packages owning the given files in one rpm call.
 
-    :param config: a config file to check
+    :param paths: files to verify
+    :return: lines of the rpm verify output or None when rpm cannot be executed
     """
     try:
-        return stdlib.run(['rpm', '-Vf', config], split=True, checked=False)['stdout']
+        return stdlib.run(['rpm', '-Vf', '--nomtime'] + list(paths), split=True, checked=False)['stdout']
     except OSError as err:
-        error = 'Failed to check the modification status of the file {}: {}'.format(config, str(err))
+        error = 'Failed to check the modification status of files {}: {}'.format(', '.join(paths), str(err))
         stdlib.api.current_logger().error(error)
-        return []
+        return None
 
 
-def _parse_config_modification(data, config):
+def _parse_rpm_verify_output(data):
     """
-    Handle the output of rpm verify command to figure out if configuration file was modified.
+    Parse the output of the rpm verify command.
+
+    Packages owning the verified files are verified completely, so the output
+    can contain other files of these packages too.
 
     :param data: output of the rpm verify
-    :param config: a config file to check
+    :return: mapping of paths of listed files to their verification status,
+             e.g. 'S.5......' or 'missing'; files not owned by any package have
+             an empty status
+    :rtype: dict
     """
-
-    # First assume it is not modified -- empty data says it is not modified
-    modified = False
+    statuses = {}
     for line in data:
-        parts = line.split(' ')
-        # The last part of the line is the actual file we care for
-        if parts[-1] == config:
-            # First part contains information, if the size and digest differ
-            if '5' in parts[0] or 'S' in parts[0]:
-                modified = True
-        # Ignore any other files lurking here
+        match = _NOT_OWNED_LINE_RE.match(line) or _VERIFY_LINE_RE.match(line)
+        if not match:
+            continue
+        statuses[match.group('path')] = match.groupdict().get('status', '')
+    return statuses
+
 
-    return modified
+def verify_files(paths):
+    """
+    Verify the given files against the RPM database.
+
+    All files not verified yet by the current actor are verified in a single
+    rpm call (ignoring modification times), results are memoized for the rest
+    of the actor execution. Pass all files an actor is going to check at once
+    to save rpm executions.
+
+    :param paths: files to verify
+    :type paths: Iterable[str]
+    :return: mapping of the given paths to their verification status. The status
+             is an empty string when the file matches the RPM database or it is not
+             owned by any package; otherwise it is 'missing' or the string of failed
+             checks as printed by rpm, e.g. 'S.5......'.
+    :rtype: dict
+    """
+    paths = list(paths)
+    cache = _get_verify_cache()
+    to_verify = sorted({path for path in paths if path not in cache})
+    if to_verify:
+        output = _run_rpm_verify(to_verify)
+        if output is None:
+            return {path: cache.get(path, '') for path in paths}
+        statuses = _parse_rpm_verify_output(output)
+        cache.update(statuses)
+        for path in to_verify:
+            cache.setdefault(path, '')
+    return {path: cache[path] for path in paths}
+
+
+def _is_config_modified(status):
+    # Size or digest of the file differ
+    return '5' in status or 'S' in status
 
 
 def check_file_modification(config):
@@ -167,8 +284,77 @@ def check_file_modification(config):
 
     :param config: The configuration file to check
     """
-    output = _read_rpm_modifications(config)
-    return _parse_config_modification(output, config)
+    return _is_config_modified(verify_files([config])[config])
+
+
+_FILES_INDEX_CACHE = {}
+"""
+Indexes of files installed by rpms for the current actor, see _get_files_index_cache
+"""
+
+
+def _get_files_index_cache():
+    """
+    Get indexes of files installed by rpms built by the current actor: (prefixes, suffixes) -> index
+
+    The indexes are dropped when used by another actor (or the current actor
+    is replaced, e.g. in tests), as packages could have been installed or
+    removed meanwhile.
+    """
+    actor = stdlib.api.current_actor()
+    if _FILES_INDEX_CACHE.get('owner') is not actor:
+        _FILES_INDEX_CACHE.clear()
+        _FILES_INDEX_CACHE.update(owner=actor, indexes={})
+    return _FILES_INDEX_CACHE['indexes']
+
+
+def _get_rpm_headers():
+    return rpm.TransactionSet().dbMatch()
+
+
+def get_rpm_files_index(prefixes, suffixes=None):
+    """
+    Get the index of files installed by rpms inside the given directory trees.
+
+    Directories of each installed package are compared with the prefixes
+    first and paths of files are built just for the matching directories,
+    which is much faster than going through full lists of files of all
+    installed packages. The index is built once per actor for each
+    combination of prefixes and suffixes.
+
+    :param prefixes: Paths of the directory trees to index
+    :type prefixes: Iterable[str]
+    :param suffixes: Index only files with one of the suffixes, all files are indexed when None
+    :type suffixes: Iterable[str] or None
+    :return: Mapping of absolute paths of files to names of packages owning them.
+             The returned dict must not be modified.
+    :rtype: dict
+    """
+    # add a trailing slash by calling os.path.join(..., '')
+    roots = tuple(sorted({os.path.join(str(prefix), '') for prefix in prefixes}))
+    suffixes = tuple(sorted(set(suffixes))) if suffixes is not None else None
+    cache_key = (roots, suffixes)
+    cache = _get_files_index_cache()
+    if cache_key in cache:
+        return cache[cache_key]
+
+    index = {}
+    if not rpm:
+        stdlib.api.current_logger().warning('Cannot index files installed by rpms: rpm python module is missing.')
+        return index
+
+    for header in _get_rpm_headers():
+        dirnames = header['dirnames']
+        matching_dirs = [dirname.startswith(roots) for dirname in dirnames]
+        if not any(matching_dirs):
+            continue
+        name = header['name']
+        for basename, dirindex in zip(header['basenames'], header['dirindexes']):
+            if matching_dirs[dirindex] and (suffixes is None or basename.endswith(suffixes)):
+                index[dirnames[dirindex] + basename] = name
+
+    cache[cache_key] = index
+    return index
 
 
 def _get_leapp_packages_of_type(major_version, component, type_='pkgs'):
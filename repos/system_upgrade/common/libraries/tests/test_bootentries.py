@@ -0,0 +1,225 @@
+import os
+
+import pytest
+
+from leapp.libraries import stdlib
+from leapp.libraries.common import bootentries
+from leapp.libraries.common.config import architecture
+from leapp.libraries.common.testutils import CurrentActorMocked, logger_mocked
+from leapp.libraries.stdlib import api
+
+MACHINE_ID = 'f6f57ac447784f60ba924dfbd5776a1b'
+OLD_VERSION = '5.14.0-70.el9.x86_64'
+NEW_VERSION = '5.14.0-362.el9.x86_64'
+
+BLS_TEMPLATE = """title Red Hat Enterprise Linux ({version}) 9
+version {version}
+linux {boot}/vmlinuz-{version}
+initrd {boot}/initramfs-{version}.img $tuned_initrd
+options $kernelopts $tuned_params
+grub_users $grub_users
+grub_arg --unrestricted
+grub_class rhel
+"""
+
+GRUBENV_TEMPLATE = """# GRUB Environment Block
+saved_entry={saved_entry}
+kernelopts=root=/dev/mapper/rhel-root ro crashkernel=auto rhgb quiet
+boot_success=0
+"""
+
+GRUBBY_INFO_OUTPUT = """index=0
+kernel="/boot/vmlinuz-{new}"
+args="ro rhgb quiet"
+root="/dev/mapper/rhel-root"
+initrd="/boot/initramfs-{new}.img $tuned_initrd"
+title="Red Hat Enterprise Linux ({new}) 9"
+id="{machine_id}-{new}"
+index=1
+kernel="/boot/vmlinuz-{old}"
+args="ro"
+root="/dev/mapper/rhel-root"
+initrd="/boot/initramfs-{old}.img"
+title="Red Hat Enterprise Linux ({old}) 9"
+id="{machine_id}-{old}"
+""".format(new=NEW_VERSION, old=OLD_VERSION, machine_id=MACHINE_ID)
+
+
+class MockedRun(object):
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, cmd, *args, **kwargs):
+        self.commands.append(cmd)
+        if cmd == ['grubby', '--info', 'ALL']:
+            return {'stdout': GRUBBY_INFO_OUTPUT}
+        if cmd == ['grubby', '--default-index']:
+            return {'stdout': '1\n'}
+        assert False, 'Unexpected command: {}'.format(cmd)
+        return None
+
+
+@pytest.fixture
+def boot_dir(monkeypatch, tmp_path):
+    """
+    Redirect the boot loader configuration and the snapshot file into tmp_path
+    """
+    boot = tmp_path / 'boot'
+    entries_dir = boot / 'loader' / 'entries'
+    entries_dir.mkdir(parents=True)
+    for version in (OLD_VERSION, NEW_VERSION):
+        (boot / 'vmlinuz-{}'.format(version)).write_text('kernel')
+        (entries_dir / '{}-{}.conf'.format(MACHINE_ID, version)).write_text(
+            BLS_TEMPLATE.format(version=version, boot=str(boot))
+        )
+    write_grubenv(boot, '{}-{}'.format(MACHINE_ID, OLD_VERSION))
+    (tmp_path / 'default_grub').write_text('GRUB_TIMEOUT=5\nGRUB_ENABLE_BLSCFG="true"\n')
+
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(arch=architecture.ARCH_X86_64))
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(stdlib, 'run', MockedRun())
+    monkeypatch.setattr(bootentries, 'BLS_ENTRIES_DIR', str(entries_dir))
+    monkeypatch.setattr(bootentries, 'GRUBENV_PATH', str(boot / 'grubenv'))
+    monkeypatch.setattr(bootentries, 'ZIPL_CONFIG_PATH', str(tmp_path / 'zipl.conf'))
+    monkeypatch.setattr(bootentries, 'DEFAULT_GRUB_PATH', str(tmp_path / 'default_grub'))
+    monkeypatch.setattr(bootentries, 'BOOT_ENTRIES_SNAPSHOT_PATH', str(tmp_path / 'boot_entries_snapshot.json'))
+    monkeypatch.setattr(bootentries, '_SNAPSHOT_CACHE', {})
+    monkeypatch.setattr(bootentries, '_get_path_prefix', lambda: '')
+    monkeypatch.setenv('LEAPP_EXECUTION_ID', 'execution-1')
+    return boot
+
+
+def write_grubenv(boot, saved_entry):
+    content = GRUBENV_TEMPLATE.format(saved_entry=saved_entry)
+    (boot / 'grubenv').write_text(content + '#' * (1024 - len(content)))
+
+
+def test_parse_bls_entries(boot_dir):
+    entries = bootentries.get_boot_entries()
+
+    assert [entry.index for entry in entries] == [0, 1]
+    assert [entry.id for entry in entries] == [
+        '{}-{}'.format(MACHINE_ID, NEW_VERSION), '{}-{}'.format(MACHINE_ID, OLD_VERSION)
+    ]
+    new_entry = entries[0]
+    assert new_entry.title == 'Red Hat Enterprise Linux ({}) 9'.format(NEW_VERSION)
+    assert new_entry.kernel == str(boot_dir / 'vmlinuz-{}'.format(NEW_VERSION))
+    assert new_entry.root == '/dev/mapper/rhel-root'
+    assert new_entry.args == 'ro crashkernel=auto rhgb quiet'
+    assert new_entry.initrd == '{}/initramfs-{}.img $tuned_initrd'.format(boot_dir, NEW_VERSION)
+
+    assert bootentries.get_default_boot_entry() == entries[1]
+    assert bootentries.get_kernel_boot_entries(new_entry.kernel) == [new_entry]
+    assert bootentries.get_kernel_boot_entries('/boot/vmlinuz-missing') == []
+    assert not stdlib.run.commands
+
+
+@pytest.mark.parametrize('saved_entry, expected_index', (
+    ('', 0),
+    ('1', 1),
+    ('{}-{}'.format(MACHINE_ID, NEW_VERSION), 0),
+    ('Red Hat Enterprise Linux ({}) 9'.format(OLD_VERSION), 1),
+))
+def test_default_boot_entry(boot_dir, saved_entry, expected_index):
+    write_grubenv(boot_dir, saved_entry)
+    assert bootentries.get_default_boot_entry().index == expected_index
+
+
+def test_default_boot_entry_zipl(monkeypatch, boot_dir, tmp_path):
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked(arch=architecture.ARCH_S390X))
+    (tmp_path / 'zipl.conf').write_text('[defaultboot]\ndefaultauto\ndefault={}-{}\n'.format(MACHINE_ID, NEW_VERSION))
+    # zipl always uses BLS snippets
+    (tmp_path / 'default_grub').unlink()
+
+    entry = bootentries.get_default_boot_entry()
+
+    assert entry.index == 0
+    # grubenv variables are not used by zipl
+    assert entry.args == ''
+    assert not stdlib.run.commands
+
+
+@pytest.mark.parametrize('broken', (
+    'no_entries', 'missing_kernel', 'unknown_default', 'blscfg_disabled', 'no_default_grub'
+))
+def test_grubby_fallback(boot_dir, tmp_path, broken):
+    if broken == 'blscfg_disabled':
+        # legacy grubby reads grub.cfg, BLS snippets can be stale
+        (tmp_path / 'default_grub').write_text('GRUB_TIMEOUT=5\nGRUB_ENABLE_BLSCFG=false\n')
+    elif broken == 'no_default_grub':
+        (tmp_path / 'default_grub').unlink()
+    elif broken == 'no_entries':
+        for path in (boot_dir / 'loader' / 'entries').iterdir():
+            path.unlink()
+    elif broken == 'missing_kernel':
+        (boot_dir / 'vmlinuz-{}'.format(OLD_VERSION)).unlink()
+    else:
+        write_grubenv(boot_dir, 'unknown-entry')
+
+    entries = bootentries.get_boot_entries()
+
+    assert stdlib.run.commands == [['grubby', '--info', 'ALL'], ['grubby', '--default-index']]
+    assert [entry.kernel for entry in entries] == [
+        '/boot/vmlinuz-{}'.format(NEW_VERSION), '/boot/vmlinuz-{}'.format(OLD_VERSION)
+    ]
+    assert bootentries.get_default_boot_entry() == entries[1]
+
+
+def test_grubby_fallback_error(monkeypatch, boot_dir):
+    def failing_run(cmd, *args, **kwargs):
+        raise stdlib.CalledProcessError('Simulated grubby error', cmd, {'exit_code': 1})
+
+    monkeypatch.setattr(bootentries, 'BLS_ENTRIES_DIR', str(boot_dir / 'missing'))
+    monkeypatch.setattr(stdlib, 'run', failing_run)
+
+    with pytest.raises(stdlib.CalledProcessError):
+        bootentries.get_boot_entries()
+
+
+def test_snapshot_reused(monkeypatch, boot_dir):
+    parse_calls = []
+    orig_parse_bls_entries = bootentries._parse_bls_entries
+
+    def parse_bls_entries_counted():
+        parse_calls.append(True)
+        return orig_parse_bls_entries()
+
+    monkeypatch.setattr(bootentries, '_parse_bls_entries', parse_bls_entries_counted)
+
+    entries = bootentries.get_boot_entries()
+    bootentries.get_default_boot_entry()
+    assert len(parse_calls) == 1
+    assert os.path.exists(bootentries.BOOT_ENTRIES_SNAPSHOT_PATH)
+
+    # another actor (process) loads the stored snapshot
+    monkeypatch.setattr(bootentries, '_SNAPSHOT_CACHE', {})
+    assert bootentries.get_boot_entries() == entries
+    assert len(parse_calls) == 1
+
+    # a modified grubenv changes the snapshot key
+    write_grubenv(boot_dir, '0')
+    os.utime(str(boot_dir / 'grubenv'), ns=(0, 0))
+    assert bootentries.get_default_boot_entry().index == 0
+    assert len(parse_calls) == 2
+
+    bootentries.invalidate()
+    assert not os.path.exists(bootentries.BOOT_ENTRIES_SNAPSHOT_PATH)
+    bootentries.get_boot_entries()
+    assert len(parse_calls) == 3
+
+
+def test_parse_grubby_info():
+    entries = bootentries.parse_grubby_info(GRUBBY_INFO_OUTPUT)
+
+    assert len(entries) == 2
+    assert entries[0] == bootentries.BootEntry(
+        index=0,
+        id='{}-{}'.format(MACHINE_ID, NEW_VERSION),
+        title='Red Hat Enterprise Linux ({}) 9'.format(NEW_VERSION),
+        kernel='/boot/vmlinuz-{}'.format(NEW_VERSION),
+        args='ro rhgb quiet',
+        root='/dev/mapper/rhel-root',
+        initrd='/boot/initramfs-{}.img $tuned_initrd'.format(NEW_VERSION),
+    )
+    # values missing in the output are empty
+    assert bootentries.parse_grubby_info('index=0\nkernel=/boot/vmlinuz\n')[0].args == ''
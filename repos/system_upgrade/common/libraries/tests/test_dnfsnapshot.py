@@ -0,0 +1,185 @@
+import os
+
+import pytest
+
+from leapp.libraries.common.dnflibs import dnfsnapshot
+from leapp.libraries.common.testutils import logger_mocked
+from leapp.libraries.stdlib import api
+
+
+class MockCompsEntry(object):
+    def __init__(self, entry_id, ui_name):
+        self.id = entry_id
+        self.ui_name = ui_name
+
+
+class MockComps(object):
+    def __init__(self, groups, environments):
+        self._groups = groups
+        self._environments = environments
+
+    def groups_iter(self):
+        return iter(self._groups)
+
+    def environments_iter(self):
+        return iter(self._environments)
+
+
+class MockHistoryLookup(object):
+    def __init__(self, installed_ids):
+        self._installed = set(installed_ids)
+
+    def get(self, item_id):
+        return item_id in self._installed
+
+
+class MockHistory(object):
+    def __init__(self, installed_group_ids, installed_env_ids):
+        self.group = MockHistoryLookup(installed_group_ids)
+        self.env = MockHistoryLookup(installed_env_ids)
+
+
+class MockPackage(object):
+    def __init__(self, name, from_repo):
+        self.name = name
+        self._from_repo = from_repo
+
+
+class MockQuery(object):
+    def __init__(self, installed):
+        self._installed = installed
+
+    def installed(self):
+        return iter(self._installed)
+
+
+class MockModuleContainer(object):
+    def __init__(self, enabled):
+        self._enabled = enabled
+
+    def isEnabled(self, module):
+        return module.getName() in self._enabled
+
+
+class MockSack(object):
+    def __init__(self, installed, enabled_modules):
+        self._installed = installed
+        self._moduleContainer = MockModuleContainer(enabled_modules)
+
+    def query(self):
+        return MockQuery(self._installed)
+
+
+class MockModule(object):
+    def __init__(self, name, stream, artifacts):
+        self._name = name
+        self._stream = stream
+        self._artifacts = artifacts
+
+    def getName(self):
+        return self._name
+
+    def getStream(self):
+        return self._stream
+
+    def getArtifacts(self):
+        return self._artifacts
+
+
+class MockDNFBase(object):
+    def __init__(self):
+        self.comps = MockComps(
+            groups=[MockCompsEntry('core', 'Core'), MockCompsEntry('base', 'Base'), MockCompsEntry('extra', 'Extra')],
+            environments=[MockCompsEntry('minimal-environment', 'Minimal Install'),
+                          MockCompsEntry('server-product-environment', 'Server')],
+        )
+        self.history = MockHistory(installed_group_ids=['core', 'base'],
+                                   installed_env_ids=['server-product-environment'])
+        self.sack = MockSack(installed=[MockPackage('bash', '@anaconda'), MockPackage('perl', 'appstream')],
+                             enabled_modules=['perl'])
+
+
+MODULES = [
+    MockModule('perl', '5.32', ['perl-4:5.32.1-471.module+el8.6.0+13324+628a2397.x86_64']),
+    MockModule('nodejs', '18', ['nodejs-1:18.19.0-1.module+el8.9.0+20867+27bf7d0b.x86_64']),
+]
+
+
+@pytest.fixture
+def snapshot_env(monkeypatch, tmp_path):
+    """
+    Redirect the snapshot file and its inputs into tmp_path and count created dnf.Base objects
+    """
+    inputs_dir = tmp_path / 'rpm'
+    inputs_dir.mkdir()
+    (inputs_dir / 'rpmdb.sqlite').write_text('rpmdb')
+    (inputs_dir / 'rpmdb.sqlite-shm').write_text('shm')
+    created_bases = []
+
+    def create_dnf_base_mocked():
+        created_bases.append(MockDNFBase())
+        return created_bases[-1]
+
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(dnfsnapshot, 'dnf', True)
+    monkeypatch.setattr(dnfsnapshot, 'create_dnf_base', create_dnf_base_mocked)
+    monkeypatch.setattr(dnfsnapshot.dnfmodule, 'get_modules', lambda base: MODULES)
+    monkeypatch.setattr(dnfsnapshot, 'DNF_SNAPSHOT_PATH', str(tmp_path / 'dnf_snapshot.json'))
+    monkeypatch.setattr(dnfsnapshot, 'DNF_SNAPSHOT_INPUT_PATHS', (str(inputs_dir),))
+    monkeypatch.setattr(dnfsnapshot, '_SNAPSHOT_CACHE', {})
+    monkeypatch.setenv('LEAPP_EXECUTION_ID', 'execution-1')
+    return inputs_dir, created_bases
+
+
+def test_snapshot_data(snapshot_env):
+    assert dnfsnapshot.get_installed_packages_repositories() == {'bash': 'anaconda', 'perl': 'appstream'}
+    assert dnfsnapshot.get_module_streams() == [
+        dnfsnapshot.ModuleStream('perl', '5.32', True, ['perl-4:5.32.1-471.module+el8.6.0+13324+628a2397.x86_64']),
+        dnfsnapshot.ModuleStream('nodejs', '18', False, ['nodejs-1:18.19.0-1.module+el8.9.0+20867+27bf7d0b.x86_64']),
+    ]
+    groups, environments = dnfsnapshot.get_installed_comps()
+    assert groups == [dnfsnapshot.CompsEntry('base', 'Base'), dnfsnapshot.CompsEntry('core', 'Core')]
+    assert environments == [dnfsnapshot.CompsEntry('server-product-environment', 'Server')]
+
+
+def test_snapshot_reused(monkeypatch, snapshot_env):
+    inputs_dir, created_bases = snapshot_env
+
+    dnfsnapshot.get_installed_packages_repositories()
+    dnfsnapshot.get_module_streams()
+    dnfsnapshot.get_installed_comps()
+    assert len(created_bases) == 1
+    assert os.path.exists(dnfsnapshot.DNF_SNAPSHOT_PATH)
+
+    # another actor (process) loads the stored snapshot
+    monkeypatch.setattr(dnfsnapshot, '_SNAPSHOT_CACHE', {})
+    # files changed by read-only access to databases are ignored
+    (inputs_dir / 'rpmdb.sqlite-shm').write_text('changed')
+    assert dnfsnapshot.get_installed_packages_repositories() == {'bash': 'anaconda', 'perl': 'appstream'}
+    assert len(created_bases) == 1
+
+
+@pytest.mark.parametrize('change', ('rpmdb', 'execution_id', 'corrupted'))
+def test_snapshot_invalidated(monkeypatch, snapshot_env, change):
+    inputs_dir, created_bases = snapshot_env
+    dnfsnapshot.get_snapshot()
+    assert len(created_bases) == 1
+
+    monkeypatch.setattr(dnfsnapshot, '_SNAPSHOT_CACHE', {})
+    if change == 'rpmdb':
+        (inputs_dir / 'rpmdb.sqlite').write_text('rpmdb with a new package')
+    elif change == 'execution_id':
+        monkeypatch.setenv('LEAPP_EXECUTION_ID', 'execution-2')
+    else:
+        with open(dnfsnapshot.DNF_SNAPSHOT_PATH, 'w') as f:
+            f.write('{"key": ')
+
+    dnfsnapshot.get_snapshot()
+    assert len(created_bases) == 2
+
+
+def test_snapshot_no_dnf(monkeypatch):
+    monkeypatch.setattr(dnfsnapshot, 'dnf', None)
+    assert dnfsnapshot.get_installed_packages_repositories() == {}
+    assert dnfsnapshot.get_module_streams() == []
+    assert dnfsnapshot.get_installed_comps() == ([], [])
@@ -1,4 +1,6 @@
 import os
+import struct
+import uuid
 
 import pytest
 
@@ -76,6 +78,15 @@ EFIBOOTMGR_OUTPUT_ENTRIES = {
 }
 
 
+@pytest.fixture(autouse=True)
+def no_efivarfs(monkeypatch, tmp_path):
+    """
+    Do not read UEFI variables of the host, the efibootmgr output is used instead by default
+    """
+    monkeypatch.setattr(efi, 'EFIVARS_DIR', str(tmp_path / 'efivars'))
+    monkeypatch.setattr(efi, '_BOOT_VARIABLES_CACHE', {})
+
+
 def raise_call_error(args=None):
     raise CalledProcessError(
         message='A Leapp Command Error occurred.',
@@ -248,6 +259,83 @@ def test_EFIBootInfo_success(monkeypatch):
     assert efibootinfo.entries == EFIBOOTMGR_OUTPUT_ENTRIES
 
 
+def _device_path_node(node_type, subtype, data):
+    return struct.pack('<BBH', node_type, subtype, len(data) + 4) + data
+
+
+def _load_option(label, active, device_path_nodes):
+    device_path = b''.join(device_path_nodes) + _device_path_node(0x7f, 0xff, b'')
+    return (struct.pack('<IH', efi.LOAD_OPTION_ACTIVE if active else 0, len(device_path))
+            + (label + '\0').encode('utf-16-le') + device_path + b'optional data')
+
+
+def _write_efi_variable(efivars_dir, name, value):
+    path = efivars_dir / '{}-{}'.format(name, efi.EFI_GLOBAL_VARIABLE_GUID)
+    # the value is prefixed by attributes of the variable
+    path.write_bytes(struct.pack('<I', 7) + value)
+
+
+def test_EFIBootInfo_efivarfs(monkeypatch, tmp_path):
+    efivars = tmp_path / 'efivars'
+    efivars.mkdir()
+    hd_node = _device_path_node(4, 1, struct.pack(
+        '<IQQ16sBB', 1, 0x800, 0x12c000, uuid.UUID('050609f2-0ad0-43cf-8cdf-e53132b898c9').bytes_le, 2, 2
+    ))
+    file_node = _device_path_node(4, 4, '\\EFI\\REDHAT\\SHIMAA64.EFI\0'.encode('utf-16-le'))
+    venhw_node = _device_path_node(1, 4, uuid.UUID('99e275e7-75a0-4b37-a2e6-c5385e6c00cb').bytes_le)
+    _write_efi_variable(efivars, 'Boot0000', _load_option('redhat', False, [venhw_node]))
+    _write_efi_variable(efivars, 'Boot0006', _load_option('Red Hat Enterprise Linux', True, [hd_node, file_node]))
+    _write_efi_variable(efivars, 'Boot000A', _load_option('PXE', True, [_device_path_node(3, 11, b'\xd8\x5e')]))
+    _write_efi_variable(efivars, 'BootCurrent', struct.pack('<H', 6))
+    _write_efi_variable(efivars, 'BootOrder', struct.pack('<HHH', 6, 0, 10))
+    # variables of other vendors are ignored
+    (efivars / 'Boot0001-605dab50-e046-4300-abb6-3dd810dd8b23').write_bytes(b'\0' * 4)
+
+    monkeypatch.setattr(efi, 'is_efi', lambda: True)
+    monkeypatch.setattr(efi, 'run', RunMocked(raise_err=True))
+
+    efibootinfo = efi.EFIBootInfo()
+    assert efibootinfo.current_bootnum == '0006'
+    assert efibootinfo.next_bootnum is None
+    assert efibootinfo.boot_order == ('0006', '0000', '000A')
+    assert efibootinfo.entries == {
+        '0000': EFIBOOTMGR_OUTPUT_ENTRIES['0000'],
+        '0006': EFIBOOTMGR_OUTPUT_ENTRIES['0006'],
+        '000A': efi.EFIBootLoaderEntry('000A', 'PXE', True, 'Path(3,11,d85e)'),
+    }
+    assert efibootinfo.entries['0006'].get_canonical_path() == '/boot/efi/EFI/REDHAT/SHIMAA64.EFI'
+    assert efi.run.called == 0
+
+
+def test_EFIBootInfo_efivarfs_invalid(monkeypatch, tmp_path):
+    efivars = tmp_path / 'efivars'
+    efivars.mkdir()
+    _write_efi_variable(efivars, 'Boot0000', b'\x01\0\0\0\xff\0r\0')
+    monkeypatch.setattr(efi, 'is_efi', lambda: True)
+    monkeypatch.setattr(efi, 'run', RunMocked())
+
+    assert efi.EFIBootInfo().entries == EFIBOOTMGR_OUTPUT_ENTRIES
+    assert efi.run.called == 1
+
+
+def test_boot_variables_cached(monkeypatch):
+    monkeypatch.setattr(efi, 'is_efi', lambda: True)
+    mocked_run = RunMocked()
+    monkeypatch.setattr(efi, 'run', mocked_run)
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+
+    efi.EFIBootInfo()
+    efi.EFIBootInfo()
+    assert mocked_run.called == 1
+
+    # modification of boot variables invalidates the cache
+    monkeypatch.setattr(efi, 'run', lambda cmd: None)
+    efi.set_bootnext('0006')
+    monkeypatch.setattr(efi, 'run', mocked_run)
+    efi.EFIBootInfo()
+    assert mocked_run.called == 2
+
+
 class MockEFIBootInfo:
     def __init__(self, entries):
         assert len(entries) > 0
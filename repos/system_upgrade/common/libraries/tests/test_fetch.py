@@ -0,0 +1,101 @@
+import io
+import json
+
+import pytest
+
+from leapp.exceptions import StopActorExecutionError
+from leapp.libraries.common import fetch
+from leapp.libraries.common.testutils import CurrentActorMocked, produce_mocked
+from leapp.libraries.stdlib import api
+from leapp.models import ConsumedDataAsset
+
+DOCUMENT = {
+    'datetime': '202501010000Z',
+    'provided_data_streams': ['4.0'],
+    'packageinfo': [
+        {'id': 1, 'name': 'pkg1', 'nested': {'list': [1, 2, ']', '}']}},
+        {'id': 2, 'name': 'pkg"2', 'number': 12345},
+        {'id': 3, 'name': 'pkg3', 'values': [True, False, None, -1.5e3]},
+    ],
+    'timestamp': 1234567890,
+}
+
+
+class ActorMocked(CurrentActorMocked):
+    produces = (ConsumedDataAsset,)
+
+
+def _stream_fields(document, chunk_size, streamed_fields=('packageinfo',)):
+    stream = fetch._JSONObjectStream(io.StringIO(document), chunk_size=chunk_size)
+    return list(stream.iter_fields(streamed_fields=streamed_fields))
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2, 7, 64, fetch.STREAM_CHUNK_SIZE))
+@pytest.mark.parametrize('indent', (None, 4))
+def test_json_object_stream(chunk_size, indent):
+    fields = _stream_fields(json.dumps(DOCUMENT, indent=indent), chunk_size)
+
+    expected_fields = [('datetime', DOCUMENT['datetime']), ('provided_data_streams', ['4.0'])]
+    expected_fields += [('packageinfo', entry) for entry in DOCUMENT['packageinfo']]
+    expected_fields += [('timestamp', DOCUMENT['timestamp'])]
+    assert fields == expected_fields
+
+
+@pytest.mark.parametrize('document', ('{}', ' { "packageinfo" : [ ] } '))
+def test_json_object_stream_empty(document):
+    assert not _stream_fields(document, 1)
+
+
+@pytest.mark.parametrize('document', (
+    '',
+    '[1, 2]',
+    '{"packageinfo": 1}',
+    '{"packageinfo": [1, ]}',
+    '{"packageinfo": [1 2]}',
+    '{"datetime": 1',
+    '{"datetime": 1} extra',
+    '{1: 2}',
+))
+@pytest.mark.parametrize('chunk_size', (1, 5, fetch.STREAM_CHUNK_SIZE))
+def test_json_object_stream_invalid(document, chunk_size):
+    with pytest.raises(ValueError):
+        _stream_fields(document, chunk_size)
+
+
+def _mock_asset_file(monkeypatch, content):
+    monkeypatch.setattr(fetch.os.path, 'exists', lambda path: True)
+    monkeypatch.setattr(fetch.io, 'open', lambda path, encoding=None: io.StringIO(content))
+    monkeypatch.setattr(api, 'current_actor', ActorMocked())
+    monkeypatch.setattr(api, 'produce', produce_mocked())
+
+
+def test_stream_data_asset(monkeypatch):
+    _mock_asset_file(monkeypatch, json.dumps(DOCUMENT))
+
+    other_fields = {}
+    entries = fetch.stream_data_asset(api.current_actor(), 'pes-events.json', 'PES events file', '', '',
+                                      entries_field='packageinfo', other_fields=other_fields)
+    assert not api.produce.called
+
+    assert list(entries) == DOCUMENT['packageinfo']
+    assert other_fields == {key: value for key, value in DOCUMENT.items() if key != 'packageinfo'}
+    assert api.produce.called == 1
+    assert api.produce.model_instances[0].provided_data_streams == ['4.0']
+
+
+def test_stream_data_asset_missing_entries(monkeypatch):
+    _mock_asset_file(monkeypatch, json.dumps({'provided_data_streams': ['4.0']}))
+
+    entries = fetch.stream_data_asset(api.current_actor(), 'pes-events.json', 'PES events file', '', '',
+                                      entries_field='packageinfo')
+    with pytest.raises(ValueError):
+        list(entries)
+
+
+def test_stream_data_asset_invalid_json(monkeypatch):
+    _mock_asset_file(monkeypatch, '{"packageinfo": [{"id": 1}')
+
+    entries = fetch.stream_data_asset(api.current_actor(), 'pes-events.json', 'PES events file', '', '',
+                                      entries_field='packageinfo')
+    with pytest.raises(StopActorExecutionError):
+        list(entries)
@@ -0,0 +1,176 @@
+import errno
+import os
+import shutil
+import stat
+
+import pytest
+
+from leapp.libraries.common import filecopy
+from leapp.libraries.common.testutils import logger_mocked
+from leapp.libraries.stdlib import api
+
+
+@pytest.fixture
+def source_tree(tmp_path):
+    """
+    Create the following tree:
+
+    src/
+        file.txt (0640)
+        private/ (0700)
+            key (0600)
+        link_to_file -> file.txt
+        link_to_dir -> private
+    """
+    src = tmp_path / 'src'
+    src.mkdir()
+    (src / 'file.txt').write_text('text')
+    (src / 'file.txt').chmod(0o640)
+    (src / 'private').mkdir()
+    (src / 'private' / 'key').write_text('secret' * 1000)
+    (src / 'private' / 'key').chmod(0o600)
+    (src / 'private').chmod(0o700)
+    (src / 'link_to_file').symlink_to('file.txt')
+    (src / 'link_to_dir').symlink_to('private')
+    os.utime(str(src / 'file.txt'), (1000000000, 1000000000))
+    return src
+
+
+def _mode(path):
+    return stat.S_IMODE(os.lstat(str(path)).st_mode)
+
+
+@pytest.mark.parametrize('symlinks', (True, False))
+def test_copy_tree(monkeypatch, tmp_path, source_tree, symlinks):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    dst = tmp_path / 'parent' / 'dst'
+
+    filecopy.copy_tree(str(source_tree), str(dst), symlinks=symlinks)
+
+    assert (dst / 'file.txt').read_text() == 'text'
+    assert (dst / 'private' / 'key').read_text() == 'secret' * 1000
+    assert _mode(dst / 'file.txt') == 0o640
+    assert _mode(dst / 'private') == 0o700
+    assert _mode(dst / 'private' / 'key') == 0o600
+    assert os.stat(str(dst / 'file.txt')).st_mtime == 1000000000
+
+    assert (dst / 'link_to_file').is_symlink() == symlinks
+    assert (dst / 'link_to_dir').is_symlink() == symlinks
+    assert (dst / 'link_to_file').read_text() == 'text'
+    assert (dst / 'link_to_dir' / 'key').read_text() == 'secret' * 1000
+
+
+def test_copy_tree_dst_exists(tmp_path, source_tree):
+    with pytest.raises(OSError):
+        filecopy.copy_tree(str(source_tree), str(tmp_path))
+
+
+def test_copy_tree_errors_aggregated(monkeypatch, tmp_path, source_tree):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    (source_tree / 'broken').symlink_to('nonexistent')
+    dst = tmp_path / 'dst'
+
+    with pytest.raises(shutil.Error) as err:
+        filecopy.copy_tree(str(source_tree), str(dst))
+
+    assert [error[0] for error in err.value.args[0]] == [str(source_tree / 'broken')]
+    # the rest of the tree has been copied
+    assert (dst / 'file.txt').read_text() == 'text'
+    assert (dst / 'private' / 'key').read_text() == 'secret' * 1000
+
+
+@pytest.mark.parametrize('clone_supported, copy_file_range_supported', (
+    (True, True),
+    (False, True),
+    (False, False),
+))
+def test_copy_file_data_fallbacks(monkeypatch, tmp_path, clone_supported, copy_file_range_supported):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    used = []
+
+    def clone_mocked(src_fd, dst_fd):
+        used.append('clone')
+        if not clone_supported:
+            return False
+        os.write(dst_fd, os.read(src_fd, 1024))
+        return True
+
+    def copy_file_range_mocked(src_fd, dst_fd, count):
+        used.append('copy_file_range')
+        if not copy_file_range_supported:
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+        return os.write(dst_fd, os.read(src_fd, count))
+
+    monkeypatch.setattr(filecopy, '_clone_file_data', clone_mocked)
+    monkeypatch.setattr(filecopy.os, 'copy_file_range', copy_file_range_mocked, raising=False)
+
+    src = tmp_path / 'src'
+    src.write_text('data')
+    filecopy.copy_file(str(src), str(tmp_path / 'dst'))
+
+    assert (tmp_path / 'dst').read_text() == 'data'
+    expected_used = ['clone']
+    if not clone_supported:
+        expected_used.append('copy_file_range')
+    assert used[:len(expected_used)] == expected_used
+
+
+def test_copy_metadata_ignores_unsupported_xattrs(monkeypatch, tmp_path):
+    logger = logger_mocked()
+    monkeypatch.setattr(api, 'current_logger', logger)
+
+    def setxattr_mocked(*args, **kwargs):
+        raise OSError(errno.ENOTSUP, os.strerror(errno.ENOTSUP))
+
+    monkeypatch.setattr(filecopy.os, 'listxattr', lambda path, follow_symlinks=True: ['security.selinux'])
+    monkeypatch.setattr(filecopy.os, 'getxattr', lambda path, name, follow_symlinks=True: b'label')
+    monkeypatch.setattr(filecopy.os, 'setxattr', setxattr_mocked)
+
+    src = tmp_path / 'src'
+    src.write_text('data')
+    src.chmod(0o604)
+    filecopy.copy_file(str(src), str(tmp_path / 'dst'))
+
+    assert _mode(tmp_path / 'dst') == 0o604
+    assert any('security.selinux' in msg for msg in logger.dbgmsg)
+
+
+def test_copy_files(monkeypatch, tmp_path):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    files = []
+    for i in range(50):
+        src = tmp_path / 'src{}'.format(i)
+        src.write_text(str(i))
+        files.append((str(src), str(tmp_path / 'dst{}'.format(i))))
+    files.append((str(tmp_path / 'nonexistent'), str(tmp_path / 'dst-nonexistent')))
+
+    with pytest.raises(shutil.Error) as err:
+        filecopy.copy_files(files, workers=4)
+
+    assert len(err.value.args[0]) == 1
+    for i in range(50):
+        assert (tmp_path / 'dst{}'.format(i)).read_text() == str(i)
+
+
+@pytest.mark.parametrize('clone_supported', (True, False))
+def test_copy_sparse_file(monkeypatch, tmp_path, clone_supported):
+    if not clone_supported:
+        monkeypatch.setattr(filecopy, '_clone_file_data', lambda src_fd, dst_fd: False)
+    size = 64 * 1024 * 1024
+    src = tmp_path / 'src.img'
+    with open(str(src), 'wb') as f:
+        f.truncate(size)
+        f.write(b'header')
+        f.seek(size // 2)
+        f.write(b'middle')
+
+    dst = tmp_path / 'dst.img'
+    filecopy.copy_sparse_file(str(src), str(dst))
+
+    assert os.path.getsize(str(dst)) == size
+    with open(str(dst), 'rb') as f:
+        assert f.read(6) == b'header'
+        f.seek(size // 2)
+        assert f.read(6) == b'middle'
+    # holes are preserved
+    assert os.stat(str(dst)).st_blocks * 512 < size // 2
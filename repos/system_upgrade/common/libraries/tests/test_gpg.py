@@ -1,5 +1,7 @@
+import hashlib
 import os
 import shutil
+import struct
 import tempfile
 
 import distro
@@ -126,3 +128,127 @@ def test_pubkeys_from_rpms():
         ],
     )
     assert gpg.get_pubkeys_from_rpms(installed_rpms) == [GpgKey(fingerprint='9570ff31', rpmdb=True)]
+
+
+RHEL9_KEY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'files', 'distro', 'rhel',
+                              'rpm-gpg', '9', 'RPM-GPG-KEY-redhat-release')
+
+# sample v6 certificate from RFC 9580, its fingerprint is
+# cb186c4f0609a697e4d52dfa6c722b0c1f1e27c18a56708f6525ec27bad9acc9
+V6_KEY_ARMORED = '''-----BEGIN PGP PUBLIC KEY BLOCK-----
+
+xioGY4d/4xsAAAAg+U2nu0jWCmHlZ3BqZYfQMxmZu52JGggkLq2EVD34laPCsQYf
+GwoAAABCBYJjh3/jAwsJBwUVCg4IDAIWAAKbAwIeCSIhBssYbE8GCaaX5NUt+mxy
+KwwfHifBilZwj2Ul7Ce62azJBScJAgcCAAAAAK0oIBA+LX0ifsDm185Ecds2v8lw
+gyU2kCcUmKfvBXbAf6rhRYWzuQOwEn7E/aLwIwRaLsdry0+VcallHhSu4RN6HWaE
+QsiPlR4zxP/TP7mhfVEe7XWPxtnMUMtf15OyA51YBM4qBmOHf+MZAAAAIIaTJINn
++eUBXbki+PSAld2nhJh/LVmFsS+60WyvXkQ1wpsGGBsKAAAALAWCY4d/4wKbDCIh
+BssYbE8GCaaX5NUt+mxyKwwfHifBilZwj2Ul7Ce62azJAAAAAAQBIKbpGG2dWTX8
+j+VjFM21J0hqWlEg+bdiojWnKfA5AQpWUWtnNwDEM0g12vYxoWM8Y81W+bHBw805
+I8kWVkXU6vFOi+HWvv/ira7ofJu16NnoUkhclkUrk0mXubZvyl4GBg==
+-----END PGP PUBLIC KEY BLOCK-----
+'''
+
+
+def _read_rhel9_key():
+    with open(RHEL9_KEY_PATH, 'rb') as f:
+        return f.read()
+
+
+def _to_old_format(data):
+    """
+    Convert new format packet headers with one octet lengths to old format headers
+    """
+    result = b''
+    for tag, body in gpg._iter_packets(data):
+        result += bytes(bytearray([0x80 | (tag << 2) | 1])) + struct.pack('>H', len(body)) + body
+    return result
+
+
+def test_parse_fp_from_key_data_armored():
+    assert gpg._parse_fp_from_key_data(_read_rhel9_key()) == ['fd431d51', '5a6340b3']
+
+
+def test_parse_fp_from_key_data_binary():
+    data = gpg._dearmor(_read_rhel9_key().decode('utf-8'))
+    assert gpg._parse_fp_from_key_data(data) == ['fd431d51', '5a6340b3']
+    assert gpg._parse_fp_from_key_data(_to_old_format(data)) == ['fd431d51', '5a6340b3']
+
+
+def test_parse_fp_from_key_data_v6():
+    assert gpg._parse_fp_from_key_data(V6_KEY_ARMORED.encode('utf-8')) == ['0609a697']
+
+
+def test_parse_fp_from_key_data_v5():
+    body = b'\x05' + b'\x00' * 9
+    fingerprint = hashlib.sha256(b'\x9a' + struct.pack('>I', len(body)) + body).hexdigest()
+    data = b'\xc6' + bytes(bytearray([len(body)])) + body
+    assert gpg._parse_fp_from_key_data(data) == [fingerprint[8:16]]
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'test',
+    b'-----BEGIN PGP PUBLIC KEY BLOCK-----\n\nxioG\n',
+    # truncated packet
+    b'\xc6\x20\x04',
+    # public key packet of unsupported version
+    b'\xc6\x02\x03\x00',
+    # no public key packet
+    b'\xcd\x01\x00',
+])
+def test_parse_fp_from_key_data_invalid(data):
+    with pytest.raises(ValueError):
+        gpg._parse_fp_from_key_data(data)
+
+
+@pytest.mark.parametrize('length', [1, 2, 3, 5, 100])
+def test_parse_fp_from_key_data_truncated_binary(length):
+    data = gpg._dearmor(_read_rhel9_key().decode('utf-8'))
+    for key in (data, _to_old_format(data)):
+        with pytest.raises(ValueError):
+            gpg._parse_fp_from_key_data(key[:length])
+
+
+@pytest.mark.parametrize('data', [
+    # new format headers cut inside the length octets
+    b'\xc6',
+    b'\xc6\xc0',
+    b'\xc6\xff\x00\x00',
+    # old format header cut inside the length octets
+    b'\x99\x01',
+    b'\x9a\x00\x00',
+])
+def test_parse_fp_from_key_data_truncated_header(data):
+    with pytest.raises(ValueError):
+        gpg._parse_fp_from_key_data(data)
+
+
+def test_get_gpg_fp_from_file_parsed(monkeypatch):
+    def _gpg_show_keys_mocked(dummy_key_path):
+        assert False, 'gpg2 should not be executed for parsable keys'
+
+    monkeypatch.setattr(gpg, '_gpg_show_keys', _gpg_show_keys_mocked)
+    assert gpg.get_gpg_fp_from_file(RHEL9_KEY_PATH) == ['fd431d51', '5a6340b3']
+
+
+def test_get_gpg_fp_from_file_fallback(monkeypatch, tmp_path):
+    key_path = tmp_path / 'key'
+    key_path.write_bytes(b'\xc6\x02\x03\x00')
+    gpg_outputs = {
+        str(key_path): {'exit_code': 0, 'stdout': ['pub:-:4096:1:5054E4A45A6340B3:1..'], 'stderr': ''},
+    }
+    monkeypatch.setattr(gpg, '_gpg_show_keys', lambda key_path: gpg_outputs[key_path])
+
+    assert gpg.get_gpg_fp_from_file(str(key_path)) == ['5a6340b3']
+
+
+def test_get_gpg_fps_from_dir(monkeypatch, tmp_path):
+    shutil.copy(RHEL9_KEY_PATH, str(tmp_path / 'RPM-GPG-KEY-redhat-release'))
+    (tmp_path / 'RPM-GPG-KEY-v6').write_text(V6_KEY_ARMORED)
+    (tmp_path / 'subdir').mkdir()
+
+    assert gpg.get_gpg_fps_from_dir(str(tmp_path)) == [
+        (str(tmp_path / 'RPM-GPG-KEY-redhat-release'), ['fd431d51', '5a6340b3']),
+        (str(tmp_path / 'RPM-GPG-KEY-v6'), ['0609a697']),
+    ]
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from leapp.models import DistributionSignedRPM, fields, InstalledRPM, RPM
+
+PACKAGES_COUNT = 5000
+PACKAGER = 'Red Hat, Inc. <http://bugzilla.redhat.com/bugzilla>'
+PGPSIG = 'RSA/SHA256, Mon 01 Jan 2024 12:00:00 PM UTC, Key ID 199e2f91fd431d51'
+
+
+def _make_rpms(count):
+    return [
+        RPM(name='pkg{}'.format(i), epoch='0', packager=PACKAGER, version='1.{}'.format(i), release='1.el9',
+            arch=('x86_64', 'noarch')[i % 2], pgpsig=PGPSIG, repository='rhel9-BaseOS',
+            module='perl' if i % 100 == 0 else None, stream='5.32' if i % 100 == 0 else None)
+        for i in range(count)
+    ]
+
+
+def _items_field(model=InstalledRPM):
+    return model.fields['items']
+
+
+def test_columnar_roundtrip():
+    rpms = _make_rpms(10)
+
+    columns = _items_field()._convert_from_model(rpms, 'items')
+    # shared values are stored just once
+    assert columns['strings'].count(PGPSIG) == 1
+    assert columns['values']['name'] == ['pkg{}'.format(i) for i in range(10)]
+
+    items = _items_field()._convert_to_model(json.loads(json.dumps(columns)), 'items')
+    assert items == rpms
+    assert [rpm.module for rpm in items] == ['perl'] + [None] * 9
+
+
+def test_columnar_empty():
+    columns = _items_field()._convert_from_model([], 'items')
+    items = _items_field()._convert_to_model(columns, 'items')
+    assert not items
+    assert items == []
+
+
+def test_previous_representation_accepted():
+    rpms = _make_rpms(3)
+    items = _items_field()._convert_to_model([rpm.dump() for rpm in rpms], 'items')
+    assert items == rpms
+
+
+def test_invalid_columns():
+    with pytest.raises(fields.ModelViolationError):
+        _items_field()._convert_to_model({'strings': []}, 'items')
+
+
+def test_columnar_size():
+    """
+    The columnar representation of 5k packages is much smaller than the previous one
+    """
+    rpms = _make_rpms(PACKAGES_COUNT)
+    field = _items_field(DistributionSignedRPM)
+    previous_data = json.dumps([rpm.dump() for rpm in rpms])
+    columnar_data = json.dumps(field._convert_from_model(rpms, 'items'))
+
+    assert len(columnar_data) < len(previous_data) / 2
+    assert field._convert_to_model(json.loads(columnar_data), 'items') == rpms
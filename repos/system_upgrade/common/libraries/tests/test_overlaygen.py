@@ -0,0 +1,193 @@
+import os
+import threading
+
+import pytest
+
+from leapp.exceptions import StopActorExecutionError
+from leapp.libraries.common import overlaygen
+from leapp.libraries.common.testutils import logger_mocked
+from leapp.libraries.stdlib import api, CalledProcessError
+
+
+def test_create_mount_disk_images(monkeypatch):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    disk_sizes = {'/mp{}'.format(i): 1000 + i for i in range(20)}
+    threads = set()
+
+    def create_mount_disk_image_mocked(disk_images_directory, path, disk_size, templates_dir=None):
+        assert disk_images_directory == '/diskimages'
+        assert disk_sizes[path] == disk_size
+        threads.add(threading.current_thread().ident)
+        return '/diskimages/{}'.format(overlaygen._mount_name(path))
+
+    monkeypatch.setattr(overlaygen, '_create_mount_disk_image', create_mount_disk_image_mocked)
+
+    images = overlaygen._create_mount_disk_images('/diskimages', disk_sizes)
+
+    assert images == {mp: '/diskimages/{}'.format(overlaygen._mount_name(mp)) for mp in disk_sizes}
+    assert len(threads) <= overlaygen._MAX_DISK_IMAGE_WORKERS
+    # the time spent on each disk image is logged
+    assert all(mp in api.current_logger.dbgmsg for mp in disk_sizes)
+
+
+@pytest.mark.parametrize('failing', (['/var'], ['/home', '/var']))
+def test_create_mount_disk_images_errors(monkeypatch, failing):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    created = []
+
+    def create_mount_disk_image_mocked(disk_images_directory, path, disk_size, templates_dir=None):
+        if path in failing:
+            raise StopActorExecutionError('Cannot create XFS filesystem in {}'.format(path),
+                                          details={'error message': 'mkfs failed'})
+        created.append(path)
+        return path
+
+    monkeypatch.setattr(overlaygen, '_create_mount_disk_image', create_mount_disk_image_mocked)
+
+    with pytest.raises(StopActorExecutionError) as err:
+        overlaygen._create_mount_disk_images('/diskimages', {'/': 1000, '/home': 1000, '/var': 1000})
+
+    # all disk images are processed even when some of them fail
+    assert sorted(created) == sorted({'/', '/home', '/var'} - set(failing))
+    if len(failing) == 1:
+        assert err.value.message == 'Cannot create XFS filesystem in /var'
+    else:
+        assert err.value.message == 'Cannot create disk images for 2 mountpoints: /home, /var'
+        assert sorted(err.value.details) == failing
+        assert 'mkfs failed' in err.value.details['/var']
+
+
+@pytest.mark.parametrize('error', (
+    OSError(28, 'No space left on device'),
+    CalledProcessError('dd failed', ['/bin/dd'], {'exit_code': 1}),
+))
+def test_create_mount_disk_images_other_errors(monkeypatch, error):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+
+    def create_mount_disk_image_mocked(disk_images_directory, path, disk_size, templates_dir=None):
+        if path == '/home':
+            raise error
+        if path == '/var':
+            raise StopActorExecutionError('Cannot create XFS filesystem in /var',
+                                          details={'error message': 'mkfs failed'})
+        return path
+
+    monkeypatch.setattr(overlaygen, '_create_mount_disk_image', create_mount_disk_image_mocked)
+
+    with pytest.raises(StopActorExecutionError) as err:
+        overlaygen._create_mount_disk_images('/diskimages', {'/': 1000, '/home': 1000, '/var': 1000})
+
+    # all problems are reported at once
+    assert err.value.message == 'Cannot create disk images for 2 mountpoints: /home, /var'
+    assert 'Cannot create disk image for /home' in err.value.details['/home']
+    assert str(error) in err.value.details['/home']
+    assert 'mkfs failed' in err.value.details['/var']
+
+
+@pytest.mark.parametrize('disk_size, expected', (
+    (100, 130),
+    (130, 130),
+    (131, 130),
+    (1000, 1000),
+    (1001, 1000),
+    (12345, 12288),
+    (2**20, 2**20),
+    (2**20 - 1, 2**20 - 2**13),
+))
+def test_get_disk_image_template_size(disk_size, expected):
+    rounded = overlaygen._get_disk_image_template_size(disk_size)
+    assert rounded == expected
+    assert disk_size - rounded < max(disk_size / 64, 1) or disk_size < 130
+
+
+@pytest.fixture
+def template_dirs(monkeypatch, tmp_path):
+    """
+    Prepare directories for disk images and templates, mock formatting and setting UUIDs of disk images
+    """
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(overlaygen, 'get_env', lambda name, default=None: default)
+    templates_dir = tmp_path / 'templates'
+    templates_dir.mkdir()
+    images_dir = tmp_path / 'diskimages'
+    images_dir.mkdir()
+    formatted = []
+    commands = []
+
+    def allocate_and_format_mocked(diskimage_path, disk_size, disk_images_directory):
+        formatted.append((diskimage_path, disk_size))
+        with open(diskimage_path, 'wb') as f:
+            f.truncate(disk_size * 1024 * 1024)
+            f.write(b'XFSB')
+
+    def run_mocked(cmd, *args, **kwargs):
+        commands.append(cmd)
+        return {'stdout': '', 'stderr': '', 'exit_code': 0}
+
+    monkeypatch.setattr(overlaygen, '_allocate_and_format_disk_image', allocate_and_format_mocked)
+    monkeypatch.setattr(overlaygen, 'run', run_mocked)
+    return templates_dir, images_dir, formatted, commands
+
+
+def test_create_mount_disk_image_from_template(template_dirs):
+    templates_dir, images_dir, formatted, commands = template_dirs
+
+    for mountpoint in ('/', '/var', '/home'):
+        image = overlaygen._create_mount_disk_image(str(images_dir), mountpoint, 1000, str(templates_dir))
+        assert image == str(images_dir / overlaygen._mount_name(mountpoint))
+        with open(image, 'rb') as f:
+            assert f.read(4) == b'XFSB'
+        assert os.path.getsize(image) == 1000 * 1024 * 1024
+
+    # the template has been formatted just once
+    template = overlaygen._get_disk_image_template_path(str(templates_dir), 1000)
+    assert formatted == [(template + '.tmp', 1000)]
+
+    (templates_dir / 'xfs-v1-2000M.img').write_text('')
+    overlaygen._prune_disk_image_templates(str(templates_dir), [1000])
+    assert os.listdir(str(templates_dir)) == [os.path.basename(template)]
+
+
+def test_create_mount_disk_images_same_template(template_dirs):
+    templates_dir, images_dir, formatted, commands = template_dirs
+    # both sizes are rounded up to the minimal size and so share the template
+    disk_sizes = {mp: overlaygen._get_disk_image_template_size(size) for mp, size in (('/boot', 50), ('/opt', 100))}
+
+    images = overlaygen._create_mount_disk_images(str(images_dir), disk_sizes, str(templates_dir))
+
+    assert len(formatted) == 1
+    # each clone gets its own filesystem UUID so they can be mounted at once
+    assert sorted(commands) == sorted(
+        ['/sbin/xfs_admin', '-U', 'generate', image] for image in images.values()
+    )
+    assert len(set(images.values())) == 2
+
+
+def test_create_mount_disk_image_uuid_error(monkeypatch, template_dirs):
+    templates_dir, images_dir, formatted, dummy_commands = template_dirs
+
+    def run_failing(cmd, *args, **kwargs):
+        raise CalledProcessError('xfs_admin failed', cmd, {'exit_code': 1})
+
+    monkeypatch.setattr(overlaygen, 'run', run_failing)
+
+    image = overlaygen._create_mount_disk_image(str(images_dir), '/var', 1000, str(templates_dir))
+
+    # the disk image is formatted from scratch instead
+    assert formatted[-1] == (image, 1000)
+
+
+def test_remove_disk_image_templates(monkeypatch, tmp_path):
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    scratch_dir = str(tmp_path / 'scratch')
+    templates_dir = overlaygen.get_disk_image_templates_dir(scratch_dir)
+    assert templates_dir == str(tmp_path / 'diskimage-templates')
+
+    # nothing to remove
+    overlaygen.remove_disk_image_templates(scratch_dir)
+
+    os.mkdir(templates_dir)
+    with open(os.path.join(templates_dir, 'xfs-v1-1000M.img'), 'w'):
+        pass
+    overlaygen.remove_disk_image_templates(scratch_dir)
+    assert not os.path.exists(templates_dir)
@@ -253,6 +253,95 @@ def test_sku_listing(monkeypatch, actor_mocked, context_mocked):
     assert attached_skus[0] == '598339696910', assert_fail_description
 
 
+def test_sku_listing_without_entitlement_certs(monkeypatch, actor_mocked, context_mocked):
+    """Tests whether no SKUs are reported without asking RHSM when there are no entitlement certificates."""
+    monkeypatch.setattr(os, 'listdir', lambda path: ['unrelated.txt'] if path == '/etc/pki/entitlement' else [])
+    context_mocked.add_mocked_command_call(CMD_RHSM_LIST_CONSUMED, 'SKU: 598339696910')
+
+    assert rhsm.get_attached_skus(context_mocked) == []
+    assert not context_mocked.commands_called
+
+
+def test_sku_listing_with_entitlement_certs(monkeypatch, actor_mocked, context_mocked):
+    monkeypatch.setattr(os, 'listdir', lambda path: ['1234.pem', '1234-key.pem'])
+    context_mocked.add_mocked_command_call(CMD_RHSM_LIST_CONSUMED, 'SKU: 598339696910')
+
+    assert rhsm.get_attached_skus(context_mocked) == ['598339696910']
+
+
+@pytest.fixture
+def rhsm_cache(monkeypatch, tmp_path):
+    monkeypatch.setenv('LEAPP_EXECUTION_ID', 'execution-1')
+    monkeypatch.setattr(rhsm, 'RHSM_CACHE_PATH', str(tmp_path / 'rhsm_cache.json'))
+    monkeypatch.setattr(rhsm, '_RHSM_CACHE', {})
+
+
+def test_queries_cached(monkeypatch, actor_mocked, context_mocked, rhsm_cache):
+    """Tests whether repeated queries are served from the cache shared by actors of the same leapp execution."""
+    context_mocked.add_mocked_command_call(CMD_RHSM_RELEASE, 'Release: 8.10')
+    context_mocked.add_mocked_command_call(CMD_RHSM_STATUS, RHSM_STATUS_OUTPUT_SCA)
+
+    assert rhsm.get_release(context_mocked) == '8.10'
+    assert rhsm.is_manifest_sca(context_mocked)
+    assert rhsm.get_release(context_mocked) == '8.10'
+    assert rhsm.is_manifest_sca(context_mocked)
+    assert context_mocked.commands_called == [list(CMD_RHSM_RELEASE), list(CMD_RHSM_STATUS)]
+
+    # another actor loads the cache from the file
+    monkeypatch.setattr(rhsm, '_RHSM_CACHE', {})
+    context_mocked.commands_called = []
+    assert rhsm.get_release(context_mocked) == '8.10'
+    assert not context_mocked.commands_called
+
+    # the cache is not used by other leapp executions
+    monkeypatch.setattr(rhsm, '_RHSM_CACHE', {})
+    monkeypatch.setenv('LEAPP_EXECUTION_ID', 'execution-2')
+    assert rhsm.get_release(context_mocked) == '8.10'
+    assert context_mocked.commands_called == [list(CMD_RHSM_RELEASE)]
+
+
+def test_failed_queries_not_cached(monkeypatch, actor_mocked, rhsm_cache):
+    context = IsolatedActionsMocked(raise_err=True)
+    for dummy_attempt in range(2):
+        with pytest.raises(StopActorExecutionError):
+            rhsm.get_release(context)
+    assert len(context.commands_called) == 2
+
+
+def test_failing_identity_not_cached(monkeypatch, actor_mocked, context_mocked, rhsm_cache, consumer_cert_present):
+    # e.g. a transient network error
+    context_mocked.add_mocked_command_call(CMD_RHSM_IDENTITY, exit_code=70)
+    with pytest.raises(StopActorExecutionError):
+        rhsm.is_rhsm_registered(context_mocked)
+
+    # another actor does not get the failure from the cache file
+    monkeypatch.setattr(rhsm, '_RHSM_CACHE', {})
+    context_mocked.add_mocked_command_call(CMD_RHSM_IDENTITY, exit_code=0)
+    assert rhsm.is_rhsm_registered(context_mocked)
+    assert context_mocked.commands_called == [list(CMD_RHSM_IDENTITY)] * 2
+
+
+@pytest.mark.parametrize('change', (
+    lambda context: rhsm.set_release(context, '9.6'),
+    rhsm.unset_release,
+    rhsm.refresh,
+    lambda context: rhsm.switch_certificate(context, mocked_rhsm_info(), '/some/cert.pem'),
+))
+def test_cache_invalidated(monkeypatch, actor_mocked, context_mocked, rhsm_cache, change):
+    context_mocked.add_mocked_command_call(CMD_RHSM_RELEASE, 'Release: 8.10')
+    rhsm.get_release(context_mocked)
+
+    change(context_mocked)
+    context_mocked.add_mocked_command_call(CMD_RHSM_RELEASE, 'Release: 9.6')
+
+    assert rhsm.get_release(context_mocked) == '9.6'
+    # the invalidation is visible to other actors
+    monkeypatch.setattr(rhsm, '_RHSM_CACHE', {})
+    context_mocked.commands_called = []
+    assert rhsm.get_release(context_mocked) == '9.6'
+    assert not context_mocked.commands_called
+
+
 def test_scanrhsminfo_with_skip_rhsm(monkeypatch, context_mocked):
     """Tests whether the scan_rhsm_info respects the LEAPP_NO_RHSM environmental variable."""
     mocked_actor = CurrentActorMocked(envars={'LEAPP_NO_RHSM': '1'})
@@ -421,19 +510,33 @@ def test_get_existing_product_certificates_missing_cert_directory(monkeypatch, a
     assert existing_product_certificates[0] == '/etc/pki/product-default/cert', fail_description
 
 
-def test_is_registered_on_registered_system(context_mocked):
+@pytest.fixture
+def consumer_cert_present(monkeypatch):
+    orig_exists = os.path.exists
+    monkeypatch.setattr(os.path, 'exists', lambda path: path == '/etc/pki/consumer/cert.pem' or orig_exists(path))
+
+
+def test_is_registered_on_registered_system(context_mocked, consumer_cert_present):
     """Tests whether the library obtains the registraton status correctly from a registered system."""
     context_mocked.add_mocked_command_call(CMD_RHSM_IDENTITY, exit_code=0)
     assert rhsm.is_rhsm_registered(context_mocked)
 
 
-def test_is_registered_on_unregistered_system(context_mocked):
+def test_is_registered_on_unregistered_system(context_mocked, consumer_cert_present):
     """Tests whether the library obtains the registraton status correctly from an unregistered system."""
     context_mocked.add_mocked_command_call(CMD_RHSM_IDENTITY, exit_code=1)
     assert not rhsm.is_rhsm_registered(context_mocked)
 
 
-def test_is_registered_error(context_mocked):
+def test_is_registered_without_consumer_cert(monkeypatch, context_mocked):
+    """Tests whether the system without the consumer certificate is considered unregistered without asking RHSM."""
+    monkeypatch.setattr(os.path, 'exists', lambda path: False)
+    context_mocked.add_mocked_command_call(CMD_RHSM_IDENTITY, exit_code=0)
+    assert not rhsm.is_rhsm_registered(context_mocked)
+    assert not context_mocked.commands_called
+
+
+def test_is_registered_error(context_mocked, consumer_cert_present):
     """Tests whether the is_rhsm_registered function correctly handles command errors"""
     context_mocked.add_mocked_command_call(CMD_RHSM_IDENTITY, exit_code=2)
     with pytest.raises(StopActorExecutionError) as err:
@@ -1,39 +1,112 @@
 import pytest
 
-from leapp.libraries.common.rpms import _parse_config_modification, get_leapp_dep_packages, get_leapp_packages
-from leapp.libraries.common.testutils import CurrentActorMocked
+from leapp.libraries.common import rpms
+from leapp.libraries.common.rpms import (
+    create_lookup,
+    get_leapp_dep_packages,
+    get_leapp_packages,
+    has_package
+)
+from leapp.libraries.common.testutils import CurrentActorMocked, logger_mocked
 from leapp.libraries.stdlib import api
+from leapp.models import DistributionSignedRPM, RPM, ThirdPartyRPM
+
+
+def _is_config_modified(data, config):
+    return rpms._is_config_modified(rpms._parse_rpm_verify_output(data).get(config, ''))
 
 
 def test_parse_config_modification():
     # Empty means no modification
     data = []
-    assert not _parse_config_modification(data, "/etc/ssh/sshd_config")
+    assert not _is_config_modified(data, "/etc/ssh/sshd_config")
 
     # This one was modified
     data = [
         "S.5....T.  c /etc/ssh/sshd_config",
     ]
-    assert _parse_config_modification(data, "/etc/ssh/sshd_config")
+    assert _is_config_modified(data, "/etc/ssh/sshd_config")
 
     # This one was just touched (timestamp does not match)
     data = [
         ".......T.  c /etc/ssh/sshd_config",
     ]
-    assert not _parse_config_modification(data, "/etc/ssh/sshd_config")
+    assert not _is_config_modified(data, "/etc/ssh/sshd_config")
 
     # This one was not modified (not listed at all)
     data = [
         ".......T.  c /etc/sysconfig/sshd",
     ]
-    assert not _parse_config_modification(data, "/etc/ssh/sshd_config")
+    assert not _is_config_modified(data, "/etc/ssh/sshd_config")
 
     # Parse multiple lines
     data = [
         "S.5....T.  c /etc/sysconfig/sshd",
         "S.5....T.  c /etc/ssh/sshd_config",
     ]
-    assert _parse_config_modification(data, "/etc/ssh/sshd_config")
+    assert _is_config_modified(data, "/etc/ssh/sshd_config")
+
+
+def test_parse_rpm_verify_output():
+    data = [
+        "S.5......  c /etc/openldap/ldap.conf",
+        "missing     /boot/efi/EFI (Permission denied)",
+        "missing   d /usr/share/doc/pkg/README",
+        ".....UG..  g /var/run/avahi-daemon",
+        "file /root/custom.conf is not owned by any package",
+        "/etc/file with spaces.conf",
+    ]
+    assert rpms._parse_rpm_verify_output(data) == {
+        '/etc/openldap/ldap.conf': 'S.5......',
+        '/boot/efi/EFI': 'missing',
+        '/usr/share/doc/pkg/README': 'missing',
+        '/var/run/avahi-daemon': '.....UG..',
+        '/root/custom.conf': '',
+    }
+
+
+def test_verify_files_batched_and_memoized(monkeypatch):
+    calls = []
+
+    def mocked_run(cmd, *args, **kwargs):
+        calls.append(cmd)
+        return {'stdout': ['S.5......  c /etc/a.conf', '..5......  c /etc/other.conf',
+                           'file /etc/unowned.conf is not owned by any package']}
+
+    monkeypatch.setattr(rpms, '_VERIFY_CACHE', {})
+    monkeypatch.setattr(rpms.stdlib, 'run', mocked_run)
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
+
+    result = rpms.verify_files(['/etc/b.conf', '/etc/a.conf', '/etc/unowned.conf'])
+    assert result == {'/etc/a.conf': 'S.5......', '/etc/b.conf': '', '/etc/unowned.conf': ''}
+    assert calls == [['rpm', '-Vf', '--nomtime', '/etc/a.conf', '/etc/b.conf', '/etc/unowned.conf']]
+
+    # already verified files (including other files of verified packages) are not verified again
+    assert rpms.check_file_modification('/etc/a.conf')
+    assert not rpms.check_file_modification('/etc/b.conf')
+    assert rpms.verify_files(['/etc/other.conf']) == {'/etc/other.conf': '..5......'}
+    assert len(calls) == 1
+
+    rpms.verify_files(['/etc/a.conf', '/etc/c.conf'])
+    assert calls[1] == ['rpm', '-Vf', '--nomtime', '/etc/c.conf']
+
+    # results are not reused by another actor, files could have been modified meanwhile
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
+    rpms.verify_files(['/etc/a.conf'])
+    assert calls[2] == ['rpm', '-Vf', '--nomtime', '/etc/a.conf']
+
+
+def test_verify_files_rpm_error(monkeypatch):
+    def mocked_run(cmd, *args, **kwargs):
+        raise OSError('rpm not found')
+
+    monkeypatch.setattr(rpms, '_VERIFY_CACHE', {})
+    monkeypatch.setattr(rpms.stdlib, 'run', mocked_run)
+    monkeypatch.setattr(api, 'current_logger', logger_mocked())
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
+
+    assert rpms.verify_files(['/etc/a.conf']) == {'/etc/a.conf': ''}
+    assert not rpms._get_verify_cache()
 
 
 @pytest.mark.parametrize(
@@ -148,3 +221,115 @@ def test_get_leapp_dep_packages(major_version, component, result, monkeypatch):
         kwargs["component"] = component
 
     assert frozenset(get_leapp_dep_packages(**kwargs)) == frozenset(result)
+
+
+def _make_rpm(name, arch='x86_64', version='1.0', release='1.el9'):
+    return RPM(name=name, epoch='0', packager='packager', version=version, release=release, arch=arch,
+               pgpsig='SIG')
+
+
+def _mock_consume(monkeypatch, msgs):
+    consumed = []
+
+    def consume_mocked(model):
+        consumed.append(model)
+        return iter([msg for msg in msgs if isinstance(msg, model)])
+
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
+    monkeypatch.setattr(api, 'consume', consume_mocked)
+    return consumed
+
+
+def test_has_package_lookup_memoized(monkeypatch):
+    consumed = _mock_consume(monkeypatch, [
+        DistributionSignedRPM(items=[_make_rpm('bash'), _make_rpm('tzdata', arch='noarch')]),
+        ThirdPartyRPM(items=[_make_rpm('vendor-tool')]),
+    ])
+
+    for dummy_i in range(3):
+        assert has_package(DistributionSignedRPM, 'bash')
+        assert not has_package(DistributionSignedRPM, 'vendor-tool')
+        assert has_package(DistributionSignedRPM, 'tzdata', arch='noarch')
+        assert not has_package(DistributionSignedRPM, 'tzdata', arch='x86_64')
+        assert has_package(ThirdPartyRPM, 'vendor-tool')
+    # one message consumed per model and combination of filters
+    assert consumed == [DistributionSignedRPM, DistributionSignedRPM, ThirdPartyRPM]
+
+    # the returned set can be modified without affecting the memoized lookup
+    lookup = create_lookup(DistributionSignedRPM, 'items', keys=('name',))
+    assert lookup == {('bash',), ('tzdata',)}
+    lookup.clear()
+    assert has_package(DistributionSignedRPM, 'bash')
+
+
+def test_has_package_lookup_invalidated(monkeypatch):
+    _mock_consume(monkeypatch, [DistributionSignedRPM(items=[_make_rpm('bash')])])
+    assert has_package(DistributionSignedRPM, 'bash')
+
+    # messages consumed by another actor
+    _mock_consume(monkeypatch, [DistributionSignedRPM(items=[_make_rpm('zsh')])])
+    assert not has_package(DistributionSignedRPM, 'bash')
+    assert has_package(DistributionSignedRPM, 'zsh')
+
+
+def test_has_package_other_context_not_memoized():
+    class ContextMocked(object):
+        def __init__(self):
+            self.msgs = []
+
+        def consume(self, model):
+            return iter(self.msgs)
+
+    context = ContextMocked()
+    assert not has_package(DistributionSignedRPM, 'bash', context=context)
+    context.msgs = [DistributionSignedRPM(items=[_make_rpm('bash')])]
+    assert has_package(DistributionSignedRPM, 'bash', context=context)
+
+
+def _rpm_header(name, dirnames, files):
+    return {
+        'name': name,
+        'dirnames': dirnames,
+        'basenames': [basename for dummy_dirindex, basename in files],
+        'dirindexes': [dirindex for dirindex, dummy_basename in files],
+    }
+
+
+def test_get_rpm_files_index(monkeypatch):
+    headers = [
+        _rpm_header('python3-foo', ['/usr/lib/python3.9/site-packages/foo/', '/usr/share/doc/foo/'],
+                    [(0, '__init__.py'), (0, '_foo.so'), (0, 'data.json'), (1, 'example.py')]),
+        _rpm_header('python3-bar', ['/usr/lib64/python3.9/site-packages/', '/usr/lib/python3.9/'],
+                    [(0, 'bar.py'), (1, 'site-packages')]),
+        _rpm_header('bash', ['/usr/bin/'], [(0, 'bash')]),
+    ]
+    calls = []
+
+    def get_rpm_headers_mocked():
+        calls.append(True)
+        return iter(headers)
+
+    monkeypatch.setattr(rpms, 'rpm', True)
+    monkeypatch.setattr(rpms, '_get_rpm_headers', get_rpm_headers_mocked)
+    monkeypatch.setattr(rpms, '_FILES_INDEX_CACHE', {})
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
+    prefixes = ['/usr/lib/python3.9/site-packages', '/usr/lib64/python3.9/site-packages/']
+
+    assert rpms.get_rpm_files_index(prefixes, ('.py', '.so')) == {
+        '/usr/lib/python3.9/site-packages/foo/__init__.py': 'python3-foo',
+        '/usr/lib/python3.9/site-packages/foo/_foo.so': 'python3-foo',
+        '/usr/lib64/python3.9/site-packages/bar.py': 'python3-bar',
+    }
+    assert rpms.get_rpm_files_index(['/usr/lib/python3.9/site-packages/foo']) == {
+        '/usr/lib/python3.9/site-packages/foo/__init__.py': 'python3-foo',
+        '/usr/lib/python3.9/site-packages/foo/_foo.so': 'python3-foo',
+        '/usr/lib/python3.9/site-packages/foo/data.json': 'python3-foo',
+    }
+    # the index is built once for the same arguments
+    rpms.get_rpm_files_index(reversed(prefixes), ['.so', '.py'])
+    assert len(calls) == 2
+
+    # indexes are not reused by another actor, packages could have been changed meanwhile
+    monkeypatch.setattr(api, 'current_actor', CurrentActorMocked())
+    rpms.get_rpm_files_index(prefixes, ('.py', '.so'))
+    assert len(calls) == 3
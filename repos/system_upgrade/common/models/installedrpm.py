@@ -17,9 +17,92 @@ class RPM(Model):
     stream = fields.Nullable(fields.String())
 
 
+_INTERNED_RPM_FIELDS = ('epoch', 'packager', 'arch', 'pgpsig', 'repository', 'module', 'stream')
+"""
+Fields of RPM with a few distinct values, stored in the table of strings in the columnar representation
+"""
+
+
+def _rpms_to_columns(rpms):
+    """
+    Convert the list of RPM models into the columnar representation.
+
+    The representation is a dictionary with a list of values for every field
+    of the RPM model (under the 'values' key). Values of fields listed in
+    _INTERNED_RPM_FIELDS are stored just once in the table of strings (under
+    the 'strings' key) and their columns contain indexes into the table.
+    E.g. the pgpsig of all packages signed by the same key is stored once.
+    """
+    strings = []
+    indexes = {}
+    values = {field: [] for field in RPM.fields}
+    for rpm in rpms:
+        for field, column in values.items():
+            value = getattr(rpm, field)
+            if value is not None and field in _INTERNED_RPM_FIELDS:
+                index = indexes.get(value)
+                if index is None:
+                    index = indexes[value] = len(strings)
+                    strings.append(value)
+                value = index
+            column.append(value)
+    return {'strings': strings, 'values': values}
+
+
+def _rpms_from_columns(columns):
+    strings = columns['strings']
+    values = {}
+    for field, column in columns['values'].items():
+        if field in _INTERNED_RPM_FIELDS:
+            column = [strings[index] if index is not None else None for index in column]
+        values[field] = column
+    names = list(values)
+    return [RPM(**dict(zip(names, row))) for row in zip(*(values[name] for name in names))]
+
+
+class _RPMList(fields.List):
+    """
+    List of RPM models serialized in the compact columnar representation
+
+    See _rpms_to_columns for the description of the representation. The list
+    of RPM models in the builtin representation (used by previous versions)
+    is accepted as well when the message is deserialized.
+    """
+
+    def __init__(self, **kwargs):
+        super(_RPMList, self).__init__(fields.Model(RPM), **kwargs)
+
+    def _validate_builtin_value(self, value, name):
+        if isinstance(value, dict):
+            if not isinstance(value.get('strings'), list) or not isinstance(value.get('values'), dict):
+                raise fields.ModelViolationError(
+                    'The value of "{name}" field is not a valid columnar list of RPMs'.format(name=name)
+                )
+            return
+        super(_RPMList, self)._validate_builtin_value(value, name)
+
+    def _convert_to_model(self, value, name):
+        if isinstance(value, dict):
+            self._validate_builtin_value(value, name)
+            return _rpms_from_columns(value)
+        return super(_RPMList, self)._convert_to_model(value, name)
+
+    def _convert_from_model(self, value, name):
+        self._validate_model_value(value, name)
+        if value is None:
+            return None
+        return _rpms_to_columns(value)
+
+
 class InstalledRPM(Model):
     topic = SystemInfoTopic
-    items = fields.List(fields.Model(RPM), default=[])
+    items = _RPMList(default=[])
+    """
+    Installed packages
+
+    The list is stored in a compact columnar representation in messages
+    (see _rpms_to_columns).
+    """
 
 
 class DistributionSignedRPM(InstalledRPM):